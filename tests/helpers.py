@@ -0,0 +1,79 @@
+import asyncio
+import heapq
+import itertools
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import Executor, Future
+
+
+def random_walk(size, seed=3, volatility=0.3, interval=300):
+    """Candles of random walk close with open at previous close and
+    exponentially distributed wicks, same for the same seed."""
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, volatility, size))
+    open = np.r_[close[0], close[:-1]]
+    return pd.DataFrame({
+        "time": np.arange(size, dtype=np.int64) * interval,
+        "open": open,
+        "high": np.maximum(open, close) + rng.exponential(volatility, size),
+        "low": np.minimum(open, close) - rng.exponential(volatility, size),
+        "close": close,
+        "volume": np.ones(size),
+    })
+
+
+class VirtualTime(Executor):
+    """Clock, sleep and executor of CandleScheduler in virtual time.
+    Timers fire in order of their time, jobs run in the driving thread
+    and finish duration virtual seconds after submit."""
+
+    def __init__(self, now, duration=0):
+        self.now = now
+        self.duration = duration
+        self._timers = []
+        self._ids = itertools.count()
+
+    def time(self):
+        return self.now
+
+    def _call_at(self, when, callback):
+        heapq.heappush(self._timers, (when, next(self._ids), callback))
+
+    async def sleep(self, seconds):
+        woken = asyncio.get_running_loop().create_future()
+        self._call_at(self.now + seconds, lambda: woken.set_result(None))
+        await woken
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+
+        def run():
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except Exception as ex:
+                future.set_exception(ex)
+
+        self._call_at(self.now + self.duration, run)
+        return future
+
+    def run(self, scheduler, until):
+        """Run scheduler until all its timers are later than until."""
+        async def drive():
+            task = asyncio.ensure_future(scheduler.run())
+            while True:
+                # Let woken coroutines run until all of them sleep.
+                for _ in range(10):
+                    await asyncio.sleep(0)
+                if not self._timers or self._timers[0][0] > until:
+                    break
+                when, _, callback = heapq.heappop(self._timers)
+                self.now = max(self.now, when)
+                callback()
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        asyncio.run(drive())
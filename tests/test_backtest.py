@@ -0,0 +1,135 @@
+import os,sys
+# To avoid 'no module named...' in trading_bot files importing
+# local modules. Add trading_bot to path.
+sys.path.insert(0, os.path.abspath('./trading_bot/'))
+
+import unittest
+import numpy as np
+import pandas as pd
+
+from trading_bot.backtest import (
+    SIGNAL_COLUMNS,
+    Backtest,
+    add_required_indicators,
+)
+from trading_bot.live_data import LiveData
+from trading_bot.strategy_hammer import StrategyHammer
+from trading_bot.streaming_indicators import make_indicator
+from tests.helpers import random_walk
+
+
+class StrategyHammerLive(StrategyHammer):
+    """Hammer strategy without bulk scan."""
+
+    supports_scan = False
+
+
+def make_df(opens, highs, lows, closes):
+    return pd.DataFrame({
+        "time": np.arange(len(opens), dtype=np.int64) * 300,
+        "open": opens,
+        "high": highs,
+        "low": lows,
+        "close": closes,
+        "volume": np.ones(len(opens)),
+    })
+
+
+class TestBacktest(unittest.TestCase):
+
+    def test_fills_stops_and_targets(self):
+        df = make_df(
+            opens=[100, 100.5, 101, 101.5, 100, 99.5, 98.5],
+            highs=[101, 101, 102.5, 102, 100.5, 99.8, 99],
+            lows=[99, 99.8, 100.5, 99.5, 99.5, 97.5, 98],
+            closes=[100, 101, 102, 100, 99.6, 98, 98.8])
+        signals = pd.DataFrame([
+            # Filled at bar 1, target hit at bar 2.
+            (0, 0, 100.0, 98.0, 102.0),
+            # Skipped, position is open.
+            (1, 300, 101.0, 99.0, 103.0),
+            # Filled at bar 4 open, stop loss hit at bar 5.
+            (3, 900, 100.2, 98.0, 102.0),
+        ], columns=SIGNAL_COLUMNS)
+        backtest = Backtest(fee=0.001, slippage=0.0)
+        trades = backtest.simulate(signals, df, "BTC_USDT")
+
+        self.assertEqual(trades["signal_bar"].tolist(), [0, 3])
+        self.assertEqual(trades["exit_reason"].tolist(), ["target", "stop"])
+        self.assertEqual(trades["entry_price"].tolist(), [100.0, 100.0])
+        self.assertEqual(trades["exit_price"].tolist(), [102.0, 98.0])
+        np.testing.assert_allclose(
+            trades["pnl"], [2 - 0.1 * 2.02, -2 - 0.1 * 1.98])
+
+        metrics = backtest.metrics(trades, len(df))
+        self.assertEqual(metrics["trades"], 2)
+        self.assertEqual(metrics["win_rate"], 0.5)
+        self.assertAlmostEqual(metrics["max_drawdown"], 2.198)
+        self.assertAlmostEqual(metrics["exposure"], 4 / 7)
+
+    def test_no_trades(self):
+        df = random_walk(50)
+        backtest = Backtest()
+        trades = backtest.simulate(
+                    pd.DataFrame([], columns=SIGNAL_COLUMNS), df)
+        metrics = backtest.metrics(trades, len(df))
+        self.assertEqual(metrics["trades"], 0)
+        self.assertEqual(metrics["profit_factor"], 0.0)
+
+    def test_indicators_match_streaming(self):
+        df = random_walk(300)
+        strategy = StrategyHammer(LiveData())
+        add_required_indicators(df, strategy)
+        for spec in strategy.required_indicators:
+            indicator = make_indicator(spec)
+            expected = [
+                indicator.update(h, l, c)[0]
+                for h, l, c in zip(df["high"], df["low"], df["close"])
+            ]
+            np.testing.assert_allclose(
+                df[indicator.columns[0]], expected, rtol=1e-9)
+
+    def test_scan_and_event_driven_paths_match(self):
+        df = random_walk(1000)
+        backtest = Backtest()
+        vectorized = backtest.run(StrategyHammer(LiveData()), df.copy())
+        live = backtest.run(StrategyHammerLive(LiveData()), df.copy())
+
+        self.assertGreater(vectorized.metrics["trades"], 5)
+        pd.testing.assert_frame_equal(vectorized.trades, live.trades)
+        self.assertEqual(vectorized.metrics, live.metrics)
+
+    def test_market_orders(self):
+        df = random_walk(1000)
+        backtest = Backtest()
+        vectorized = backtest.run(
+                        StrategyHammer(LiveData(), market_order=True), df)
+        live = backtest.run(
+                StrategyHammerLive(LiveData(), market_order=True), df)
+        pd.testing.assert_frame_equal(vectorized.trades, live.trades)
+
+        trades = vectorized.trades
+        self.assertGreater(len(trades), 5)
+        # Filled at close of the bar after setup, exits come later.
+        np.testing.assert_array_equal(
+            trades["entry_bar"], trades["signal_bar"] + 1)
+        np.testing.assert_array_equal(
+            trades["entry_price"], df["close"].to_numpy()[trades["entry_bar"]])
+        self.assertTrue((trades["exit_bar"] > trades["entry_bar"]).all())
+        # Indicators are added to copy of candles.
+        self.assertNotIn("ema20", df.columns)
+
+    def test_many_contracts(self):
+        data = {
+            "BTC_USDT": random_walk(800, seed=1),
+            "ETH_USDT": random_walk(800, seed=2),
+        }
+        result = Backtest().run_all(StrategyHammer(LiveData()), data)
+        self.assertEqual(
+            set(result.trades["contract"]), {"BTC_USDT", "ETH_USDT"})
+        self.assertAlmostEqual(
+            result.metrics["pnl"], result.trades["pnl"].sum())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,215 @@
+import os,sys
+# To avoid 'no module named...' in trading_bot files importing
+# local modules. Add trading_bot to path.
+sys.path.insert(0, os.path.abspath('./trading_bot/'))
+
+import threading
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from trading_bot.bot import Bot
+from trading_bot.candle_scheduler import CandleScheduler
+from trading_bot.candles import resample_columns
+from trading_bot.gateio_utils import INTERVAL_SECONDS, ExchangeApi
+from trading_bot.indicators import Indicators
+from trading_bot.live_data import LiveData
+from trading_bot.market_stream import MarketStream
+from trading_bot.replay import ReplaySpotApi
+from trading_bot.strategy import Signal
+from trading_bot.strategy_hammer import StrategyHammer
+from tests.helpers import VirtualTime, random_walk
+
+
+class SlowExchangeApi:
+    """Candles of slow contract are held until released, failing
+    contracts raise."""
+
+    def __init__(self, slow, failing):
+        self.slow = slow
+        self.failing = failing
+        self.release = threading.Event()
+        self.released = None
+        self.requests = []
+
+    def get_candle_stick(self, contract, interval, limit, **kwargs):
+        self.requests.append((contract, interval))
+        if contract == self.slow:
+            self.released = self.release.wait(5)
+        if contract in self.failing:
+            raise ConnectionError("Injected error")
+        return [contract]
+
+
+class CountingSpotApi(ReplaySpotApi):
+    """Replay which records requested contracts and intervals."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.candle_requests = []
+
+    def list_candlesticks(self, currency_pair, interval="30m", **kwargs):
+        self.candle_requests.append((currency_pair, interval))
+        return super().list_candlesticks(currency_pair, interval, **kwargs)
+
+
+class StrategyLastClose(StrategyHammer):
+    """Signal on every contract at close of the last closed candle,
+    keeps evaluated views."""
+
+    def __init__(self, live_data):
+        super().__init__(live_data)
+        self.views = {}
+
+    def evaluate(self, df, contract=""):
+        self.views[contract] = df.copy()
+        close = float(df["close"].iloc[-2])
+        return Signal(
+                self.name,
+                contract,
+                int(df["time"].iloc[-2]),
+                close,
+                close - 1,
+                close + 1)
+
+
+def make_recording(contracts, size, start):
+    """Recording of 5m random walk candles of contracts from start."""
+    candlesticks = {}
+    for seed, contract in enumerate(contracts):
+        df = random_walk(size, seed)
+        candlesticks["{}|5m".format(contract)] = [
+            [str(start + t), "1", str(c), str(h), str(l), str(o), "1", "true"]
+            for t, o, h, l, c in zip(
+                df["time"], df["open"], df["high"], df["low"], df["close"])
+        ]
+    return {"candlesticks": candlesticks, "currency_pairs": {}}
+
+
+class TestFetchCandles(unittest.TestCase):
+
+    def test_slow_and_failed_contracts(self):
+        bot = Bot(max_workers=4)
+        bot.contract_list = ["BTC_USDT", "ETH_USDT", "SOL_USDT", "XRP_USDT"]
+        bot.exchange_api = SlowExchangeApi("BTC_USDT", {"ETH_USDT"})
+
+        results = []
+        with self.assertLogs("trading_bot.bot", "ERROR") as logs:
+            for contract, candles in bot.fetch_candles("1h"):
+                results.append((contract, candles))
+                # Slow contract is released only after all the others.
+                if len(results) == 3:
+                    bot.exchange_api.release.set()
+
+        self.assertTrue(bot.exchange_api.released)
+        self.assertEqual(results[-1], ("BTC_USDT", ["BTC_USDT"]))
+        self.assertEqual(
+            sorted(results[:3]),
+            [("ETH_USDT", None),
+             ("SOL_USDT", ["SOL_USDT"]),
+             ("XRP_USDT", ["XRP_USDT"])])
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("'ETH_USDT' failed", logs.output[0])
+
+    def test_streamed_candles_are_not_polled(self):
+        bot = Bot()
+        bot.contract_list = ["BTC_USDT", "ETH_USDT"]
+        bot.exchange_api = SlowExchangeApi(None, set())
+        bot.market_stream = MarketStream(bot.exchange_api, LiveData())
+        bot.market_stream.subscribe_candles("BTC_USDT", "1m")
+        bot.market_stream.connected.set()
+
+        results = dict(bot.fetch_candles("1m"))
+        self.assertEqual(len(results["BTC_USDT"]["time"]), 0)
+        self.assertEqual(results["ETH_USDT"], ["ETH_USDT"])
+        # Other intervals of subscribed contract are polled.
+        results = dict(bot.fetch_candles("1h"))
+        self.assertEqual(results["BTC_USDT"], ["BTC_USDT"])
+        self.assertEqual(
+            sorted(bot.exchange_api.requests),
+            [("BTC_USDT", "1h"), ("ETH_USDT", "1h"), ("ETH_USDT", "1m")])
+
+
+class TestSchedule(unittest.TestCase):
+
+    def test_one_scheduled_cycle(self):
+        start = 1648000800
+        api_instance = CountingSpotApi(
+                        recording=make_recording(["BTC_USDT"], 100, start))
+        bot = Bot(
+                exchange_api=ExchangeApi(api_instance=api_instance),
+                plot=False)
+        bot.contract_list = ["BTC_USDT"]
+        # The last recorded candle is forming.
+        last = start + 99 * 300
+        virtual = VirtualTime(last + 1.0)
+        scheduler = CandleScheduler(
+                        settle_delay=bot.settle_delay,
+                        clock=virtual.time,
+                        executor=virtual,
+                        sleep=virtual.sleep)
+        bot.schedule(scheduler)
+
+        virtual.run(scheduler, until=last + 300 + bot.settle_delay)
+        metrics = scheduler.metrics()["5m"]
+        self.assertEqual((metrics["runs"], metrics["failed"]), (1, 0))
+        self.assertEqual(api_instance.candle_requests, [("BTC_USDT", "5m")])
+        columns = bot.live_data.buffer("BTC_USDT", "5m").columns()
+        self.assertEqual(len(columns["time"]), bot.limit)
+        self.assertEqual(columns["time"][-1], last)
+
+
+class TestIntervals(unittest.TestCase):
+
+    def test_intervals_from_one_base_download(self):
+        contracts = ["BTC_USDT", "ETH_USDT"]
+        start = 1648000800
+        api_instance = CountingSpotApi(
+                        recording=make_recording(contracts, 600, start))
+        bot = Bot(
+                exchange_api=ExchangeApi(api_instance=api_instance),
+                plot=False,
+                intervals=["5m", "15m", "1h"])
+        bot.contract_list = contracts
+        strategies = {
+            interval: StrategyLastClose(bot.live_data)
+            for interval in bot.intervals
+        }
+
+        signals = {}
+        # Scans of one base candle, the last recorded one is forming.
+        with mock.patch("time.time", return_value=start + 599 * 300 + 1):
+            for interval in bot.intervals:
+                signals[interval] = bot.strategy_exec_signals(
+                                        Indicators(),
+                                        strategies[interval],
+                                        interval)
+
+        self.assertEqual(
+            sorted(api_instance.candle_requests),
+            [(contract, "5m") for contract in contracts])
+        for interval in ("15m", "1h"):
+            for contract in contracts:
+                expected = resample_columns(
+                            bot.live_data.buffer(contract, "5m").columns(),
+                            INTERVAL_SECONDS[interval])
+                view = strategies[interval].views[contract]
+                self.assertEqual(len(view), bot.limit)
+                for field in expected:
+                    np.testing.assert_array_equal(
+                        view[field].to_numpy(),
+                        expected[field][-bot.limit:])
+        for interval, found in signals.items():
+            views = strategies[interval].views
+            self.assertEqual(
+                [(signal.contract, signal.time) for signal in found],
+                [(contract, int(views[contract]["time"].iloc[-2]))
+                 for contract in contracts])
+        # Forming candle of 1h started 11 base candles ago.
+        self.assertEqual(
+            signals["1h"][0].time, start + 599 * 300 - 11 * 300 - 3600)
+
+
+if __name__ == '__main__':
+    unittest.main()
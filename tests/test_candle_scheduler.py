@@ -0,0 +1,79 @@
+import os,sys
+# To avoid 'no module named...' in trading_bot files importing
+# local modules. Add trading_bot to path.
+sys.path.insert(0, os.path.abspath('./trading_bot/'))
+
+import unittest
+
+from trading_bot.candle_scheduler import CandleScheduler, next_close
+from tests.helpers import VirtualTime
+
+
+def make_scheduler(virtual, settle_delay, intervals):
+    return CandleScheduler(
+                settle_delay=settle_delay,
+                intervals=intervals,
+                clock=virtual.time,
+                executor=virtual,
+                sleep=virtual.sleep)
+
+
+class TestCandleScheduler(unittest.TestCase):
+
+    def test_next_close(self):
+        self.assertEqual(next_close(1000, 300), 1200)
+        self.assertEqual(next_close(1200, 300), 1500)
+        self.assertEqual(next_close(1199.9, 300), 1200)
+
+    def test_runs_after_every_close(self):
+        virtual = VirtualTime(1001.0)
+        calls = []
+        scheduler = make_scheduler(virtual, 2, {"fast": 10, "slow": 25})
+        scheduler.add_job(
+            "fast",
+            lambda interval, close: calls.append((close, virtual.now)))
+        scheduler.add_job("slow", lambda interval, close: None)
+        with self.assertRaises(ValueError):
+            scheduler.add_job("fast", lambda interval, close: None)
+
+        virtual.run(scheduler, until=1100)
+        self.assertEqual(
+            calls, [(close, close + 2) for close in range(1010, 1100, 10)])
+        metrics = scheduler.metrics()
+        self.assertEqual(metrics["slow"]["runs"], 3)
+        self.assertEqual(metrics["fast"]["missed"], 0)
+        self.assertEqual(metrics["fast"]["max_drift"], 0)
+
+    def test_no_overlapping_runs(self):
+        virtual = VirtualTime(1001.0, duration=25)
+        closes = []
+        scheduler = make_scheduler(virtual, 2, {"fast": 10})
+        scheduler.add_job("fast", lambda interval, close: closes.append(close))
+
+        virtual.run(scheduler, until=1100)
+        # Run takes 25 seconds, two slots after every run are skipped.
+        self.assertEqual(closes, [1010, 1040, 1070])
+        metrics = scheduler.metrics()["fast"]
+        self.assertEqual((metrics["runs"], metrics["skipped"]), (3, 6))
+
+    def test_missed_slots(self):
+        virtual = VirtualTime(1001.0)
+        closes = []
+
+        def job(interval, close):
+            if not closes:
+                # Clock jumps as if loop was blocked for 100 seconds.
+                virtual.now += 100
+            closes.append(close)
+
+        scheduler = make_scheduler(virtual, 2, {"fast": 10})
+        scheduler.add_job("fast", job)
+        virtual.run(scheduler, until=1115)
+        self.assertEqual(closes, [1010, 1110])
+        metrics = scheduler.metrics()["fast"]
+        self.assertEqual(metrics["missed"], 9)
+        self.assertEqual(metrics["last_drift"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
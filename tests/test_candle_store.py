@@ -0,0 +1,125 @@
+import os,sys
+# To avoid 'no module named...' in trading_bot files importing
+# local modules. Add trading_bot to path.
+sys.path.insert(0, os.path.abspath('./trading_bot/'))
+
+import tempfile
+import threading
+import unittest
+import numpy as np
+from datetime import datetime
+
+from trading_bot.candle_store import CandleStore
+from trading_bot.gateio_utils import ExchangeApi, Interval, to_timestamp
+from tests.test_gateio_utils import FakeSpotApi
+
+
+def make_columns(times):
+    times = np.asarray(times, dtype=np.int64)
+    close = times.astype(np.float64)
+    return {
+        "time": times,
+        "open": close,
+        "high": close + 1,
+        "low": close - 1,
+        "close": close,
+        "volume": np.ones(len(times)),
+    }
+
+
+class TestCandleStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = CandleStore(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_missing_ranges(self):
+        self.store.write("BTC_USDT", "1m", 600, 1200, make_columns([600]))
+        self.store.write("BTC_USDT", "1m", 1800, 2400, make_columns([1800]))
+
+        self.assertEqual(
+            self.store.missing_ranges("BTC_USDT", "1m", 0, 3000),
+            [(0, 600), (1200, 1800), (2400, 3000)])
+        self.assertEqual(
+            self.store.missing_ranges("BTC_USDT", "1m", 700, 1100), [])
+        self.assertEqual(
+            self.store.missing_ranges("ETH_USDT", "1m", 0, 60), [(0, 60)])
+
+    def test_read_is_memory_mapped(self):
+        self.store.write(
+            "BTC_USDT", "1m", 0, 600, make_columns(range(0, 600, 60)))
+        columns = self.store.read("BTC_USDT", "1m", 120, 300)
+
+        self.assertEqual(columns["time"].tolist(), [120, 180, 240])
+        self.assertIsInstance(columns["close"], np.memmap)
+
+    def test_compact(self):
+        self.store.write("BTC_USDT", "1m", 0, 300, make_columns([0, 60]))
+        self.store.write("BTC_USDT", "1m", 300, 600, make_columns([300]))
+        self.store.write("BTC_USDT", "1m", 900, 1200, make_columns([900]))
+
+        self.assertEqual(self.store.compact("BTC_USDT", "1m"), 2)
+        self.assertEqual(
+            self.store.segments("BTC_USDT", "1m"), [(0, 600), (900, 1200)])
+        self.assertEqual(
+            self.store.read("BTC_USDT", "1m", 0, 1200)["time"].tolist(),
+            [0, 60, 300, 900])
+
+    def test_reads_during_compaction(self):
+        expected = list(range(0, 6000, 60))
+        for start in range(0, 6000, 300):
+            self.store.write("BTC_USDT", "1m", start, start + 300,
+                             make_columns(range(start, start + 300, 60)))
+        reads = []
+
+        def read():
+            for _ in range(20):
+                columns = self.store.read("BTC_USDT", "1m", 0, 6000)
+                reads.append(columns["time"].tolist() == expected)
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        self.assertEqual(self.store.compact_all(), 1)
+        for reader in readers:
+            reader.join()
+        self.assertEqual(len(reads), 80)
+        self.assertTrue(all(reads))
+
+
+class TestExchangeApiCandleStore(unittest.TestCase):
+
+    def test_only_missing_ranges_are_downloaded(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            exchange_api = ExchangeApi(candle_store=CandleStore(tmp_dir))
+            exchange_api.api_instance = FakeSpotApi()
+            requests = exchange_api.api_instance.requests
+
+            first = exchange_api.get_candle_stick_history(
+                        "BTC_USDT",
+                        Interval.INT_1M,
+                        datetime(2022, 3, 1, 10),
+                        datetime(2022, 3, 1, 12))
+            self.assertEqual(len(first["time"]), 120)
+            self.assertEqual(len(requests), 1)
+
+            second = exchange_api.get_candle_stick_time_range(
+                        contract="BTC_USDT",
+                        interval=Interval.INT_1M,
+                        start=datetime(2022, 3, 1, 11),
+                        end=datetime(2022, 3, 1, 13),
+                        columnar=True)
+            self.assertEqual(len(second["time"]), 121)
+            self.assertEqual(second["time"][0],
+                             to_timestamp(datetime(2022, 3, 1, 11)))
+            # Only the part after already stored range was requested.
+            self.assertEqual(len(requests), 2)
+            self.assertEqual(
+                requests[1][0], to_timestamp(datetime(2022, 3, 1, 12)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import os,sys
+# To avoid 'no module named...' in trading_bot files importing
+# local modules. Add trading_bot to path.
+sys.path.insert(0, os.path.abspath('./trading_bot/'))
+
+import unittest
+import numpy as np
+
+from datetime import datetime
+
+from trading_bot.candles import (
+    columns_to_records,
+    decode_columns,
+    resample_columns,
+)
+
+
+API_RESPONSE = [
+    ["1648112400", "1250.5", "44009.89", "44100", "43900.1", "43950",
+     "0.028", "true"],
+    ["1648116000", "980", "44050", "44200.5", "43990", "44009.89",
+     "0.022", "false"],
+]
+
+
+class TestCandles(unittest.TestCase):
+
+    def test_decode_columns(self):
+        """Exchange response is decoded into contiguous typed arrays."""
+        columns = decode_columns(API_RESPONSE)
+
+        self.assertEqual(columns["time"].dtype, np.int64)
+        self.assertEqual(columns["time"].tolist(), [1648112400, 1648116000])
+        self.assertEqual(columns["open"].tolist(), [43950.0, 44009.89])
+        self.assertEqual(columns["high"].tolist(), [44100.0, 44200.5])
+        self.assertEqual(columns["low"].tolist(), [43900.1, 43990.0])
+        self.assertEqual(columns["close"].tolist(), [44009.89, 44050.0])
+        self.assertEqual(columns["volume"].tolist(), [1250.5, 980.0])
+        for values in columns.values():
+            self.assertTrue(values.flags["C_CONTIGUOUS"])
+
+    def test_decode_empty(self):
+        columns = decode_columns([])
+        self.assertEqual(len(columns["time"]), 0)
+        self.assertEqual(columns_to_records(columns), [])
+
+    def test_columns_to_records(self):
+        """Legacy list of dictionaries format is kept."""
+        records = columns_to_records(decode_columns(API_RESPONSE))
+
+        self.assertEqual(len(records), 2)
+        self.assertEqual(
+            list(records[0].keys()),
+            ["time", "volume", "close", "high", "low", "open"])
+        self.assertEqual(
+            records[0]["time"],
+            datetime.fromtimestamp(1648112400).strftime('%H:%M %d.%m.%y'))
+        self.assertEqual(records[1]["close"], 44050.0)
+
+    def test_resample_columns(self):
+        """Partial first bucket is dropped, forming last one is kept."""
+        times = np.arange(600, 3600 * 2 + 1200, 300, dtype=np.int64)
+        rng = np.random.default_rng(3)
+        close = 100 + rng.standard_normal(len(times)).cumsum()
+        columns = {
+            "time": times,
+            "open": close - 0.5,
+            "high": close + 1,
+            "low": close - 1,
+            "close": close,
+            "volume": np.ones(len(times)),
+        }
+        hourly = resample_columns(columns, 3600)
+
+        self.assertEqual(hourly["time"].tolist(), [3600, 7200])
+        self.assertEqual(hourly["open"][0], columns["open"][10])
+        self.assertEqual(hourly["close"][0], close[21])
+        self.assertEqual(hourly["high"][0], columns["high"][10:22].max())
+        self.assertEqual(hourly["low"][0], columns["low"][10:22].min())
+        self.assertEqual(hourly["volume"].tolist(), [12.0, 4.0])
+        self.assertEqual(hourly["close"][-1], close[-1])
+
+        partial = {field: v[:5] for field, v in columns.items()}
+        self.assertEqual(len(resample_columns(partial, 3600)["time"]), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import os,sys
+# To avoid 'no module named...' in trading_bot files importing
+# local modules. Add trading_bot to path.
+sys.path.insert(0, os.path.abspath('./trading_bot/'))
+
+import random
+import time
+import unittest
+from datetime import datetime
+
+from concurrent.futures import ThreadPoolExecutor
+from trading_bot.gateio_utils import (
+    CONNECTION_POOL_SIZE,
+    HTTP_TIMEOUT,
+    ExchangeApi,
+    Interval,
+    split_time_range,
+    to_timestamp,
+)
+
+
+class FakeSpotApi:
+    """Serves 1m candles for any time range, like list_candlesticks."""
+
+    def __init__(self, max_candles=1000):
+        self.max_candles = max_candles
+        self.requests = []
+
+    def list_candlesticks(self, currency_pair, interval, _from, to, **kwargs):
+        self.requests.append((_from, to))
+        time.sleep(random.uniform(0, 0.01))
+        first = -(-_from // 60) * 60
+        times = list(range(first, to + 1, 60))[:self.max_candles]
+        return [
+            [str(t), "1", str(t + 0.5), str(t + 1), str(t - 1), str(t)]
+            for t in times
+        ]
+
+
+class TestCandleStickHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.exchange_api = ExchangeApi()
+        self.exchange_api.api_instance = FakeSpotApi()
+
+    def test_split_time_range(self):
+        self.assertEqual(
+            split_time_range(0, 250, 10, 10),
+            [(0, 100), (100, 200), (200, 250)])
+        self.assertEqual(split_time_range(100, 100, 10), [])
+
+    def test_history_is_complete_and_ordered(self):
+        start = datetime(2022, 3, 1)
+        end = datetime(2022, 3, 4, 3, 30)
+        chunks = list(self.exchange_api.iter_candle_stick_history(
+                    "BTC_USDT", Interval.INT_1M, start, end, max_workers=4))
+
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual(len(self.exchange_api.api_instance.requests), 5)
+        times = [t for chunk in chunks for t in chunk["time"].tolist()]
+        self.assertEqual(
+            times,
+            list(range(to_timestamp(start), to_timestamp(end), 60)))
+
+    def test_history_merges_overlapping_chunks(self):
+        columns = self.exchange_api.get_candle_stick_history(
+                    "BTC_USDT",
+                    Interval.INT_1M,
+                    datetime(2022, 3, 1),
+                    datetime(2022, 3, 1, 1))
+        self.assertEqual(len(columns["time"]), 60)
+        self.assertEqual(columns["close"][0], columns["time"][0] + 0.5)
+
+    def test_large_time_range_is_not_truncated(self):
+        candles = self.exchange_api.get_candle_stick_time_range(
+                    contract="BTC_USDT",
+                    interval=Interval.INT_1M,
+                    start=datetime(2022, 3, 1),
+                    end=datetime(2022, 3, 2))
+        # End of time range is inclusive.
+        self.assertEqual(len(candles), 24 * 60 + 1)
+
+
+class TestSharedExchangeApi(unittest.TestCase):
+
+    def test_shared_instance_is_created_once(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            instances = list(executor.map(
+                lambda _: ExchangeApi.shared(), range(32)))
+
+        self.assertTrue(all(api is instances[0] for api in instances))
+        self.assertEqual(
+            instances[0].configuration.connection_pool_maxsize,
+            CONNECTION_POOL_SIZE)
+        self.assertIn(
+            "gzip", instances[0].api_client.default_headers["Accept-Encoding"])
+
+    def test_requests_have_timeout(self):
+        exchange_api = ExchangeApi()
+        exchange_api.api_instance = FakeSpotApi()
+        kwargs = {}
+        exchange_api.api_instance.list_candlesticks = (
+            lambda currency_pair, **kw: kwargs.update(kw) or [])
+        exchange_api.get_candle_stick("BTC_USDT", Interval.INT_1M, limit=10)
+        self.assertEqual(kwargs["_request_timeout"], HTTP_TIMEOUT)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os,sys
+# To avoid 'no module named...' in trading_bot files importing
+# local modules. Add trading_bot to path.
+sys.path.insert(0, os.path.abspath('./trading_bot/'))
+
+import unittest
+import numpy as np
+
+from trading_bot.indicator_cache import IndicatorCache
+from trading_bot.indicators import Indicators
+from trading_bot.streaming_indicators import Atr, Ema
+from tests.helpers import random_walk
+
+
+def make_df(size, last_close=None):
+    df = random_walk(size, interval=60)
+    if last_close is not None:
+        df.loc[size - 1, "close"] = last_close
+    return df
+
+
+class TestIndicatorCache(unittest.TestCase):
+
+    def test_same_data_is_computed_once(self):
+        indicators = Indicators()
+        first = make_df(40)
+        second = make_df(40)
+        indicators.add_cached(first, "BTC_USDT", "5m", "ema", 20)
+        indicators.add_cached(second, "BTC_USDT", "5m", "ema", 20)
+
+        self.assertEqual(indicators.cache.hits, 1)
+        self.assertEqual(indicators.cache.misses, 1)
+        np.testing.assert_array_equal(first["ema20"], second["ema20"])
+
+        expected = make_df(40)
+        indicators.add_ema(expected, 20)
+        np.testing.assert_array_equal(second["ema20"], expected["ema20"])
+
+    def test_changed_data_is_recomputed(self):
+        indicators = Indicators()
+        indicators.add_cached(make_df(40), "BTC_USDT", "5m", "ema", 20)
+        # Forming candle changed, new candle or other contract.
+        indicators.add_cached(
+            make_df(40, last_close=150), "BTC_USDT", "5m", "ema", 20)
+        indicators.add_cached(make_df(41), "BTC_USDT", "5m", "ema", 20)
+        indicators.add_cached(make_df(40), "ETH_USDT", "5m", "ema", 20)
+        indicators.add_cached(make_df(40), "BTC_USDT", "5m", "ema", 50)
+
+        self.assertEqual(indicators.cache.hits, 0)
+        self.assertEqual(indicators.cache.misses, 5)
+
+    def test_streaming_indicators_are_cached(self):
+        indicators = Indicators()
+        first = make_df(40)
+        second = make_df(40)
+        indicators.add_streaming(first, "BTC_USDT", "5m", (Atr(), Ema(20)))
+        indicators.add_streaming(second, "BTC_USDT", "5m", (Atr(), Ema(20)))
+
+        self.assertEqual(indicators.cache.metrics()["hits"], 2)
+        np.testing.assert_array_equal(first["atr14"], second["atr14"])
+
+    def test_least_recently_used_is_evicted(self):
+        cache = IndicatorCache(maxsize=2)
+        df = make_df(10)
+        for contract in ("A", "B", "A", "C", "A", "B"):
+            cache.get(contract, "5m", "x", (), df, lambda: {"x": [1.0]})
+
+        self.assertEqual(cache.metrics()["size"], 2)
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+
+
+if __name__ == '__main__':
+    unittest.main()
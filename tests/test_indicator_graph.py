@@ -0,0 +1,82 @@
+import os,sys
+# To avoid 'no module named...' in trading_bot files importing
+# local modules. Add trading_bot to path.
+sys.path.insert(0, os.path.abspath('./trading_bot/'))
+
+import unittest
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ThreadPoolExecutor
+from trading_bot.indicator_graph import IndicatorGraph
+from trading_bot.indicators import Indicators
+from trading_bot.strategy_hammer import StrategyHammer
+from tests.helpers import random_walk
+
+
+class StrategyRsi:
+    required_indicators = frozenset({("rsi", 14), ("ema", 20)})
+
+
+def make_df(size):
+    return random_walk(size, seed=0, volatility=1, interval=60)
+
+
+class TestIndicatorGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.strategies = [StrategyHammer(None), StrategyRsi()]
+
+    def test_shared_indicators_are_computed_once(self):
+        graph = IndicatorGraph(self.strategies)
+        self.assertEqual(
+            graph.levels, [[("atr", 14), ("ema", 20), ("rsi", 14)]])
+
+        indicators = Indicators()
+        df = make_df(60)
+        graph.add_to(indicators, df, "BTC_USDT", "5m")
+        self.assertEqual(indicators.cache.misses, 3)
+        self.assertEqual(len(indicators.engine._series), 3)
+        for column in ("atr14", "ema20", "rsi14"):
+            self.assertIn(column, df.columns)
+
+    def test_parameters_have_own_columns(self):
+        class StrategyAtr:
+            required_indicators = frozenset({("atr", 7), ("atr", 14)})
+
+        graph = IndicatorGraph([StrategyAtr()])
+        df = make_df(60)
+        graph.add_to(Indicators(), df, "BTC_USDT", "5m")
+        self.assertFalse(np.allclose(df["atr7"], df["atr14"]))
+
+    def test_conflicting_columns_are_rejected(self):
+        class StrategyPsar:
+            required_indicators = frozenset({
+                ("psar", 0.01, 0.2), ("psar", 0.02, 0.2)})
+
+        with self.assertRaises(ValueError):
+            IndicatorGraph([StrategyPsar()])
+
+    def test_parallel_matches_sequential(self):
+        graph = IndicatorGraph(self.strategies)
+        sequential = make_df(60)
+        graph.add_to(Indicators(), sequential, "BTC_USDT", "5m")
+        parallel = make_df(60)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            graph.add_to(Indicators(), parallel, "BTC_USDT", "5m", executor)
+        pd.testing.assert_frame_equal(sequential, parallel)
+
+    def test_panel(self):
+        graph = IndicatorGraph(self.strategies)
+        df = make_df(60)
+        panel = {f: df[f].to_numpy()[None, :] for f in df.columns}
+        columns = graph.compute_panel(Indicators(), panel)
+        self.assertEqual(sorted(columns), ["atr14", "ema20", "rsi14"])
+
+        graph.add_to(Indicators(), df, "BTC_USDT", "5m")
+        # Panel treats the last candle as closed, like ta.
+        np.testing.assert_allclose(columns["ema20"][0], df["ema20"])
+
+
+if __name__ == '__main__':
+    unittest.main()
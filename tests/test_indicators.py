@@ -0,0 +1,52 @@
+import os,sys
+# To avoid 'no module named...' in trading_bot files importing
+# local modules. Add trading_bot to path.
+sys.path.insert(0, os.path.abspath('./trading_bot/'))
+
+import unittest
+import numpy as np
+import pandas as pd
+
+from trading_bot.indicators import Indicators, swing_extremes
+
+
+class TestSwingExtremes(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        close = 100 + np.cumsum(rng.normal(0, 1, 300))
+        # Rounded prices make equal lows and highs common.
+        self.df = pd.DataFrame({
+            "low": np.round(close - rng.random(300)),
+            "high": np.round(close + rng.random(300)),
+        })
+        self.indicators = Indicators()
+
+    def test_matches_single_search(self):
+        for next_no in (1, 3, 5, 8):
+            lows_idx, lows = self.indicators.find_lowest_near_all(
+                                self.df, next_no)
+            highs_idx, highs = self.indicators.find_highest_near_all(
+                                self.df, next_no)
+            for i in range(len(self.df)):
+                self.assertEqual(
+                    (lows_idx[i], lows[i]),
+                    self.indicators.find_lowest_near(
+                        self.df, i, self.df["low"].iloc[i], next_no))
+                self.assertEqual(
+                    (highs_idx[i], highs[i]),
+                    self.indicators.find_highest_near(
+                        self.df, i, self.df["high"].iloc[i], next_no))
+
+    def test_many_contracts(self):
+        lows = np.stack([self.df["low"].to_numpy(),
+                         self.df["low"].to_numpy()[::-1]])
+        idx, values = swing_extremes(lows, 5)
+        for row in range(2):
+            expected = swing_extremes(lows[row], 5)
+            np.testing.assert_array_equal(idx[row], expected[0])
+            np.testing.assert_array_equal(values[row], expected[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import os,sys
+# To avoid 'no module named...' in trading_bot files importing
+# local modules. Add trading_bot to path.
+sys.path.insert(0, os.path.abspath('./trading_bot/'))
+
+import unittest
+import numpy as np
+
+from trading_bot.live_data import CandleRingBuffer, LiveData
+
+
+def make_columns(times, close_offset=0.0):
+    times = np.asarray(times, dtype=np.int64)
+    close = times.astype(np.float64) + close_offset
+    return {
+        "time": times,
+        "open": close - 1,
+        "high": close + 2,
+        "low": close - 2,
+        "close": close,
+        "volume": np.ones(len(times)),
+    }
+
+
+class TestCandleRingBuffer(unittest.TestCase):
+
+    def test_warmup_and_incremental_update(self):
+        buffer = CandleRingBuffer(5)
+        self.assertIsNone(buffer.last_time)
+
+        self.assertEqual(buffer.update(make_columns([60, 120, 180])), 3)
+        self.assertEqual(len(buffer), 3)
+        self.assertEqual(buffer.last_time, 180)
+
+        # Last candle is still forming, it is overwritten in place.
+        appended = buffer.update(make_columns([180, 240], close_offset=0.5))
+        self.assertEqual(appended, 1)
+        self.assertEqual(buffer.columns()["time"].tolist(), [60, 120, 180, 240])
+        self.assertEqual(buffer.columns()["close"].tolist()[-2:], [180.5, 240.5])
+
+        # Already stored candles are ignored.
+        self.assertEqual(buffer.update(make_columns([60, 120])), 0)
+
+    def test_wrap_around_keeps_newest(self):
+        buffer = CandleRingBuffer(4)
+        buffer.update(make_columns([60, 120, 180]))
+        buffer.update(make_columns([240, 300, 360]))
+        self.assertEqual(
+            buffer.columns()["time"].tolist(), [180, 240, 300, 360])
+
+        buffer.update(make_columns(range(420, 1020, 60)))
+        self.assertEqual(len(buffer), 4)
+        self.assertEqual(
+            buffer.columns()["time"].tolist(), [780, 840, 900, 960])
+        self.assertEqual(
+            buffer.columns()["close"].tolist(), [780.0, 840.0, 900.0, 960.0])
+
+    def test_views_are_zero_copy(self):
+        buffer = CandleRingBuffer(4)
+        buffer.update(make_columns([60, 120, 180, 240, 300]))
+        view = buffer.columns()["close"]
+        self.assertFalse(view.flags.writeable)
+        self.assertTrue(np.shares_memory(view, buffer._arrays["close"]))
+
+        df = buffer.to_dataframe()
+        self.assertTrue(
+            np.shares_memory(df["close"].to_numpy(), buffer._arrays["close"]))
+        self.assertEqual(df["time"].tolist(), [120, 180, 240, 300])
+
+
+class TestLiveData(unittest.TestCase):
+
+    def test_buffer_per_contract_and_interval(self):
+        live_data = LiveData(capacity=10)
+        live_data.update("BTC_USDT", "5m", make_columns([300, 600]))
+        live_data.update("BTC_USDT", "1m", make_columns([60]))
+
+        self.assertEqual(len(live_data.view("BTC_USDT", "5m")), 2)
+        self.assertEqual(len(live_data.view("BTC_USDT", "1m")), 1)
+        self.assertEqual(len(live_data.view("ETH_USDT", "5m")), 0)
+
+    def test_capacity_per_interval(self):
+        live_data = LiveData(capacity=2, capacities={"5m": 5})
+        times = [300 * i for i in range(1, 8)]
+        live_data.update("BTC_USDT", "5m", make_columns(times))
+        live_data.update("BTC_USDT", "1h", make_columns(times))
+
+        self.assertEqual(len(live_data.view("BTC_USDT", "5m")), 5)
+        self.assertEqual(len(live_data.view("BTC_USDT", "1h")), 2)
+        self.assertEqual(live_data.fetch_limit("ETH_USDT", "5m"), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import os,sys
+# To avoid 'no module named...' in trading_bot files importing
+# local modules. Add trading_bot to path.
+sys.path.insert(0, os.path.abspath('./trading_bot/'))
+
+import queue
+import unittest
+
+from trading_bot.gateio_utils import ExchangeApi, Interval
+from trading_bot.live_data import LiveData
+from trading_bot.market_stream import MarketStream
+from trading_bot.replay import ReplaySpotApi
+from trading_bot.stream_stand_in import StreamStandIn
+
+
+RECORDING = {
+    "candlesticks": {
+        "BTC_USDT|1m": [
+            [str(t), "1", "100", "101", "99", "100"]
+            for t in range(60, 660, 60)
+        ],
+    },
+    "currency_pairs": {},
+}
+
+
+class FlakyExchangeApi:
+    """Fails the first candles request like unexpected REST error."""
+
+    def __init__(self, exchange_api):
+        self.exchange_api = exchange_api
+        self.calls = 0
+
+    def get_candle_stick(self, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            raise RuntimeError("Backfill failed")
+        return self.exchange_api.get_candle_stick(**kwargs)
+
+
+class TestMarketStream(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StreamStandIn()
+        self.server.start()
+        self.live_data = LiveData(capacity=20)
+        self.exchange_api = FlakyExchangeApi(ExchangeApi(
+                                api_instance=ReplaySpotApi(recording=RECORDING)))
+        self.stream = MarketStream(
+                        self.exchange_api,
+                        self.live_data,
+                        url=self.server.url,
+                        reconnect_delay=0.05)
+        self.candles = queue.Queue()
+        self.prices = queue.Queue()
+        self.stream.add_candle_listener(
+            lambda contract, interval, columns:
+                self.candles.put((contract, interval, columns)))
+        self.stream.add_ticker_listener(
+            lambda contract, price: self.prices.put((contract, price)))
+        self.stream.subscribe_candles("BTC_USDT", Interval.INT_1M)
+        self.stream.subscribe_tickers("BTC_USDT")
+        self.stream.start()
+        self.assertTrue(self.server.wait_subscribed(2))
+        self.assertTrue(self.stream.connected.wait(5))
+
+    def tearDown(self):
+        self.stream.stop()
+        self.server.stop()
+
+    def test_backfill_and_candle_updates(self):
+        # Warmup candles are downloaded with REST API.
+        contract, interval, columns = self.candles.get(timeout=5)
+        self.assertEqual((contract, interval), ("BTC_USDT", "1m"))
+        self.assertEqual(len(columns["time"]), 10)
+
+        # The first backfill failed, stream reconnected and retried it.
+        self.assertEqual(self.exchange_api.calls, 2)
+
+        self.server.publish_candle("BTC_USDT", "1m", 660, 100, 105, 98, 104)
+        _, _, columns = self.candles.get(timeout=5)
+        self.assertEqual(columns["close"].tolist(), [104.0])
+
+        buffer = self.live_data.buffer("BTC_USDT", "1m")
+        self.assertEqual(len(buffer), 11)
+        self.assertEqual(buffer.last_time, 660)
+
+    def test_ticker_updates_after_reconnect(self):
+        self.server.publish_ticker("BTC_USDT", 101.5)
+        self.assertEqual(self.prices.get(timeout=5), ("BTC_USDT", 101.5))
+
+        self.server.disconnect_all()
+        self.assertTrue(self.server.wait_subscribed(2))
+        # Failed first backfill connection and the reconnect.
+        self.assertEqual(self.server.connections, 3)
+
+        self.server.publish_ticker("BTC_USDT", 102.0)
+        self.assertEqual(self.prices.get(timeout=5), ("BTC_USDT", 102.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
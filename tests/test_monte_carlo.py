@@ -0,0 +1,76 @@
+import os,sys
+# To avoid 'no module named...' in trading_bot files importing
+# local modules. Add trading_bot to path.
+sys.path.insert(0, os.path.abspath('./trading_bot/'))
+
+import unittest
+import numpy as np
+from pandas import DataFrame
+
+from trading_bot.monte_carlo import SHUFFLE, MonteCarlo, r_multiples
+
+
+class TestMonteCarlo(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.r = np.where(rng.random(200) < 0.45, 1.5, -1.0)
+
+    def test_r_multiples(self):
+        trades = DataFrame({
+            "exit_time": [600, 300],
+            "entry_price": [100.0, 50.0],
+            "stop_loss": [98.0, 49.0],
+            "quantity": [1.0, 2.0],
+            "pnl": [-2.0, 3.0],
+        })
+        np.testing.assert_allclose(r_multiples(trades), [1.5, -1.0])
+
+    def test_shuffle_keeps_total(self):
+        result = MonteCarlo(paths=500, method=SHUFFLE, seed=1).run(self.r)
+        np.testing.assert_allclose(result.returns, self.r.sum())
+        self.assertTrue((result.max_drawdowns >= 0).all())
+        self.assertGreater(result.max_drawdowns.std(), 0)
+
+    def test_bootstrap(self):
+        result = MonteCarlo(paths=4000, seed=1).run(self.r, trades=100)
+        self.assertAlmostEqual(
+            result.returns.mean() / 100, self.r.mean(), delta=0.02)
+        bands = MonteCarlo.bands(result)
+        self.assertEqual(bands.index.tolist(), [5, 25, 50, 75, 95])
+        self.assertTrue(bands["return"].is_monotonic_increasing)
+        self.assertTrue(bands["max_drawdown"].is_monotonic_increasing)
+
+    def test_compounding(self):
+        result = MonteCarlo(paths=3, risk=0.01, seed=1).run(np.ones(10))
+        np.testing.assert_allclose(result.returns, 1.01 ** 10 - 1)
+        np.testing.assert_allclose(result.max_drawdowns, 0)
+
+        result = MonteCarlo(paths=3, risk=0.01, seed=1).run(-np.ones(10))
+        np.testing.assert_allclose(result.max_drawdowns, 1 - 0.99 ** 10)
+
+    def test_ruin(self):
+        # Loss of 5R at 25% risk loses more than whole equity.
+        r = np.array([1.0, 2.0, -5.0, 1.0])
+        result = MonteCarlo(paths=50, method=SHUFFLE, risk=0.25, seed=1).run(r)
+        np.testing.assert_array_equal(result.returns, -1)
+        np.testing.assert_array_equal(result.max_drawdowns, 1)
+        self.assertFalse(MonteCarlo.bands(result).isna().any().any())
+
+    def test_chunks_on_process_pool(self):
+        # About 20 paths per chunk.
+        chunk_bytes = 3 * 8 * len(self.r) * 20
+        serial = MonteCarlo(
+                    paths=300, chunk_bytes=chunk_bytes, seed=3).run(self.r)
+        pool = MonteCarlo(
+                    paths=300,
+                    chunk_bytes=chunk_bytes,
+                    processes=2,
+                    seed=3).run(self.r)
+        self.assertEqual(len(serial.returns), 300)
+        np.testing.assert_array_equal(serial.returns, pool.returns)
+        np.testing.assert_array_equal(serial.max_drawdowns, pool.max_drawdowns)
+
+
+if __name__ == '__main__':
+    unittest.main()
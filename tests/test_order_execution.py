@@ -0,0 +1,160 @@
+import os,sys
+# To avoid 'no module named...' in trading_bot files importing
+# local modules. Add trading_bot to path.
+sys.path.insert(0, os.path.abspath('./trading_bot/'))
+
+import time
+import unittest
+
+import gate_api
+
+from trading_bot.gateio_utils import ExchangeApi, create_api_client
+from trading_bot.order_execution import (
+    PLACED,
+    REJECTED,
+    TIMEOUT,
+    OrderExecutor,
+    client_order_id,
+)
+from trading_bot.order_stand_in import SpotOrderStandIn
+from trading_bot.strategy import Signal
+
+CONTRACTS = ["BTC_USDT", "ETH_USDT", "SOL_USDT", "XRP_USDT"]
+
+
+class FakeMarketData:
+
+    def list_currency_pairs(self, **kwargs):
+        return [
+            gate_api.CurrencyPair(
+                id=contract,
+                precision=2,
+                amount_precision=4,
+                min_base_amount="0.0001",
+                min_quote_amount="3",
+                trade_status="tradable")
+            for contract in CONTRACTS
+        ]
+
+
+def make_signal(contract="BTC_USDT", time=600, entry=100.123):
+    return Signal("StrategyHammer", contract, time, entry, 98.456, 101.789)
+
+
+class TestOrderExecution(unittest.TestCase):
+
+    def setUp(self):
+        self.stand_in = SpotOrderStandIn(FakeMarketData())
+        self.exchange_api = ExchangeApi(
+                                api_instance=self.stand_in,
+                                api_client=create_api_client(
+                                    key="key", secret="secret"))
+        self.executor = OrderExecutor(
+                            self.exchange_api,
+                            stake=50,
+                            latency_budget=1.0,
+                            base_delay=0.01)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_authenticated_api_and_shared_rate_limits(self):
+        with self.assertRaises(ValueError):
+            OrderExecutor(ExchangeApi(api_instance=self.stand_in))
+
+        self.assertEqual(self.executor.execute(make_signal()).status, PLACED)
+        # Orders are counted with market data requests of exchange API.
+        metrics = self.exchange_api.get_request_metrics()
+        self.assertEqual(metrics["endpoints"]["create_order"]["completed"], 1)
+
+    def test_limit_order_with_stop_and_target(self):
+        signal = make_signal()
+        result = self.executor.execute(signal)
+        self.assertEqual(result.status, PLACED)
+        self.assertEqual(result.attempts, 1)
+        self.assertEqual(result.text, client_order_id(signal))
+        # Same bar of other interval or strategy parameters.
+        self.assertNotEqual(result.text, client_order_id(signal, "15m"))
+        self.assertNotEqual(
+            result.text,
+            client_order_id(signal._replace(strategy="StrategyHammer-1")))
+        self.assertLessEqual(len(result.text), 28)
+
+        order = self.stand_in.orders[result.order_id]
+        self.assertEqual(order.type, "limit")
+        self.assertEqual(order.price, "100.12")
+        self.assertEqual(order.amount, "0.4993")
+        self.assertEqual(order.stop_loss.trigger_price, "98.46")
+        self.assertEqual(order.stop_profit.trigger_price, "101.79")
+
+    def test_market_order(self):
+        self.stand_in.set_price("ETH_USDT", 25.0)
+        result = self.executor.execute(make_signal("ETH_USDT"), market=True)
+        order = self.stand_in.orders[result.order_id]
+        self.assertEqual((order.type, order.time_in_force), ("market", "ioc"))
+        self.assertEqual(order.status, "closed")
+        self.assertEqual(float(order.filled_amount), 2.0)
+
+    def test_lost_response_places_single_order(self):
+        self.stand_in.set_price("BTC_USDT", 100.0)
+        self.stand_in.fail_next(1, status=0, accepted=True)
+        result = self.executor.execute(make_signal())
+        self.assertEqual(result.status, PLACED)
+        self.assertEqual(result.attempts, 1)
+        # Filled order is found among finished ones, not placed again.
+        self.assertEqual(len(self.stand_in.orders), 1)
+        self.assertIn(result.order_id, self.stand_in.orders)
+
+    def test_server_errors_are_retried(self):
+        self.stand_in.fail_next(2, status=503)
+        result = self.executor.execute(make_signal())
+        self.assertEqual(result.status, PLACED)
+        # Second failure hits lookup of possibly placed order.
+        self.assertEqual(result.attempts, 2)
+        self.assertEqual(len(self.stand_in.orders), 1)
+
+    def test_rejected_and_timeout(self):
+        self.stand_in.fail_next(1, status=400)
+        result = self.executor.execute(make_signal())
+        self.assertEqual((result.status, result.attempts), (REJECTED, 1))
+
+        result = self.executor.execute(make_signal(entry=1000000.0))
+        self.assertEqual((result.status, result.attempts), (REJECTED, 0))
+
+        self.executor.latency_budget = 0.2
+        self.stand_in.latency = 0.5
+        start = time.monotonic()
+        result = self.executor.execute(make_signal())
+        self.assertEqual(result.status, TIMEOUT)
+        self.assertLess(time.monotonic() - start, 0.4)
+
+    def test_unexpected_errors_are_results(self):
+        def fail(*args, **kwargs):
+            raise RuntimeError("unexpected")
+
+        self.stand_in.create_order = fail
+        with self.assertLogs("trading_bot.order_execution", level="ERROR"):
+            result = self.executor.submit(make_signal()).result()
+        self.assertEqual((result.status, result.attempts), (TIMEOUT, 1))
+
+        self.executor.exchange_api.get_pair_info = fail
+        with self.assertLogs("trading_bot.order_execution", level="ERROR"):
+            result = self.executor.submit(make_signal()).result()
+        self.assertEqual((result.status, result.attempts), (REJECTED, 0))
+        self.assertEqual(result.error, "unexpected")
+
+    def test_contracts_placed_concurrently(self):
+        self.stand_in.latency = 0.1
+        signals = [make_signal(contract) for contract in CONTRACTS]
+        # Warm up pairs metadata.
+        self.executor.build(signals[0])
+        start = time.monotonic()
+        results = self.executor.execute_signals(signals)
+        elapsed = time.monotonic() - start
+        self.assertEqual([r.status for r in results], [PLACED] * 4)
+        self.assertEqual([r.contract for r in results], CONTRACTS)
+        self.assertLess(elapsed, 0.3)
+
+
+if __name__ == '__main__':
+    unittest.main()
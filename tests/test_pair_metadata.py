@@ -0,0 +1,68 @@
+import os,sys
+# To avoid 'no module named...' in trading_bot files importing
+# local modules. Add trading_bot to path.
+sys.path.insert(0, os.path.abspath('./trading_bot/'))
+
+import threading
+import time
+import unittest
+
+import gate_api
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib3.exceptions import ProtocolError
+
+from trading_bot.pair_metadata import PairMetadataCache
+from trading_bot.request_scheduler import RequestScheduler
+
+
+class FakeSpotApi:
+
+    def __init__(self):
+        self.requests = 0
+        self.failing = False
+        self.lock = threading.Lock()
+
+    def list_currency_pairs(self, **kwargs):
+        with self.lock:
+            self.requests += 1
+        time.sleep(0.05)
+        if self.failing:
+            raise ProtocolError("Connection aborted.")
+        return [gate_api.CurrencyPair(
+                    id="BTC_USDT",
+                    precision=2,
+                    amount_precision=4,
+                    trade_status="tradable")]
+
+
+class TestPairMetadataCache(unittest.TestCase):
+
+    def setUp(self):
+        self.api = FakeSpotApi()
+        self.cache = PairMetadataCache(
+                        self.api,
+                        retry_delay=0.2,
+                        scheduler=RequestScheduler(max_retries=0))
+
+    def test_concurrent_callers_share_refresh(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            pairs = list(executor.map(
+                self.cache.get, ["BTC_USDT"] * 8))
+        self.assertEqual(self.api.requests, 1)
+        self.assertTrue(all(pair.tradable for pair in pairs))
+
+    def test_failed_refresh_backs_off(self):
+        self.api.failing = True
+        for _ in range(5):
+            self.assertIsNone(self.cache.get("BTC_USDT"))
+        self.assertEqual(self.api.requests, 1)
+
+        time.sleep(0.25)
+        self.api.failing = False
+        self.assertEqual(self.cache.get("BTC_USDT").precision, 2)
+        self.assertEqual(self.api.requests, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
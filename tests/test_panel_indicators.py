@@ -0,0 +1,71 @@
+import os,sys
+# To avoid 'no module named...' in trading_bot files importing
+# local modules. Add trading_bot to path.
+sys.path.insert(0, os.path.abspath('./trading_bot/'))
+
+import unittest
+import numpy as np
+import pandas as pd
+
+from ta.momentum import RSIIndicator
+from ta.trend import EMAIndicator, SMAIndicator
+from ta.volatility import AverageTrueRange
+from trading_bot.indicators import Indicators
+from trading_bot.live_data import LiveData
+from trading_bot.streaming_indicators import Atr, Ema, Rsi, Sma
+from tests.helpers import random_walk
+
+
+def make_candles(size, seed):
+    df = random_walk(size, seed, volatility=1, interval=60)
+    return {field: df[field].to_numpy() for field in df.columns}
+
+
+class TestPanelIndicators(unittest.TestCase):
+
+    def setUp(self):
+        self.contracts = ["BTC_USDT", "ETH_USDT", "SOL_USDT"]
+        # Contracts with shorter history are padded.
+        self.candles = {
+            contract: make_candles(size, seed)
+            for seed, (contract, size) in enumerate(
+                zip(self.contracts, (120, 80, 20)))
+        }
+        self.live_data = LiveData(capacity=200)
+        for contract, candles in self.candles.items():
+            self.live_data.update(contract, "1m", candles)
+
+    def test_panel_layout(self):
+        panel = self.live_data.panel(self.contracts, "1m")
+        self.assertEqual(panel["close"].shape, (3, 120))
+        self.assertTrue(np.isnan(panel["close"][2, :100]).all())
+        np.testing.assert_array_equal(
+            panel["close"][2, 100:], self.candles["SOL_USDT"]["close"])
+
+    def test_panel_matches_ta(self):
+        panel = self.live_data.panel(self.contracts, "1m")
+        columns = Indicators().panel(
+                    panel, (Ema(20), Sma(10), Atr(), Rsi()))
+
+        for row, contract in enumerate(self.contracts):
+            df = pd.DataFrame(self.candles[contract])
+            size = len(df)
+            expected = {
+                "ema20": EMAIndicator(
+                            df["close"], 20, fillna=True).ema_indicator(),
+                "sma10": SMAIndicator(
+                            df["close"], 10, fillna=True).sma_indicator(),
+                "atr14": AverageTrueRange(
+                            df["high"], df["low"], df["close"],
+                            fillna=True).average_true_range(),
+                "rsi14": RSIIndicator(df["close"]).rsi(),
+            }
+            for name, values in expected.items():
+                np.testing.assert_allclose(
+                    columns[name][row, -size:], values,
+                    rtol=1e-9, err_msg=name)
+                self.assertTrue(np.isnan(columns[name][row, :-size]).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
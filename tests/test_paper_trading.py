@@ -0,0 +1,182 @@
+import os,sys
+# To avoid 'no module named...' in trading_bot files importing
+# local modules. Add trading_bot to path.
+sys.path.insert(0, os.path.abspath('./trading_bot/'))
+
+import unittest
+import numpy as np
+
+from trading_bot.backtest import Backtest, add_required_indicators
+from trading_bot.live_data import LiveData
+from trading_bot.paper_trading import CLOSED, EXPIRED, OPEN, PaperTrader
+from trading_bot.strategy import Signal
+from trading_bot.strategy_hammer import StrategyHammer
+from tests.helpers import random_walk
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def candle(t, o, h, l, c):
+    return {
+        "time": np.array([t], dtype=np.int64),
+        "open": np.array([o]),
+        "high": np.array([h]),
+        "low": np.array([l]),
+        "close": np.array([c]),
+        "volume": np.array([1.0]),
+    }
+
+
+def make_df(size, seed=3):
+    return random_walk(size, seed, volatility=0.1)
+
+
+class TestPaperTrader(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.trader = PaperTrader(fee=0.0, clock=self.clock, order_ttl=2)
+
+    def test_fill_exit_and_latency(self):
+        # Signal of candle 0, which closes at 300.
+        self.clock.now = 300.5
+        order = self.trader.submit(
+                    Signal("StrategyHammer", "BTC_USDT", 0, 100, 98, 102), "5m")
+        # Candle 0 is already known, it does not fill order.
+        self.trader.on_candles("BTC_USDT", "5m", candle(0, 100, 101, 99, 100))
+        self.assertEqual(order.status, "pending")
+
+        self.clock.now = 301.0
+        self.trader.on_candles("BTC_USDT", "5m", candle(300, 100.5, 103, 99.5, 102))
+        self.assertEqual(order.status, OPEN)
+        self.assertEqual(order.entry_price, 100)
+        # Target of fill candle is ignored, high could come before fill.
+        self.clock.now = 601.0
+        self.trader.on_candles("BTC_USDT", "5m", candle(600, 102.5, 103, 102, 102.5))
+        self.assertEqual(order.status, CLOSED)
+        self.assertEqual(order.exit_price, 102.5)
+
+        trades = self.trader.trades()
+        self.assertEqual(trades["pnl"].tolist(), [2.5])
+        self.assertEqual(trades["close_to_signal"].tolist(), [0.5])
+        self.assertEqual(trades["signal_to_fill"].tolist(), [0.5])
+        latency = self.trader.latency()
+        self.assertEqual(latency.loc["50%", "signal_to_fill"], 0.5)
+
+    def test_stop_first_and_expiry(self):
+        stopped = self.trader.submit(
+                    Signal("StrategyHammer", "ETH_USDT", 0, 100, 98, 102), "5m")
+        expired = self.trader.submit(
+                    Signal("StrategyHammer", "ETH_USDT", 0, 90, 88, 92), "5m")
+        self.trader.on_candles("ETH_USDT", "5m", candle(300, 100, 100, 99, 99))
+        # Stop loss and target in one candle, stop loss is assumed first.
+        self.trader.on_candles("ETH_USDT", "5m", candle(600, 99, 103, 97, 99))
+        self.trader.on_candles("ETH_USDT", "5m", candle(900, 99, 99, 89, 89))
+        self.assertEqual(stopped.exit_reason, "stop")
+        self.assertEqual(stopped.exit_price, 98)
+        self.assertEqual(expired.status, EXPIRED)
+        self.assertEqual(self.trader.open_orders(), [])
+
+    def test_market_order_and_ticks(self):
+        order = self.trader.submit(
+                    Signal("StrategyHammer", "SOL_USDT", 0, 100, 98, 102),
+                    "5m",
+                    market=True)
+        self.trader.on_tick("SOL_USDT", 101.0, 299)
+        self.assertEqual(order.status, "pending")
+        self.trader.on_tick("SOL_USDT", 101.0, 301)
+        self.assertEqual(order.entry_price, 101.0)
+        self.trader.on_tick("SOL_USDT", 98.5, 302)
+        self.trader.on_tick("SOL_USDT", 97.0, 303)
+        self.assertEqual((order.exit_reason, order.exit_price), ("stop", 97.0))
+
+    def test_ticks_and_candles(self):
+        order = self.trader.submit(
+                    Signal("StrategyHammer", "SOL_USDT", 0, 100, 98, 102), "5m")
+        self.trader.on_tick("SOL_USDT", 99.0, 310)
+        self.assertEqual(order.entry_price, 99.0)
+        # Candle opened before the fill, its open is not an exit price.
+        self.trader.on_candles("SOL_USDT", "5m", candle(300, 96, 101, 95, 97))
+        self.assertEqual((order.exit_reason, order.exit_price), ("stop", 98))
+        # Candles older than the tick are skipped.
+        self.trader.on_candles("SOL_USDT", "5m", candle(0, 90, 91, 89, 90))
+        self.assertEqual(self.trader.trades()["exit_time"].tolist(), [300])
+
+    def test_intervals_of_one_contract(self):
+        five = self.trader.submit(
+                Signal("StrategyHammer", "BTC_USDT", 0, 100, 98, 102), "5m")
+        fifteen = self.trader.submit(
+                Signal("StrategyHammer", "BTC_USDT", 0, 100, 98, 102), "15m")
+        self.trader.on_candles("BTC_USDT", "5m", candle(300, 100, 100, 99, 99))
+        self.assertEqual((five.status, fifteen.status), (OPEN, "pending"))
+        self.trader.on_candles(
+            "BTC_USDT", "15m", candle(900, 100, 100, 99, 99))
+        self.assertEqual(fifteen.status, OPEN)
+        # Tick fills orders of all intervals.
+        self.trader.on_tick("BTC_USDT", 97.0, 1300)
+        self.assertEqual((five.status, fifteen.status), (CLOSED, CLOSED))
+
+    def test_finished_orders_are_pruned(self):
+        trader = PaperTrader(fee=0.0, clock=self.clock, order_ttl=2, history=2)
+        for i in range(3):
+            trader.submit(
+                Signal("StrategyHammer", "BTC_USDT", 0, 100, 98, 102), "5m")
+        trader.submit(Signal("StrategyHammer", "BTC_USDT", 0, 90, 88, 92), "5m")
+        trader.on_candles("BTC_USDT", "5m", candle(300, 100, 100, 99, 99))
+        trader.on_candles("BTC_USDT", "5m", candle(600, 99, 103, 99, 103))
+        trader.on_candles("BTC_USDT", "5m", candle(900, 103, 103, 102, 102))
+
+        self.assertEqual(trader.orders, {})
+        # Only the newest finished orders are kept.
+        self.assertEqual(trader.trades()["id"].tolist(), [3])
+        self.assertEqual(trader.latency().loc["count", "close_to_signal"], 2)
+
+    def test_matches_backtest(self):
+        df = make_df(3000)
+        add_required_indicators(df, StrategyHammer(LiveData()))
+        backtest = Backtest(fee=0.002, order_ttl=12)
+        expected = backtest.run(StrategyHammer(LiveData()), df).trades
+        expected = expected[expected["exit_reason"] != "end"]
+        setups = backtest.signals(StrategyHammer(LiveData()), df)
+        setups = setups.set_index("bar").loc[expected["signal_bar"]]
+
+        # Backtest holds one position at a time, submit only its trades.
+        trader = PaperTrader(fee=0.002, order_ttl=12)
+        signals = {
+            bar: Signal(
+                "StrategyHammer",
+                "BTC_USDT",
+                int(row.time),
+                row.entry,
+                row.stop_loss,
+                row.target)
+            for bar, row in zip(setups.index, setups.itertuples())
+        }
+        for bar in range(len(df)):
+            trader.on_candles(
+                "BTC_USDT",
+                "5m",
+                {k: df[k].to_numpy()[bar:bar + 1] for k in df.columns})
+            if bar in signals:
+                trader.submit(signals[bar], "5m")
+
+        trades = trader.trades()
+        self.assertGreater(len(trades), 10)
+        np.testing.assert_allclose(trades["entry_price"], expected["entry_price"])
+        np.testing.assert_allclose(trades["exit_price"], expected["exit_price"])
+        np.testing.assert_allclose(trades["pnl"], expected["pnl"])
+        self.assertEqual(
+            trades["exit_reason"].tolist(), expected["exit_reason"].tolist())
+        self.assertEqual(
+            trades["exit_time"].tolist(), expected["exit_time"].tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
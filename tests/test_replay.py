@@ -0,0 +1,82 @@
+import os,sys
+# To avoid 'no module named...' in trading_bot files importing
+# local modules. Add trading_bot to path.
+sys.path.insert(0, os.path.abspath('./trading_bot/'))
+
+import tempfile
+import time
+import unittest
+
+import gate_api
+from gate_api.exceptions import ApiException
+
+from trading_bot.gateio_utils import ExchangeApi, Interval
+from trading_bot.replay import RecordingSpotApi, ReplaySpotApi
+
+
+class FakeSpotApi:
+    """Exchange with hourly candles and one currency pair."""
+
+    def list_candlesticks(self, currency_pair, interval, limit=100, **kwargs):
+        times = range(3600, 3600 * (limit + 1), 3600)
+        return [[str(t), "1", "2", "3", "1", "2", "0.5", "true"] for t in times]
+
+    def list_currency_pairs(self, **kwargs):
+        return [gate_api.CurrencyPair(
+                    id="BTC_USDT",
+                    precision=2,
+                    amount_precision=4,
+                    min_base_amount="0.0001",
+                    min_quote_amount="1",
+                    trade_status="tradable")]
+
+
+class TestReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "recording.json")
+        recorder = RecordingSpotApi(FakeSpotApi(), self.path)
+        recorder.list_candlesticks("BTC_USDT", interval="1h", limit=50)
+        recorder.list_currency_pairs()
+        recorder.save()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_replay_through_exchange_api(self):
+        exchange_api = ExchangeApi(api_instance=ReplaySpotApi(self.path))
+
+        columns = exchange_api.get_candle_stick(
+                    "BTC_USDT", Interval.INT_1H, limit=10, columnar=True)
+        self.assertEqual(len(columns["time"]), 10)
+        self.assertEqual(columns["time"][-1], 3600 * 50)
+
+        pair = exchange_api.get_pair_info("BTC_USDT")
+        self.assertEqual(pair.precision, 2)
+        self.assertTrue(pair.tradable)
+
+    def test_replay_time_range(self):
+        api_instance = ReplaySpotApi(self.path)
+        candles = api_instance.list_candlesticks(
+                    "BTC_USDT", interval="1h", _from=7200, to=36000)
+        self.assertEqual([int(c[0]) for c in candles],
+                         list(range(7200, 36001, 3600)))
+        self.assertEqual(
+            api_instance.list_candlesticks("ETH_USDT", interval="1h"), [])
+
+    def test_injected_latency_and_errors(self):
+        api_instance = ReplaySpotApi(self.path, latency=0.02, seed=1)
+        start = time.perf_counter()
+        api_instance.list_candlesticks("BTC_USDT", interval="1h")
+        self.assertGreaterEqual(time.perf_counter() - start, 0.02)
+
+        api_instance = ReplaySpotApi(
+                        self.path, error_rate=1, error_status=429)
+        with self.assertRaises(ApiException) as context:
+            api_instance.list_candlesticks("BTC_USDT", interval="1h")
+        self.assertEqual(context.exception.status, 429)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import os,sys
+# To avoid 'no module named...' in trading_bot files importing
+# local modules. Add trading_bot to path.
+sys.path.insert(0, os.path.abspath('./trading_bot/'))
+
+import threading
+import time
+import unittest
+
+from gate_api.exceptions import ApiException
+
+from trading_bot.request_scheduler import (
+    Priority,
+    RequestDeadlineExceeded,
+    RequestScheduler,
+)
+
+
+class FlakyRequest:
+    """Fails with given statuses before returning result."""
+
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.statuses:
+            raise ApiException(status=self.statuses.pop(0))
+        return "ok"
+
+
+class TestRequestScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = RequestScheduler(
+                            limits={"fast": (1000, 1000), "slow": (5, 1)},
+                            max_workers=1,
+                            base_delay=0.01,
+                            max_delay=0.02)
+
+    def test_live_requests_served_before_backfill(self):
+        started = threading.Event()
+        release = threading.Event()
+        order = []
+
+        def blocking():
+            started.set()
+            release.wait()
+
+        self.scheduler.submit("fast", blocking)
+        started.wait()
+        futures = [
+            self.scheduler.submit(
+                "fast", order.append, "backfill", priority=Priority.BACKFILL),
+            self.scheduler.submit(
+                "fast", order.append, "live", priority=Priority.LIVE),
+        ]
+        self.assertEqual(self.scheduler.metrics()["queue_depth"], 2)
+        self.assertEqual(
+            self.scheduler.metrics()["queue_depth_by_priority"],
+            {Priority.LIVE: 1, Priority.BACKFILL: 1})
+        release.set()
+        for future in futures:
+            future.result(timeout=5)
+
+        self.assertEqual(order, ["live", "backfill"])
+
+    def test_retry_on_rate_limit_and_server_error(self):
+        request = FlakyRequest([429, 503])
+        self.assertEqual(self.scheduler.call("fast", request), "ok")
+        self.assertEqual(request.calls, 3)
+        self.assertEqual(self.scheduler.metrics()["retries"], 2)
+
+    def test_request_without_retries(self):
+        request = FlakyRequest([503])
+        with self.assertRaises(ApiException):
+            self.scheduler.call("fast", request, max_retries=0)
+        self.assertEqual(request.calls, 1)
+        self.assertEqual(self.scheduler.metrics()["retries"], 0)
+
+    def test_client_error_is_not_retried(self):
+        request = FlakyRequest([400])
+        with self.assertRaises(ApiException):
+            self.scheduler.call("fast", request)
+        self.assertEqual(request.calls, 1)
+        self.assertEqual(self.scheduler.metrics()["failed"], 1)
+
+    def test_deadline_and_throttling(self):
+        self.scheduler.call("slow", time.time)
+        # Next token is available after 0.2s, later than deadline.
+        with self.assertRaises(RequestDeadlineExceeded):
+            self.scheduler.call("slow", time.time, timeout=0.05)
+        self.assertEqual(self.scheduler.metrics()["expired"], 1)
+
+        self.scheduler.call("slow", time.time, timeout=1)
+        metrics = self.scheduler.metrics()
+        self.assertEqual(metrics["endpoints"]["slow"]["throttled"], 1)
+        self.assertGreater(metrics["throttled_seconds"], 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import os,sys
+# To avoid 'no module named...' in trading_bot files importing
+# local modules. Add trading_bot to path.
+sys.path.insert(0, os.path.abspath('./trading_bot/'))
+
+import tempfile
+import unittest
+from unittest import mock
+
+from trading_bot.signal_journal import ACTIVE_LOG, SignalJournal
+from trading_bot.strategy import Signal
+
+
+def make_signal(contract, time, entry=100.0):
+    return Signal(
+            "StrategyHammer", contract, time, entry, entry - 1, entry + 1)
+
+
+class TestSignalJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = self.tmp_dir.name
+        self.journal = SignalJournal(self.root, segment_records=10)
+
+    def tearDown(self):
+        self.journal.close()
+        self.tmp_dir.cleanup()
+
+    def append_many(self, count):
+        for i in range(count):
+            contract = ("BTC_USDT", "ETH_USDT", "SOL_USDT")[i % 3]
+            self.journal.append(
+                make_signal(contract, 300 * i, 100.0 + i),
+                "5m",
+                {"ema20": 99.0 + i, "atr": 0.5})
+
+    def test_query_compacted_and_active(self):
+        self.append_many(25)
+        # Two segments compacted automatically, five records active.
+        self.assertEqual(len(self.journal.segments()), 2)
+
+        df = self.journal.query()
+        self.assertEqual(df["time"].tolist(), [300 * i for i in range(25)])
+        self.assertEqual(df["entry"].tolist(), [100.0 + i for i in range(25)])
+        self.assertEqual(df["ema20"].tolist(), [99.0 + i for i in range(25)])
+        self.assertTrue((df["atr"] == 0.5).all())
+
+        df = self.journal.query(start=300 * 5, end=300 * 23, contract="ETH_USDT")
+        self.assertEqual(df["time"].tolist(), [300 * i for i in range(7, 23, 3)])
+        self.assertTrue((df["contract"] == "ETH_USDT").all())
+        self.assertTrue(self.journal.query(contract="DOT_USDT").empty)
+        self.assertEqual(len(self.journal.query(interval="1h")), 0)
+
+    def test_full_compaction_and_reopen(self):
+        self.append_many(25)
+        expected = self.journal.query()
+        self.assertEqual(self.journal.compact(full=True), 1)
+        self.journal.close()
+
+        self.journal = SignalJournal(self.root, segment_records=10)
+        self.assertEqual(self.journal.segments(), [(0, 300 * 24)])
+        self.assertTrue(self.journal.query().equals(expected))
+
+    def test_interrupted_compaction_is_finished_on_open(self):
+        self.append_many(25)
+        expected = self.journal.query()
+        # Crash after segment is published, before old segments and
+        # active log are cleared.
+        with mock.patch("os.remove", side_effect=OSError("crash")):
+            with self.assertRaises(OSError):
+                self.journal.compact(full=True)
+        self.journal.close()
+
+        self.journal = SignalJournal(self.root, segment_records=10)
+        self.assertEqual(self.journal.segments(), [(0, 300 * 24)])
+        self.assertTrue(self.journal.query().equals(expected))
+
+    def test_partial_record_is_dropped(self):
+        self.append_many(3)
+        self.journal.close()
+        with open(os.path.join(self.root, ACTIVE_LOG), "ab") as active:
+            active.write(b"\x01" * 17)
+
+        self.journal = SignalJournal(self.root, segment_records=10)
+        self.journal.append(make_signal("BTC_USDT", 900), "5m",
+                            {"ema20": 1.0, "atr": 2.0})
+        df = self.journal.query()
+        self.assertEqual(df["time"].tolist(), [0, 300, 600, 900])
+        self.assertEqual(df["ema20"].tolist()[-1], 1.0)
+
+    def test_schema_mismatch(self):
+        self.journal.append(make_signal("BTC_USDT", 0), "5m", {"atr": 1.0})
+        with self.assertRaises(ValueError):
+            self.journal.append(make_signal("BTC_USDT", 300), "5m", {})
+        signal = make_signal("BTC_USDT", 0)._replace(strategy="X" * 40)
+        with self.assertRaises(ValueError):
+            self.journal.append(signal, "5m")
+        self.assertEqual(len(self.journal.query()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
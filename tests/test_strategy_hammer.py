@@ -3,22 +3,39 @@ import os,sys
 # local modules. Add trading_bot to path.
 sys.path.insert(0, os.path.abspath('./trading_bot/'))
 
+import tempfile
 import unittest
 from datetime import datetime
 from pandas import DataFrame
 
 
+from trading_bot.candle_store import CandleStore
 from trading_bot.gateio_utils import ExchangeApi, Interval
 from trading_bot.indicators import Indicators
 from trading_bot.live_data import LiveData
+from trading_bot.replay import ReplaySpotApi
 from trading_bot.strategy_hammer import StrategyHammer
+from tests.helpers import random_walk
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 
 
 class TestStrategyHammer(unittest.TestCase):
 
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
     def test_start(self):
         """"Startegy hammer example 25th march at 9 on 1h chart."""
-        self.exchange_api = ExchangeApi()
+        # Candles are replayed offline through local store, kept only
+        # by test.
+        self.exchange_api = ExchangeApi(
+                                candle_store=CandleStore(self.tmp_dir.name),
+                                api_instance=ReplaySpotApi(os.path.join(
+                                    DATA_DIR, "strategy_hammer_1h.json")))
         self.contract = "BTC_USDT"
         self.live_data = LiveData()
         
@@ -43,5 +60,69 @@ class TestStrategyHammer(unittest.TestCase):
         self.assertEqual(strategy_hammer.target, 44097.90978)
 
 
+class TestStrategyHammerScan(unittest.TestCase):
+
+    def make_df(self, size):
+        df = random_walk(size)
+        indicators = Indicators()
+        indicators.add_atr(df)
+        indicators.add_ema(df, 20)
+        return df
+
+    def test_scan_matches_live_logic(self):
+        df = self.make_df(1500)
+        live_data = LiveData()
+        for market_order in (False, True):
+            strategy = StrategyHammer(live_data, market_order=market_order)
+            expected = []
+            for bar in range(len(df) - 1):
+                live_data.df = df.iloc[:bar + 2]
+                strategy.start()
+                if strategy.is_setup_ready():
+                    expected.append((
+                        bar,
+                        strategy.entry,
+                        strategy.stop_loss,
+                        strategy.target))
+                strategy.clear()
+
+            setups = strategy.scan(df)
+            self.assertGreater(len(expected), 10)
+            self.assertEqual(
+                list(setups[["bar", "entry", "stop_loss", "target"]]
+                     .itertuples(index=False, name=None)),
+                expected,
+                "market_order={}".format(market_order))
+
+    def test_evaluate_matches_live_logic(self):
+        df = self.make_df(800)
+        live_data = LiveData()
+        strategy = StrategyHammer(live_data)
+        found = 0
+        for bar in range(len(df) - 1):
+            view = df.iloc[:bar + 2]
+            signal = strategy.evaluate(view, "BTC_USDT")
+            live_data.df = view
+            strategy.start()
+            if strategy.is_setup_ready():
+                found += 1
+                self.assertEqual(
+                    signal[3:],
+                    (strategy.entry, strategy.stop_loss, strategy.target))
+                self.assertEqual(signal.time, df["time"].iloc[bar])
+                self.assertEqual(signal.contract, "BTC_USDT")
+                self.assertEqual(signal.strategy, strategy.name)
+            else:
+                self.assertIsNone(signal)
+            strategy.clear()
+        self.assertGreater(found, 5)
+
+        # Evaluation does not change strategy.
+        pips = strategy._pips
+        strategy.evaluate(df, "BTC_USDT")
+        self.assertFalse(strategy.is_setup_ready())
+        self.assertEqual(strategy._pips, pips)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,83 @@
+import os,sys
+# To avoid 'no module named...' in trading_bot files importing
+# local modules. Add trading_bot to path.
+sys.path.insert(0, os.path.abspath('./trading_bot/'))
+
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from trading_bot.indicators import Indicators
+from trading_bot.strategy_hammer import StrategyHammer
+from trading_bot.strategy_runner import StrategyRunner
+from tests.helpers import random_walk
+
+
+class StrategyBroken(StrategyHammer):
+
+    def evaluate(self, df, contract=""):
+        raise ValueError("broken")
+
+
+class StrategyScanOnly(StrategyHammer):
+    supports_evaluate = False
+
+
+def make_df(size, seed):
+    df = random_walk(size, seed)
+    indicators = Indicators()
+    indicators.add_atr(df)
+    indicators.add_ema(df, 20)
+    return df
+
+
+class TestStrategyRunner(unittest.TestCase):
+
+    def setUp(self):
+        # Views ending right after hammer setups and at random bars.
+        df = make_df(1000, 3)
+        setups = StrategyHammer(None).scan(df)["bar"].tolist()
+        ends = setups[:6] + [100, 250, 400, 650, 800, 950]
+        self.views = {
+            "PAIR{}_USDT".format(i): df.iloc[:end + 2]
+            for i, end in enumerate(ends)
+        }
+        self.strategies = [
+            StrategyHammer(None),
+            StrategyHammer(None, tail_len=2, narrow_pips=10),
+        ]
+
+    def test_concurrent_matches_serial(self):
+        expected = [
+            signal
+            for contract, df in self.views.items()
+            for strategy in self.strategies
+            for signal in [strategy.evaluate(df, contract)]
+            if signal is not None
+        ]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            signals = StrategyRunner(self.strategies, executor).run(self.views)
+        self.assertGreater(len(expected), 0)
+        self.assertEqual(signals, expected)
+        self.assertEqual(StrategyRunner(self.strategies).run(self.views), expected)
+
+    def test_failing_strategy_is_skipped(self):
+        runner = StrategyRunner([StrategyBroken(None)] + self.strategies)
+        with self.assertLogs("trading_bot.strategy_runner", level="ERROR"):
+            signals = runner.run(self.views)
+        self.assertEqual(signals, StrategyRunner(self.strategies).run(self.views))
+
+    def test_strategy_without_evaluate_is_rejected(self):
+        with self.assertRaises(ValueError):
+            StrategyRunner([StrategyScanOnly(None)])
+
+    def test_strategies_are_named_by_parameters(self):
+        names = [strategy.name for strategy in self.strategies]
+        self.assertNotEqual(names[0], names[1])
+        self.assertEqual(names[0], StrategyHammer(None).name)
+        self.assertTrue(names[0].startswith("StrategyHammer-"))
+        with self.assertRaises(ValueError):
+            StrategyRunner([StrategyHammer(None), StrategyHammer(None)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import os,sys
+# To avoid 'no module named...' in trading_bot files importing
+# local modules. Add trading_bot to path.
+sys.path.insert(0, os.path.abspath('./trading_bot/'))
+
+import unittest
+import numpy as np
+import pandas as pd
+
+from ta.momentum import RSIIndicator
+from ta.trend import EMAIndicator, PSARIndicator, SMAIndicator
+from ta.volatility import AverageTrueRange
+from trading_bot.streaming_indicators import (
+    Atr,
+    Ema,
+    IndicatorEngine,
+    Psar,
+    Rsi,
+    Sma,
+)
+from tests.helpers import random_walk
+
+
+def make_candles(size, seed=0):
+    df = random_walk(size, seed, volatility=1, interval=60)
+    return {field: df[field].to_numpy() for field in df.columns}
+
+
+def ta_reference(candles):
+    df = pd.DataFrame(candles)
+    psar = PSARIndicator(df["high"], df["low"], df["close"], 0.01, 0.20)
+    return {
+        "ema20": EMAIndicator(
+                    df["close"], 20, fillna=True).ema_indicator(),
+        "sma20": SMAIndicator(
+                    df["close"], 20, fillna=True).sma_indicator(),
+        "atr14": AverageTrueRange(
+                    df["high"], df["low"], df["close"],
+                    fillna=True).average_true_range(),
+        "rsi14": RSIIndicator(df["close"]).rsi(),
+        "psar": psar.psar(),
+        "psar_up_ind": psar.psar_up_indicator(),
+        "psar_down_ind": psar.psar_down_indicator(),
+    }
+
+
+def make_indicators():
+    return [Ema(20), Sma(20), Atr(), Rsi(), Psar(0.01, 0.20)]
+
+
+class TestStreamingIndicators(unittest.TestCase):
+
+    def test_updates_match_ta(self):
+        candles = make_candles(300)
+        reference = ta_reference(candles)
+        for indicator in make_indicators():
+            values = np.array([
+                indicator.update(h, l, c)
+                for h, l, c in zip(
+                    candles["high"], candles["low"], candles["close"])
+            ])
+            for i, name in enumerate(indicator.columns):
+                np.testing.assert_allclose(
+                    values[:, i], reference[name], rtol=1e-9, err_msg=name)
+
+    def test_peek_does_not_change_state(self):
+        ema = Ema(3)
+        ema.update(1, 1, 1)
+        self.assertEqual(ema.peek(5, 5, 5), ema.peek(5, 5, 5))
+        self.assertEqual(ema.update(2, 2, 2), (1.5,))
+
+
+class TestIndicatorEngine(unittest.TestCase):
+
+    def test_seed_and_incremental_updates_match_ta(self):
+        candles = make_candles(260)
+        engine = IndicatorEngine(history=50)
+        history = {field: v[:200] for field, v in candles.items()}
+        for indicator in make_indicators():
+            engine.seed("BTC_USDT", "1m", indicator, history)
+
+        for end in range(201, 261):
+            # Live window of the last 40 candles, the last one forming.
+            window = {field: v[end - 40:end] for field, v in candles.items()}
+            reference = ta_reference(
+                {field: v[:end] for field, v in candles.items()})
+            for indicator in make_indicators():
+                values = engine.update("BTC_USDT", "1m", indicator, window)
+                for name, column in values.items():
+                    np.testing.assert_allclose(
+                        column, reference[name][end - 40:end],
+                        rtol=1e-9, err_msg=name)
+
+    def test_values_older_than_history_are_nan(self):
+        engine = IndicatorEngine(history=10)
+        candles = make_candles(25)
+        values = engine.update(
+                    "BTC_USDT", "1m", Ema(20), candles, closed=True)
+        self.assertTrue(np.isnan(values["ema20"][:15]).all())
+        np.testing.assert_allclose(
+            values["ema20"][15:], ta_reference(candles)["ema20"][15:])
+
+    def test_contracts_have_separate_state(self):
+        engine = IndicatorEngine()
+        candles = make_candles(30)
+        other = make_candles(30, seed=1)
+        ema = engine.update("BTC_USDT", "1m", Ema(5), candles, closed=True)
+        engine.update("ETH_USDT", "1m", Ema(5), other, closed=True)
+        again = engine.update("BTC_USDT", "1m", Ema(5), candles, closed=True)
+        np.testing.assert_array_equal(ema["ema5"], again["ema5"])
+
+
+if __name__ == '__main__':
+    unittest.main()
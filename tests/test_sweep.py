@@ -0,0 +1,84 @@
+import os,sys
+# To avoid 'no module named...' in trading_bot files importing
+# local modules. Add trading_bot to path.
+sys.path.insert(0, os.path.abspath('./trading_bot/'))
+
+import unittest
+import pandas as pd
+
+from trading_bot.strategy_hammer import StrategyHammer
+from trading_bot.sweep import (
+    ParameterSweep,
+    SharedCandles,
+    parameter_grid,
+    parameter_sample,
+)
+from tests.helpers import random_walk
+
+
+class TestParameters(unittest.TestCase):
+
+    def test_grid(self):
+        params = parameter_grid({"tail_len": [4, 6], "fib_ratio": [0.3]})
+        self.assertEqual(params, [
+            {"tail_len": 4, "fib_ratio": 0.3},
+            {"tail_len": 6, "fib_ratio": 0.3},
+        ])
+
+    def test_sample(self):
+        grid = {"tail_len": [3, 4, 5, 6], "wide_pips": [30, 40, 50]}
+        params = parameter_sample(grid, 5, seed=1)
+        self.assertEqual(len(params), 5)
+        self.assertEqual(len({tuple(p.items()) for p in params}), 5)
+        for p in params:
+            self.assertIn(p, parameter_grid(grid))
+        self.assertEqual(params, parameter_sample(grid, 5, seed=1))
+        self.assertEqual(len(parameter_sample(grid, 100)), 12)
+
+
+class TestSharedCandles(unittest.TestCase):
+
+    def test_attach(self):
+        data = {
+            "BTC_USDT": random_walk(50, 1, 0.05),
+            "ETH_USDT": random_walk(30, 2, 0.05),
+        }
+        data["ETH_USDT"]["contract"] = "ETH_USDT"
+        with SharedCandles(data) as shared:
+            memory, attached = SharedCandles.attach(shared.name, shared.layout)
+            pd.testing.assert_frame_equal(
+                attached["BTC_USDT"], data["BTC_USDT"])
+            # Only numeric columns are shared.
+            pd.testing.assert_frame_equal(
+                attached["ETH_USDT"], data["ETH_USDT"].drop(columns="contract"))
+            del attached
+            memory.close()
+
+
+class TestParameterSweep(unittest.TestCase):
+
+    def test_pool_matches_single_process(self):
+        data = {
+            "BTC_USDT": random_walk(1500, 1, 0.05),
+            "ETH_USDT": random_walk(1500, 2, 0.05),
+        }
+        params = parameter_grid({
+            "tail_len": [4, 6],
+            "narrow_pips": [10, 20],
+            "wide_pips": [50],
+        })
+        single = ParameterSweep(StrategyHammer, processes=1).run(data, params)
+        pool = ParameterSweep(StrategyHammer, processes=2).run(data, params)
+
+        pd.testing.assert_frame_equal(single, pool)
+        self.assertEqual(len(single), 4)
+        self.assertTrue(single["pnl"].is_monotonic_decreasing)
+        self.assertTrue((single["trades"] > 0).all())
+        # Indicators are added to copies only.
+        self.assertEqual(
+            list(data["BTC_USDT"].columns),
+            ["time", "open", "high", "low", "close", "volume"])
+
+
+if __name__ == '__main__':
+    unittest.main()
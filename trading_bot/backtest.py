@@ -0,0 +1,364 @@
+import logging
+import numpy as np
+import pandas as pd
+
+from live_data import LiveData
+from pandas import DataFrame
+from strategy import Strategy
+from streaming_indicators import make_indicator
+from typing import Dict, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+# Columns of setups found by strategy.
+SIGNAL_COLUMNS = ["bar", "time", "entry", "stop_loss", "target"]
+# Columns of trade log.
+TRADE_COLUMNS = [
+    "contract",
+    "signal_bar",
+    "entry_bar",
+    "entry_time",
+    "entry_price",
+    "stop_loss",
+    "target",
+    "exit_bar",
+    "exit_time",
+    "exit_price",
+    "exit_reason",
+    "bars_held",
+    "quantity",
+    "fees",
+    "pnl",
+    "return",
+]
+# Bars searched at once for order fills, doubled until found.
+SEARCH_CHUNK = 256
+
+
+class BacktestResult(NamedTuple):
+    """Trade log and performance metrics of backtest."""
+
+    trades: DataFrame
+    metrics: dict
+
+
+def add_required_indicators(df: DataFrame, strategy: Strategy) -> None:
+    """Add to DataFrame missing indicators required by strategy. All
+    candles are closed, values match ta module indicators. DataFrame
+    is changed in place, pass a copy to keep the original.
+
+    Params:
+        df(DataFrame): Historical candles.
+        strategy(Strategy): Strategy declaring required_indicators.
+    """
+    highs = df["high"].to_numpy(dtype=np.float64).tolist()
+    lows = df["low"].to_numpy(dtype=np.float64).tolist()
+    closes = df["close"].to_numpy(dtype=np.float64).tolist()
+    for spec in sorted(strategy.required_indicators):
+        indicator = make_indicator(spec)
+        if all(column in df.columns for column in indicator.columns):
+            continue
+        update = indicator.update
+        values = np.array([
+            update(h, l, c) for h, l, c in zip(highs, lows, closes)
+        ]).reshape(len(df), len(indicator.columns))
+        for i, column in enumerate(indicator.columns):
+            df[column] = values[:, i]
+
+
+def _first_hit(
+    values: np.ndarray,
+    start: int,
+    end: int,
+    level: float,
+    below: bool
+) -> int:
+    """Index of the first value in [start, end) at or below (above)
+    level, searched in growing chunks. Returns -1 if there is none."""
+    chunk = SEARCH_CHUNK
+    while start < end:
+        stop = min(end, start + chunk)
+        window = values[start:stop]
+        hits = window <= level if below else window >= level
+        if hits.any():
+            return start + int(hits.argmax())
+        start = stop
+        chunk *= 2
+    return -1
+
+
+class Backtest:
+    """Replays historical candles through strategy and simulates long
+    limit or market orders with stop loss and target, fees and
+    slippage.
+    Strategies with scan() are evaluated in one vectorized pass, others
+    bar by bar like live bot.
+
+    Attributes:
+        fee(float): Fee rate paid on entry and exit notional.
+        slippage(float): Price fraction lost on every fill.
+        stake(float): Quote amount of every position.
+        capital(float): Starting equity for drawdown.
+        order_ttl(int): Bars entry order waits for fill.
+
+    Methods:
+    signals(strategy, df):
+        Setups found by strategy on all bars.
+    simulate(signals, df, contract, market):
+        Trades of setups, one position at a time.
+    run(strategy, df, contract):
+        Backtest strategy on candles of one contract.
+    run_all(strategy, data):
+        Backtest strategy on candles of many contracts.
+    metrics(trades, bars):
+        Performance metrics of trade log.
+    """
+
+    def __init__(
+        self,
+        fee: float = 0.002,
+        slippage: float = 0.0,
+        stake: float = 100.0,
+        capital: float = 1000.0,
+        order_ttl: int = 12
+    ) -> None:
+        """Params:
+            fee(float): Fee rate paid on entry and exit notional
+                (default 0.002)
+            slippage(float): Price fraction lost on every fill
+                (default 0.0)
+            stake(float): Quote amount of every position
+                (default 100.0)
+            capital(float): Starting equity for drawdown
+                (default 1000.0)
+            order_ttl(int): Bars entry order waits for fill
+                (default 12)"""
+        self.fee = fee
+        self.slippage = slippage
+        self.stake = stake
+        self.capital = capital
+        self.order_ttl = order_ttl
+
+    def signals(self, strategy: Strategy, df: DataFrame) -> DataFrame:
+        """Setups found by strategy on all bars. Bulk scan is used if
+        strategy supports it, otherwise strategy is started for every bar
+        like in live trading.
+
+        Params:
+            strategy(Strategy): Strategy with live_data.
+            df(DataFrame): Historical candles with required indicators.
+
+        Returns:
+            DataFrame: Setups with bar, time, entry, stop_loss and
+                target columns.
+        """
+        if strategy.supports_scan:
+            return strategy.scan(df)
+        logger.info("{} has no scan, running bar by bar".format(
+            type(strategy).__name__))
+
+        if strategy.live_data is None:
+            strategy.live_data = LiveData()
+        rows = []
+        times = df["time"].to_numpy()
+        for bar in range(len(df) - 1):
+            # Live strategy checks the candle before the forming one.
+            strategy.live_data.df = df.iloc[:bar + 2]
+            strategy.start()
+            if strategy.is_setup_ready():
+                rows.append((
+                    bar,
+                    times[bar],
+                    strategy.entry,
+                    strategy.stop_loss,
+                    strategy.target))
+            strategy.clear()
+        return DataFrame(rows, columns=SIGNAL_COLUMNS)
+
+    def simulate(
+        self,
+        signals: DataFrame,
+        df: DataFrame,
+        contract: str = "",
+        market: bool = False
+    ) -> DataFrame:
+        """Trades of setups. Entry limit order is placed after setup bar
+        closes and waits order_ttl bars. Market order fills at setup
+        entry, close of the bar after setup, like live strategy entered
+        on the forming candle. Position exits at stop loss or target,
+        stop loss first if both are hit in one bar, or at the last
+        close. Gaps through price levels fill at bar open. Setups found
+        while order or position is open are skipped.
+
+        Params:
+            signals(DataFrame): Setups from signals().
+            df(DataFrame): Historical candles.
+            contract(str): Currency pair for trade log (default "")
+            market(bool): If entry orders are market orders
+                (default False)
+
+        Returns:
+            DataFrame: Trade log.
+        """
+        opens = df["open"].to_numpy(dtype=np.float64)
+        highs = df["high"].to_numpy(dtype=np.float64)
+        lows = df["low"].to_numpy(dtype=np.float64)
+        closes = df["close"].to_numpy(dtype=np.float64)
+        times = df["time"].to_numpy()
+        size = len(df)
+
+        trades = []
+        busy_until = -1
+        for bar, entry, stop_loss, target in zip(
+                signals["bar"].tolist(),
+                signals["entry"].tolist(),
+                signals["stop_loss"].tolist(),
+                signals["target"].tolist()):
+            if bar <= busy_until:
+                continue
+            if market:
+                # Filled at close, the rest of the bar is before fill.
+                entry_bar = bar + 1
+                entry_price = entry * (1 + self.slippage)
+                stop_from = entry_bar + 1
+            else:
+                entry_bar = _first_hit(
+                                lows,
+                                bar + 1,
+                                min(size, bar + 1 + self.order_ttl),
+                                entry,
+                                below=True)
+                if entry_bar < 0:
+                    busy_until = min(size, bar + 1 + self.order_ttl) - 1
+                    continue
+                # Gap below limit price fills at open.
+                entry_price = (min(opens[entry_bar], entry)
+                               * (1 + self.slippage))
+                stop_from = entry_bar
+
+            # Target is not trusted in the fill bar, its high could be
+            # reached before the fill.
+            stop_bar = _first_hit(lows, stop_from, size, stop_loss, True)
+            target_bar = _first_hit(highs, entry_bar + 1, size, target, False)
+            if stop_bar >= 0 and (target_bar < 0 or stop_bar <= target_bar):
+                exit_bar, reason = stop_bar, "stop"
+                exit_price = stop_loss
+                if exit_bar > entry_bar:
+                    exit_price = min(opens[exit_bar], stop_loss)
+            elif target_bar >= 0:
+                exit_bar, reason = target_bar, "target"
+                exit_price = max(opens[exit_bar], target)
+            else:
+                exit_bar, reason = size - 1, "end"
+                exit_price = closes[-1]
+            exit_price *= 1 - self.slippage
+
+            quantity = self.stake / entry_price
+            fees = self.fee * quantity * (entry_price + exit_price)
+            pnl = quantity * (exit_price - entry_price) - fees
+            trades.append((
+                contract,
+                bar,
+                entry_bar,
+                times[entry_bar],
+                entry_price,
+                stop_loss,
+                target,
+                exit_bar,
+                times[exit_bar],
+                exit_price,
+                reason,
+                exit_bar - entry_bar + 1,
+                quantity,
+                fees,
+                pnl,
+                pnl / self.stake))
+            busy_until = exit_bar
+        return DataFrame(trades, columns=TRADE_COLUMNS)
+
+    def metrics(self, trades: DataFrame, bars: int) -> dict:
+        """Performance metrics of trade log.
+
+        Params:
+            trades(DataFrame): Trade log.
+            bars(int): Number of backtested bars of all contracts.
+
+        Returns:
+            dict: Trades count, P&L, win rate, profit factor (inf
+                without losses, 0.0 without gains), maximum drawdown
+                and exposure (fraction of bars in position).
+        """
+        pnl = trades.sort_values("exit_time")["pnl"].to_numpy()
+        equity = self.capital + np.cumsum(pnl)
+        peaks = np.maximum.accumulate(np.r_[self.capital, equity])[1:]
+        drawdown = peaks - equity
+        gains = pnl[pnl > 0].sum()
+        losses = -pnl[pnl < 0].sum()
+        return {
+            "trades": len(pnl),
+            "pnl": float(pnl.sum()),
+            "fees": float(trades["fees"].sum()),
+            "win_rate": float((pnl > 0).mean()) if len(pnl) else 0.0,
+            "profit_factor": (
+                float(gains / losses) if losses
+                else np.inf if gains > 0 else 0.0),
+            "max_drawdown": float(drawdown.max()) if len(pnl) else 0.0,
+            "max_drawdown_pct": (
+                float((drawdown / peaks).max()) if len(pnl) else 0.0),
+            "exposure": (
+                float(trades["bars_held"].sum() / bars) if bars else 0.0),
+        }
+
+    def run(
+        self,
+        strategy: Strategy,
+        df: DataFrame,
+        contract: str = ""
+    ) -> BacktestResult:
+        """Backtest strategy on candles of one contract.
+
+        Params:
+            strategy(Strategy): Strategy with live_data.
+            df(DataFrame): Historical candles. Missing required
+                indicators are added to a copy.
+            contract(str): Currency pair for trade log (default "")
+
+        Returns:
+            BacktestResult: Trade log and metrics.
+        """
+        df = df.copy(deep=False)
+        add_required_indicators(df, strategy)
+        trades = self.simulate(
+                    self.signals(strategy, df),
+                    df,
+                    contract,
+                    getattr(strategy, "market_order", False))
+        return BacktestResult(trades, self.metrics(trades, len(df)))
+
+    def run_all(
+        self,
+        strategy: Strategy,
+        data: Dict[str, DataFrame]
+    ) -> BacktestResult:
+        """Backtest strategy on candles of many contracts. Metrics are
+        computed from all trades ordered by exit time.
+
+        Params:
+            strategy(Strategy): Strategy with live_data.
+            data(dict): Contract to historical candles mapping.
+                Missing required indicators are added to copies.
+
+        Returns:
+            BacktestResult: Trade log of all contracts and metrics.
+        """
+        market = getattr(strategy, "market_order", False)
+        logs = []
+        for contract, df in data.items():
+            df = df.copy(deep=False)
+            add_required_indicators(df, strategy)
+            logs.append(self.simulate(
+                self.signals(strategy, df), df, contract, market))
+        trades = (pd.concat(logs, ignore_index=True) if logs
+                  else DataFrame(columns=TRADE_COLUMNS))
+        bars = sum(len(df) for df in data.values())
+        return BacktestResult(trades, self.metrics(trades, bars))
@@ -1,15 +1,26 @@
-import datetime
 import logging
+import threading
 import time
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pandas import DataFrame
+from typing import Dict, Iterator, List, NamedTuple, Set, Tuple, Union
 
-from gateio_utils import ExchangeApi, Interval
+from candle_scheduler import CandleScheduler
+from candles import empty_columns, resample_columns
+from gateio_utils import INTERVAL_SECONDS, ExchangeApi, Interval
+from indicator_graph import IndicatorGraph
 from indicators import Indicators
+from market_stream import MarketStream
+from order_execution import OrderExecutor
+from paper_trading import PaperTrader
 from plot_data import PlotData
+from signal_journal import SignalJournal
 from strategy_hammer import StrategyHammer
 from live_data import LiveData
-from strategy import Strategy
+from strategy import Signal, Strategy
+from strategy_runner import StrategyRunner
+from streaming_indicators import IndicatorEngine, make_indicator
 
 
 log_format = "%(asctime)s: %(message)s"
@@ -23,26 +34,142 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+class SharedFetch(NamedTuple):
+    """Download of bot base interval candles shared by all intervals
+    scanned at the same candle close."""
+
+    slot: int
+    done: threading.Event
+    failed: Set[str]
+
+
 class Bot():
     """Main class for automated trading.
     
     Attributes:
         exchange_api(ExchangeApi): API to exchange.
-        limit(int): Last number of candles to download
+        limit(int): Number of candles downloaded on warmup and kept
+            per contract
         contract_list(list): List of contracts.
         live_data(LiveData): Object storing real time downoaded
             charts data.
+        max_workers(int): Maximum number of concurrent candle requests.
+        executor(ThreadPoolExecutor): Pool used to fetch contracts
+            in parallel.
+        indicator_executor(ThreadPoolExecutor): Pool computing
+            independent indicators in parallel.
+        strategy_executor(ThreadPoolExecutor): Pool evaluating
+            strategies on contracts in parallel.
+        plot(bool): If found setups should be plotted.
+        stream(bool): If candles are received from market stream.
+        market_stream(MarketStream): Push based candles feed, started
+            with start_market_stream().
+        journal(SignalJournal): Durable store of found signals.
+        paper_trader(PaperTrader): Simulates orders of found signals.
+        order_executor(OrderExecutor): Places orders of found signals.
+        settle_delay(float): Seconds scan waits after candle close.
+        intervals(list): Scanned intervals.
+        base_interval(str): The shortest scanned interval. Only its
+            candles are downloaded, longer intervals are resampled
+            from them.
     
     Methods:
     start():
         Starts automated trading.
-    strategy_exec():
-        Strategy execution."""
+    schedule(scheduler):
+        Add strategy scans of scanned intervals to scheduler.
+    start_market_stream(interval):
+        Keep live data up to date with market stream.
+    fetch_candles(interval):
+        Download candles for all contracts concurrently.
+    source_interval(interval):
+        Interval downloaded to get candles of interval.
+    strategy_exec(indicators, strategy, interval):
+        Strategy execution.
+    strategy_exec_panel(indicators, strategy, interval):
+        Strategy execution with indicators of all contracts computed
+        at once.
+    strategy_exec_signals(indicators, strategy, interval):
+        Evaluate strategies on all contracts concurrently."""
 
-    def __init__(self) -> None:
-        self.exchange_api = ExchangeApi()
-        self.live_data = LiveData()
+    def __init__(
+        self,
+        max_workers: int = 8,
+        exchange_api: ExchangeApi = None,
+        plot: bool = True,
+        stream: bool = False,
+        journal: SignalJournal = None,
+        paper_trader: PaperTrader = None,
+        order_executor: OrderExecutor = None,
+        settle_delay: float = 1.0,
+        intervals: List[str] = None
+    ) -> None:
+        """Params:
+            max_workers(int): Maximum number of concurrent candle
+                requests. Use 1 to fetch contracts one after another
+                (default 8)
+            exchange_api(ExchangeApi): API to exchange. None uses
+                process-wide ExchangeApi.shared() (default None)
+            plot(bool): If found setups should be plotted
+                (default True)
+            stream(bool): If candles are received from market stream
+                instead of polling REST API (default False)
+            journal(SignalJournal): Durable store of found signals.
+                None keeps them in log only (default None)
+            paper_trader(PaperTrader): Simulates orders of found
+                signals against received candles. None disables paper
+                trading (default None)
+            order_executor(OrderExecutor): Places exchange orders of
+                found signals in background. None only logs them
+                (default None)
+            settle_delay(float): Seconds scan waits after candle close,
+                so exchange publishes closed candle (default 1.0)
+            intervals(list): Scanned intervals, multiples of the
+                shortest one and up to 1d. None scans 5m
+                (default None)"""
+        if exchange_api is None:
+            exchange_api = ExchangeApi.shared()
+        self.exchange_api = exchange_api
+        self.plot = plot
+        self.stream = stream
+        self.market_stream = None
+        self.journal = journal
+        self.paper_trader = paper_trader
+        self.order_executor = order_executor
+        self.settle_delay = settle_delay
+        self.intervals = list(intervals or [Interval.INT_5M])
+        self.base_interval = min(self.intervals, key=INTERVAL_SECONDS.get)
+        base_seconds = INTERVAL_SECONDS[self.base_interval]
+        for interval in self.intervals:
+            seconds = INTERVAL_SECONDS[interval]
+            if (seconds % base_seconds
+                    or seconds > INTERVAL_SECONDS[Interval.INT_1D]):
+                raise ValueError("Interval '{}' can not be resampled from "
+                    "'{}'".format(interval, self.base_interval))
         self.limit = 40 
+        # Base candles cover limit candles of the longest interval,
+        # first of them complete.
+        ratio = max(
+                    INTERVAL_SECONDS[interval] // base_seconds
+                    for interval in self.intervals)
+        self.live_data = LiveData(
+                            capacity=self.limit,
+                            capacities={
+                                self.base_interval:
+                                    (self.limit + 1) * ratio - 1,
+                            })
+        self._fetch_lock = threading.Lock()
+        self._fetches: Dict[str, SharedFetch] = {}
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(
+                            max_workers=max_workers,
+                            thread_name_prefix="candle_fetch")
+        self.indicator_executor = ThreadPoolExecutor(
+                                    max_workers=4,
+                                    thread_name_prefix="indicators")
+        self.strategy_executor = ThreadPoolExecutor(
+                                    max_workers=4,
+                                    thread_name_prefix="strategies")
         self.contract_list = [
             "BTC_USDT",
             "ETH_USDT",
@@ -57,67 +184,495 @@ class Bot():
             "SHIB_USDT"
         ]
 
+    def fetch_candles(self, interval: str) -> Iterator[Tuple[str, dict]]:
+        """Download candles for all contracts concurrently. Results are
+        yielded in completion order, so the caller can process each
+        contract as soon as its data arrives. Only candles missing in
+        live data are downloaded. Candles of scanned intervals are
+        resampled from base interval candles, downloaded and stored
+        once per base candle for all intervals.
+
+        Params:
+            interval(str): Interval for downloading data.
+
+        Yields:
+            tuple: Contract name and columnar candles (None on failure).
+        """
+        source = self.source_interval(interval)
+        if interval not in self.intervals:
+            yield from self._download_candles(interval)
+            return
+
+        seconds = INTERVAL_SECONDS[interval]
+        for contract_pair, candles in self._fetch_shared(source):
+            if candles is not None and source != interval:
+                with self.live_data.lock:
+                    candles = resample_columns(
+                                self.live_data.buffer(
+                                    contract_pair, source).columns(),
+                                seconds)
+            yield contract_pair, candles
+
+    def source_interval(self, interval: str) -> str:
+        """Interval downloaded to get candles of interval.
+
+        Params:
+            interval(str): Candles interval.
+
+        Returns:
+            str: Base interval for scanned intervals, interval itself
+                otherwise.
+        """
+        if interval in self.intervals:
+            return self.base_interval
+        return interval
+
+    def _fetch_shared(self, source: str) -> Iterator[Tuple[str, dict]]:
+        """Download and store candles of source interval, once after
+        every its candle close. Concurrent and later callers of the
+        same candle wait for the first one and read stored candles.
+
+        Params:
+            source(str): Downloaded interval.
+
+        Yields:
+            tuple: Contract name and empty columnar candles, stored
+                ones are in live data (None on failure).
+        """
+        slot = int(time.time()) // INTERVAL_SECONDS[source]
+        with self._fetch_lock:
+            fetch = self._fetches.get(source)
+            owner = fetch is None or fetch.slot != slot
+            if owner:
+                fetch = SharedFetch(slot, threading.Event(), set())
+                self._fetches[source] = fetch
+
+        if not owner:
+            fetch.done.wait()
+            for contract_pair in self.contract_list:
+                if contract_pair in fetch.failed:
+                    yield contract_pair, None
+                else:
+                    yield contract_pair, empty_columns()
+            return
+
+        complete = False
+        try:
+            for contract_pair, candles in self._download_candles(source):
+                if candles is None:
+                    fetch.failed.add(contract_pair)
+                else:
+                    self._store_candles(contract_pair, source, candles)
+                    candles = empty_columns()
+                yield contract_pair, candles
+            complete = True
+        finally:
+            if not complete:
+                # Abandoned download is not reused.
+                with self._fetch_lock:
+                    if self._fetches.get(source) is fetch:
+                        del self._fetches[source]
+            fetch.done.set()
+
+    def _download_candles(self, interval: str) -> Iterator[Tuple[str, dict]]:
+        """Download candles missing in live data for all contracts
+        concurrently, yielded in completion order. Contracts streamed
+        at interval are not downloaded.
+
+        Params:
+            interval(str): Interval for downloading data.
+
+        Yields:
+            tuple: Contract name and columnar candles, empty for
+                streamed contracts (None on failure).
+        """
+        streamed = []
+        if self.market_stream is not None:
+            streamed = [
+                contract_pair
+                for contract_pair in self.contract_list
+                if self.market_stream.is_subscribed(contract_pair, interval)
+            ]
+        # Live data of subscribed candles is kept up to date by market
+        # stream, the rest is polled.
+        for contract_pair in streamed:
+            yield contract_pair, empty_columns()
+
+        futures = {
+            self.executor.submit(
+                self.exchange_api.get_candle_stick,
+                contract=contract_pair,
+                interval=interval,
+                limit=self.live_data.fetch_limit(contract_pair, interval),
+                columnar=True): contract_pair
+            for contract_pair in self.contract_list
+            if contract_pair not in streamed
+        }
+        for future in as_completed(futures):
+            contract_pair = futures[future]
+            try:
+                yield contract_pair, future.result()
+            except Exception as ex:
+                logger.error(
+                    "Fetching candles for '{}' failed: {}"
+                    .format(contract_pair, ex))
+                yield contract_pair, None
+
     def strategy_exec(
         self,
         indicators: Indicators,
-        strategy: Strategy,
+        strategy: Union[Strategy, List[Strategy]],
         interval: str
     ) -> None:
-        """Strategy execution.
+        """Strategy execution. Indicators required by strategies are
+        computed once per contract.
 
         Params:
             indicators(Indicators): Object to add chart indicators.
-            strategy(Strategy): Object of strategy to execute.
+            strategy(Strategy): Object of strategy to execute or list
+                of strategies.
             interval(str): Interval for downloading data.
         """
         logger.debug("Strategy execution start")
+        strategies = self._strategies(strategy)
+        graph = IndicatorGraph(strategies)
+        for contract_pair, candles in self.fetch_candles(interval):
+            if candles is None:
+                logger.warning("No data for '{}'".format(contract_pair))
+                continue
+            self.live_data.pair_info = self.exchange_api.get_pair_info(
+                                            contract_pair)
+            # Market stream could update buffers while strategy reads them.
+            with self.live_data.lock:
+                self._store_candles(contract_pair, interval, candles)
+                self.live_data.df = self.live_data.view(
+                                        contract_pair, interval)
+                if self.live_data.df.empty:
+                    logger.warning("No data for '{}'".format(contract_pair))
+                    continue
+                graph.add_to(
+                    indicators,
+                    self.live_data.df,
+                    contract_pair,
+                    interval,
+                    self.indicator_executor)
+                for strategy in strategies:
+                    strategy.start()
+
+            for strategy in strategies:
+                self._report_setup(
+                    contract_pair, strategy, self.live_data.df, interval)
+
+        logger.debug(
+            "Strategy execution end. Requests: {} Indicators cache: {}"
+            .format(
+                self.exchange_api.get_request_metrics(),
+                indicators.cache.metrics()))
+
+    def strategy_exec_panel(
+        self,
+        indicators: Indicators,
+        strategy: Union[Strategy, List[Strategy]],
+        interval: str
+    ) -> None:
+        """Strategy execution of all contracts at once. Candles of all
+        contracts are downloaded first, then indicators of the whole
+        universe are computed in one vectorized pass.
+
+        Params:
+            indicators(Indicators): Object to add chart indicators.
+            strategy(Strategy): Object of strategy to execute or list
+                of strategies.
+            interval(str): Interval for downloading data.
+        """
+        logger.debug("Panel strategy execution start")
+        strategies = self._strategies(strategy)
+        graph = IndicatorGraph(strategies)
+        contracts = []
+        for contract_pair, candles in self.fetch_candles(interval):
+            if candles is None:
+                logger.warning("No data for '{}'".format(contract_pair))
+                continue
+            self._store_candles(contract_pair, interval, candles)
+            contracts.append(contract_pair)
+        # Keep execution order independent of download order.
+        contracts.sort(key=self.contract_list.index)
+
+        with self.live_data.lock:
+            panel = self.live_data.panel(contracts, interval)
+            columns = graph.compute_panel(
+                        indicators, panel, self.indicator_executor)
+            for row, contract_pair in enumerate(contracts):
+                self.live_data.pair_info = self.exchange_api.get_pair_info(
+                                                contract_pair)
+                self.live_data.df = self.live_data.view(
+                                        contract_pair, interval)
+                size = len(self.live_data.df)
+                if not size:
+                    logger.warning("No data for '{}'".format(contract_pair))
+                    continue
+                for name, values in columns.items():
+                    self.live_data.df[name] = values[row, -size:]
+
+                for strategy in strategies:
+                    strategy.start()
+                    self._report_setup(
+                        contract_pair, strategy, self.live_data.df, interval)
+
+        logger.debug(
+            "Panel strategy execution end. Requests: {}".format(
+                self.exchange_api.get_request_metrics()))
+
+    def strategy_exec_signals(
+        self,
+        indicators: Indicators,
+        strategy: Union[Strategy, List[Strategy]],
+        interval: str
+    ) -> List[Signal]:
+        """Evaluate strategies on all contracts concurrently. Every
+        contract gets its own DataFrame with indicators, strategies
+        only read it and return signals, shared live_data.df is not
+        used.
+
+        Params:
+            indicators(Indicators): Object to add chart indicators.
+            strategy(Strategy): Object of strategy to execute or list
+                of strategies.
+            interval(str): Interval for downloading data.
+
+        Returns:
+            list: Found signals ordered by contract, then strategy.
+        """
+        logger.debug("Signals strategy execution start")
+        strategies = self._strategies(strategy)
+        graph = IndicatorGraph(strategies)
+        runner = StrategyRunner(strategies, self.strategy_executor)
+        contracts = []
+        for contract_pair, candles in self.fetch_candles(interval):
+            if candles is None:
+                logger.warning("No data for '{}'".format(contract_pair))
+                continue
+            self._store_candles(contract_pair, interval, candles)
+            contracts.append(contract_pair)
+        contracts.sort(key=self.contract_list.index)
+
+        views = {}
+        # Views share memory with buffers, keep them unchanged until
+        # all strategies are evaluated.
+        with self.live_data.lock:
+            for contract_pair in contracts:
+                df = self.live_data.view(contract_pair, interval)
+                if df.empty:
+                    logger.warning("No data for '{}'".format(contract_pair))
+                    continue
+                graph.add_to(
+                    indicators,
+                    df,
+                    contract_pair,
+                    interval,
+                    self.indicator_executor)
+                views[contract_pair] = df
+            signals = runner.run(views)
+
+        by_name = {strategy.name: strategy for strategy in strategies}
+        for signal in signals:
+            logger.debug("{} '{}' entry '{}' stop loss: '{}' target: '{}'"
+                .format(
+                    signal.strategy,
+                    signal.contract,
+                    signal.entry,
+                    signal.stop_loss,
+                    signal.target))
+            self._record_signal(
+                signal,
+                interval,
+                by_name[signal.strategy],
+                views[signal.contract])
+            if self.plot:
+                self._plot_setup(
+                    signal.contract,
+                    by_name[signal.strategy],
+                    views[signal.contract])
+
+        logger.debug(
+            "Signals strategy execution end. Signals: {}".format(
+                len(signals)))
+        return signals
+
+    @staticmethod
+    def _strategies(strategy: Union[Strategy, List[Strategy]]) -> list:
+        if isinstance(strategy, (list, tuple)):
+            return list(strategy)
+        return [strategy]
+
+    def _report_setup(
+        self,
+        contract_pair: str,
+        strategy: Strategy,
+        df: DataFrame,
+        interval: str
+    ) -> None:
+        """Log, record and plot found setup, then clear strategy for
+        the next contract.
+
+        Params:
+            contract_pair(str): Currency pair.
+            strategy(Strategy): Executed strategy.
+            df(DataFrame): Data of contract with indicators.
+            interval(str): Candles interval.
+        """
+        if strategy.is_setup_ready():
+            logger.debug("'{}' entry '{}' stop loss: '{}' target: '{}'"
+                .format(
+                    contract_pair,
+                    strategy.entry,
+                    strategy.stop_loss,
+                    strategy.target))
+
+            self._record_signal(
+                Signal(
+                    strategy.name,
+                    contract_pair,
+                    int(df["time"].iloc[-2]),
+                    float(strategy.entry),
+                    float(strategy.stop_loss),
+                    float(strategy.target)),
+                interval,
+                strategy,
+                df)
+            if self.plot:
+                self._plot_setup(contract_pair, strategy, df)
+            strategy.clear()
+        else:
+            logger.debug("Setup not found '{}'".format(contract_pair))
+            # if contract_pair == "BTC_USDT":
+            #     PlotData.plot_ohlc(df, contract_pair, True)
+
+    def _store_candles(
+        self,
+        contract_pair: str,
+        interval: str,
+        candles: dict
+    ) -> None:
+        """Store downloaded candles in live data and fill paper orders
+        against them.
+
+        Params:
+            contract_pair(str): Currency pair.
+            interval(str): Candles interval.
+            candles(dict): Columnar candles.
+        """
+        self.live_data.update(contract_pair, interval, candles)
+        if self.paper_trader is not None:
+            self.paper_trader.on_candles(contract_pair, interval, candles)
+
+    def _record_signal(
+        self,
+        signal: Signal,
+        interval: str,
+        strategy: Strategy,
+        df: DataFrame
+    ) -> None:
+        """Place paper and exchange order of signal and store signal
+        with values of indicators required by strategy on signal
+        candle.
+
+        Params:
+            signal(Signal): Found signal.
+            interval(str): Candles interval.
+            strategy(Strategy): Strategy which found signal.
+            df(DataFrame): Data of contract with indicators.
+        """
+        market = getattr(strategy, "market_order", False)
+        if self.order_executor is not None:
+            # Placed in background, result is logged by executor.
+            self.order_executor.submit(signal, interval, market=market)
+        if self.paper_trader is not None:
+            try:
+                self.paper_trader.submit(signal, interval, market=market)
+            except Exception as ex:
+                logger.error("Paper order of '{}' failed: {}".format(
+                    signal.contract, ex))
+        if self.journal is None:
+            return
+        columns = [
+            column
+            for spec in sorted(strategy.required_indicators)
+            for column in make_indicator(spec).columns
+        ]
+        try:
+            self.journal.append(
+                signal,
+                interval,
+                {column: float(df[column].iloc[-2]) for column in columns})
+        except (OSError, ValueError) as ex:
+            logger.error("Journaling signal of '{}' failed: {}".format(
+                signal.contract, ex))
+
+    @staticmethod
+    def _plot_setup(
+        contract_pair: str,
+        strategy: Strategy,
+        df: DataFrame
+    ) -> None:
+        required = [
+            make_indicator(spec)
+            for spec in sorted(strategy.required_indicators)
+        ]
+        lines = [i.columns[0] for i in required if i.overlay]
+        PlotData.plot_ohlc(df, contract_pair, lines=lines)
+
+    def start_market_stream(self, interval: str) -> None:
+        """Keep live data of all contracts up to date with market
+        stream. Until stream is connected candles are polled.
+
+        Params:
+            interval(str): Interval of received candles.
+        """
+        self.market_stream = MarketStream(self.exchange_api, self.live_data)
         for contract_pair in self.contract_list:
-            self.live_data.df = DataFrame(
-                                    self.exchange_api.get_candle_stick(
-                                    contract=contract_pair,
-                                    interval=interval,
-                                    limit=self.limit))
-            indicators.add_atr(self.live_data.df)
-            # Add EMA 20 for hammer strategy
-            indicators.add_ema(self.live_data.df, 20)
-
-            strategy.start()
-
-            if strategy.is_setup_ready():
-                logger.debug("'{}' entry '{}' stop loss: '{}' target: '{}'"
-                    .format(
-                        contract_pair,
-                        strategy.entry,
-                        strategy.stop_loss,
-                        strategy.target))
-
-                PlotData.plot_ohlc(self.live_data.df, contract_pair, True)
-                strategy.clear()
-            else:
-                logger.debug("Setup not found '{}'".format(contract_pair))
-                # if contract_pair == "BTC_USDT":
-                #     PlotData.plot_ohlc(self.live_data.df, contract_pair, True)
-
-        logger.debug("Strategy execution end")
+            self.market_stream.subscribe_candles(contract_pair, interval)
+        if self.paper_trader is not None:
+            self.market_stream.add_candle_listener(
+                self.paper_trader.on_candles)
+        self.market_stream.start()
 
     def start(self):
-        """Starts automated trading."""
+        """Starts automated trading. Strategies are executed after every
+        candle close, waiting settle delay."""
 
         logger.debug("Automated trading bot start!")
+        self.exchange_api.pairs.start_background_refresh()
+        if self.stream:
+            self.start_market_stream(self.base_interval)
+
+        scheduler = CandleScheduler(settle_delay=self.settle_delay)
+        self.schedule(scheduler)
+        scheduler.run_forever()
 
-        indicators = Indicators()
-        strategy_hammer = StrategyHammer(self.live_data)
+    def schedule(self, scheduler: CandleScheduler) -> None:
+        """Add strategy scan of every scanned interval to scheduler.
 
-        now = datetime.datetime.now()
-        while True:
-            while now.minute % 5 or now.second > 2:
-                time.sleep(1)
-                now = datetime.datetime.now()
-            self.strategy_exec(indicators, strategy_hammer, Interval.INT_5M)
-            now = datetime.datetime.now()        
+        Params:
+            scheduler(CandleScheduler): Scheduler running scans after
+                candle closes.
+        """
+        # Indicator history covers every buffered candle.
+        indicators = Indicators(engine=IndicatorEngine(max(
+                        [self.live_data.capacity]
+                        + list(self.live_data.capacities.values()))))
+        for interval in self.intervals:
+            strategy = StrategyHammer(self.live_data)
+            # Intervals run concurrently, so strategies only evaluate
+            # own views of data.
+            scheduler.add_job(
+                interval,
+                lambda interval, close_time, strategy=strategy:
+                    self.strategy_exec_signals(
+                        indicators, strategy, interval))
 
 
 if __name__ == '__main__':
-    bot = Bot()
+    bot = Bot(journal=SignalJournal("signals"))
     bot.start()
 
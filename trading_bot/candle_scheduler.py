@@ -0,0 +1,259 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+
+from concurrent.futures import Executor, ThreadPoolExecutor
+from gateio_utils import INTERVAL_SECONDS
+from typing import Awaitable, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+def next_close(now: float, interval_seconds: float) -> float:
+    """Close time of the candle forming at now. Candles are aligned to
+    epoch, same as exchange candles.
+
+    Params:
+        now(float): Epoch seconds.
+        interval_seconds(float): Length of one candle in seconds.
+
+    Returns:
+        float: Epoch seconds of the next candle close after now.
+    """
+    return (math.floor(now / interval_seconds) + 1) * interval_seconds
+
+
+class ScheduledJob:
+    """Job run at every candle close of its interval.
+
+    Attributes:
+        interval(str): Candles interval.
+        func(Callable): Called with interval and close time.
+        interval_seconds(float): Length of one candle in seconds.
+        running(bool): If the previous run is not finished yet.
+        runs(int): Started runs.
+        failed(int): Runs which raised exception.
+        skipped(int): Slots skipped as previous run was still running.
+        missed(int): Slots passed while scheduler was not able to wake.
+        last_drift(float): Seconds scheduler woke after planned time.
+        max_drift(float): Maximum drift.
+        last_duration(float): Seconds the last finished run took.
+    """
+
+    def __init__(
+        self,
+        interval: str,
+        func: Callable[[str, float], None],
+        interval_seconds: float
+    ) -> None:
+        self.interval = interval
+        self.func = func
+        self.interval_seconds = interval_seconds
+        self.running = False
+        self.runs = 0
+        self.failed = 0
+        self.skipped = 0
+        self.missed = 0
+        self.last_drift = 0.0
+        self.max_drift = 0.0
+        self.last_duration = None
+
+
+class CandleScheduler:
+    """Runs jobs right after candle close of their intervals. Event
+    loop sleeps until the next close plus settle delay, which gives
+    exchange time to publish closed candle, instead of polling the
+    clock. Jobs run on thread pool, so slow job does not delay other
+    intervals. Slot is skipped if the previous run of the same job is
+    still running and slots passed while loop was blocked are counted
+    as missed.
+
+    Attributes:
+        settle_delay(float): Seconds waited after candle close.
+        intervals(dict): Interval name to candle seconds.
+        clock(Callable): Returns current epoch time.
+        sleep(Callable): Coroutine function waiting given seconds.
+        executor(Executor): Runs jobs.
+        jobs(list): Scheduled jobs.
+
+    Methods:
+    add_job(interval, func):
+        Run func at every candle close of interval.
+    run():
+        Coroutine running jobs until stopped.
+    run_forever():
+        Run jobs in this thread.
+    start():
+        Run in background thread.
+    stop():
+        Stop scheduler.
+    metrics():
+        Runs, skipped and missed slots and drift of jobs.
+    """
+
+    def __init__(
+        self,
+        settle_delay: float = 1.0,
+        intervals: Dict[str, float] = None,
+        clock: Callable[[], float] = time.time,
+        executor: Executor = None,
+        sleep: Callable[[float], Awaitable] = asyncio.sleep
+    ) -> None:
+        """Params:
+            settle_delay(float): Seconds waited after candle close
+                (default 1.0)
+            intervals(dict): Interval name to candle seconds
+                (default INTERVAL_SECONDS)
+            clock(Callable): Returns current epoch time
+                (default time.time)
+            executor(Executor): Runs jobs. None creates thread pool
+                with one worker per job (default None)
+            sleep(Callable): Coroutine function waiting given seconds,
+                f.e. virtual time of tests together with clock
+                (default asyncio.sleep)"""
+        self.settle_delay = settle_delay
+        self.intervals = dict(
+            INTERVAL_SECONDS if intervals is None else intervals)
+        self.clock = clock
+        self.sleep = sleep
+        self.executor = executor
+        self.jobs: List[ScheduledJob] = []
+        self._lock = threading.Lock()
+        self._loop = None
+        self._task = None
+        self._thread = None
+
+    def add_job(self, interval: str, func: Callable[[str, float], None]) -> None:
+        """Run func(interval, close_time) at every candle close of
+        interval, close time in epoch seconds. One job per interval,
+        takes effect on next start.
+
+        Params:
+            interval(str): Candles interval.
+            func(Callable): Job, f.e. strategy scan.
+        """
+        if any(job.interval == interval for job in self.jobs):
+            raise ValueError("Job of '{}' is already scheduled".format(
+                interval))
+        self.jobs.append(
+            ScheduledJob(interval, func, self.intervals[interval]))
+
+    async def run(self) -> None:
+        """Run jobs at candle closes until cancelled."""
+        executor = self.executor
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                            max_workers=max(1, len(self.jobs)),
+                            thread_name_prefix="scheduled_jobs")
+        try:
+            await asyncio.gather(*[
+                self._run_job(job, executor) for job in self.jobs])
+        finally:
+            if self.executor is None:
+                executor.shutdown(wait=False)
+
+    async def _run_job(self, job: ScheduledJob, executor: Executor) -> None:
+        loop = asyncio.get_running_loop()
+        # Candles since epoch, close time is not accumulated from
+        # float sums.
+        slot = math.floor(self.clock() / job.interval_seconds) + 1
+        while True:
+            wake = slot * job.interval_seconds + self.settle_delay
+            now = self.clock()
+            while now < wake:
+                # Sleep may end early by clock resolution, sleep again.
+                await self.sleep(wake - now)
+                now = self.clock()
+
+            missed = int((now - wake) // job.interval_seconds)
+            if missed:
+                # Loop was blocked, run only for the latest close.
+                slot += missed
+                logger.warning("Missed {} '{}' slots".format(
+                    missed, job.interval))
+            close = slot * job.interval_seconds
+            drift = now - close - self.settle_delay
+            with self._lock:
+                job.missed += missed
+                job.last_drift = drift
+                job.max_drift = max(job.max_drift, drift)
+                running = job.running
+                if running:
+                    job.skipped += 1
+                else:
+                    job.running = True
+                    job.runs += 1
+            if running:
+                logger.warning("Skipped '{}' slot {}, previous run "
+                    "is still running".format(job.interval, close))
+            else:
+                # Not awaited, so slots are tracked while job runs.
+                loop.run_in_executor(executor, self._execute, job, close)
+            slot += 1
+
+    def _execute(self, job: ScheduledJob, close: float) -> None:
+        start = time.monotonic()
+        try:
+            job.func(job.interval, close)
+        except Exception:
+            with self._lock:
+                job.failed += 1
+            logger.exception("Scheduled '{}' job failed".format(
+                job.interval))
+        finally:
+            with self._lock:
+                job.running = False
+                job.last_duration = time.monotonic() - start
+
+    def run_forever(self) -> None:
+        """Run jobs in this thread until interrupted."""
+        asyncio.run(self.run())
+
+    def start(self) -> None:
+        """Run in background daemon thread with own event loop."""
+        self._loop = asyncio.new_event_loop()
+        self._task = self._loop.create_task(self.run())
+        self._thread = threading.Thread(
+                            target=self._run_loop,
+                            name="candle_scheduler",
+                            daemon=True)
+        self._thread.start()
+
+    def _run_loop(self) -> None:
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+
+    def stop(self) -> None:
+        """Stop background thread. Running jobs are not interrupted."""
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._task.cancel)
+        self._thread.join()
+        self._thread = None
+
+    def metrics(self) -> dict:
+        """Runs, skipped and missed slots and drift of jobs.
+
+        Returns:
+            dict: Interval to snapshot of job counters.
+        """
+        with self._lock:
+            return {
+                job.interval: {
+                    "running": job.running,
+                    "runs": job.runs,
+                    "failed": job.failed,
+                    "skipped": job.skipped,
+                    "missed": job.missed,
+                    "last_drift": job.last_drift,
+                    "max_drift": job.max_drift,
+                    "last_duration": job.last_duration,
+                }
+                for job in self.jobs
+            }
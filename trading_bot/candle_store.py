@@ -0,0 +1,260 @@
+import logging
+import os
+import shutil
+import threading
+import uuid
+import numpy as np
+
+from candles import CANDLE_FIELDS, empty_columns, merge_columns
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CandleStore:
+    """Persistent columnar store of historical candles. Candles are kept
+    per contract and interval in segments. Segment is a directory named
+    by the [start, end) epoch range it covers, with one .npy file per
+    field. Reads are memory mapped. Reads, writes and compaction of
+    one contract and interval hold its lock from listing segments until
+    they are opened or replaced, so no segment is deleted under reader.
+    Compaction is not done on reads, call compact() or compact_all()
+    explicitly, f.e. periodically.
+
+    Attributes:
+        root(str): Store directory.
+
+    Methods:
+    segments(contract, interval):
+        Time ranges covered by stored segments.
+    missing_ranges(contract, interval, start, end):
+        Parts of time range not covered by the store.
+    write(contract, interval, start, end, columns):
+        Store candles covering time range.
+    read(contract, interval, start, end):
+        Read stored candles from time range.
+    compact(contract, interval):
+        Merge adjacent segments into one.
+    compact_all():
+        Compact segments of all contracts and intervals.
+    """
+
+    def __init__(self, root: str) -> None:
+        """Params:
+            root(str): Store directory, created if missing."""
+        self.root = root
+        self._lock = threading.Lock()
+        self._locks: Dict[Tuple[str, str], threading.RLock] = {}
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, contract: str, interval: str) -> str:
+        return os.path.join(self.root, contract, interval)
+
+    def _key_lock(self, contract: str, interval: str) -> threading.RLock:
+        with self._lock:
+            key = (contract, interval)
+            if key not in self._locks:
+                self._locks[key] = threading.RLock()
+            return self._locks[key]
+
+    def segments(self, contract: str, interval: str) -> List[Tuple[int, int]]:
+        """Time ranges covered by stored segments.
+
+        Params:
+            contract(str): Currency pair.
+            interval(str): Candles interval.
+
+        Returns:
+            list: Sorted [start, end) epoch seconds pairs.
+        """
+        path = self._path(contract, interval)
+        if not os.path.isdir(path):
+            return []
+        ranges = []
+        for name in os.listdir(path):
+            start, sep, end = name.partition("_")
+            if sep and start.isdigit() and end.isdigit():
+                ranges.append((int(start), int(end)))
+        return sorted(ranges)
+
+    def missing_ranges(
+        self,
+        contract: str,
+        interval: str,
+        start: int,
+        end: int
+    ) -> List[Tuple[int, int]]:
+        """Parts of [start, end) time range not covered by the store.
+
+        Params:
+            contract(str): Currency pair.
+            interval(str): Candles interval.
+            start(int): Range start in epoch seconds.
+            end(int): Range end in epoch seconds (exclusive).
+
+        Returns:
+            list: Sorted [start, end) epoch seconds pairs.
+        """
+        missing = []
+        position = start
+        for segment_start, segment_end in self.segments(contract, interval):
+            if segment_end <= position:
+                continue
+            if segment_start >= end:
+                break
+            if segment_start > position:
+                missing.append((position, segment_start))
+            position = max(position, segment_end)
+        if position < end:
+            missing.append((position, end))
+        return missing
+
+    def write(
+        self,
+        contract: str,
+        interval: str,
+        start: int,
+        end: int,
+        columns: Dict[str, np.ndarray]
+    ) -> None:
+        """Store candles covering [start, end) time range. Range is
+        marked as covered even if exchange has no candles in it.
+
+        Params:
+            contract(str): Currency pair.
+            interval(str): Candles interval.
+            start(int): Range start in epoch seconds.
+            end(int): Range end in epoch seconds (exclusive).
+            columns(dict): Time sorted columnar candles.
+        """
+        path = self._path(contract, interval)
+        os.makedirs(path, exist_ok=True)
+        # Segment is written to temporary directory and renamed, so
+        # readers never see partially written data.
+        tmp_path = os.path.join(path, "tmp-" + uuid.uuid4().hex)
+        os.makedirs(tmp_path)
+        inside = (columns["time"] >= start) & (columns["time"] < end)
+        for field in CANDLE_FIELDS:
+            np.save(
+                os.path.join(tmp_path, field + ".npy"),
+                np.ascontiguousarray(columns[field][inside]))
+        segment_path = os.path.join(path, "{}_{}".format(start, end))
+        with self._key_lock(contract, interval):
+            if os.path.isdir(segment_path):
+                # Replaced by compaction. Old files stay readable for
+                # already opened memory maps.
+                old_path = os.path.join(path, "tmp-" + uuid.uuid4().hex)
+                os.replace(segment_path, old_path)
+                os.replace(tmp_path, segment_path)
+                shutil.rmtree(old_path)
+            else:
+                os.replace(tmp_path, segment_path)
+        logger.debug("Stored '{}' {} candles from {} to {}".format(
+            contract, interval, start, end))
+
+    def _load(
+        self,
+        contract: str,
+        interval: str,
+        segment: Tuple[int, int]
+    ) -> Dict[str, np.ndarray]:
+        path = os.path.join(
+                self._path(contract, interval), "{}_{}".format(*segment))
+        return {
+            field: np.load(
+                    os.path.join(path, field + ".npy"), mmap_mode="r")
+            for field in CANDLE_FIELDS
+        }
+
+    def read(
+        self,
+        contract: str,
+        interval: str,
+        start: int,
+        end: int
+    ) -> Dict[str, np.ndarray]:
+        """Read stored candles from [start, end) time range. Data from
+        single segment is returned as memory mapped views, data spread
+        over many segments is merged into new arrays.
+
+        Params:
+            contract(str): Currency pair.
+            interval(str): Candles interval.
+            start(int): Range start in epoch seconds.
+            end(int): Range end in epoch seconds (exclusive).
+
+        Returns:
+            dict: Time sorted columnar candles.
+        """
+        parts = []
+        # Opened memory maps stay valid when segment is deleted later.
+        with self._key_lock(contract, interval):
+            for segment in self.segments(contract, interval):
+                if segment[1] <= start or segment[0] >= end:
+                    continue
+                columns = self._load(contract, interval, segment)
+                first, last = np.searchsorted(columns["time"], [start, end])
+                if last > first:
+                    parts.append({
+                        field: v[first:last] for field, v in columns.items()
+                    })
+
+        if not parts:
+            return empty_columns()
+        if len(parts) == 1:
+            return parts[0]
+        return merge_columns(parts)
+
+    def compact(self, contract: str, interval: str) -> int:
+        """Merge segments with adjacent or overlapping time ranges into
+        single segments.
+
+        Params:
+            contract(str): Currency pair.
+            interval(str): Candles interval.
+
+        Returns:
+            int: Number of segments after compaction.
+        """
+        with self._key_lock(contract, interval):
+            groups = []
+            group_end = None
+            for segment in self.segments(contract, interval):
+                if groups and segment[0] <= group_end:
+                    groups[-1].append(segment)
+                    group_end = max(group_end, segment[1])
+                else:
+                    groups.append([segment])
+                    group_end = segment[1]
+
+            path = self._path(contract, interval)
+            for group in groups:
+                if len(group) == 1:
+                    continue
+                start = group[0][0]
+                end = max(segment[1] for segment in group)
+                merged = merge_columns([
+                    self._load(contract, interval, segment)
+                    for segment in group
+                ])
+                self.write(contract, interval, start, end, merged)
+                for segment in group:
+                    if segment != (start, end):
+                        shutil.rmtree(
+                            os.path.join(path, "{}_{}".format(*segment)))
+        return len(groups)
+
+    def compact_all(self) -> int:
+        """Compact segments of all stored contracts and intervals.
+
+        Returns:
+            int: Number of segments after compaction.
+        """
+        count = 0
+        for contract in sorted(os.listdir(self.root)):
+            contract_path = os.path.join(self.root, contract)
+            if not os.path.isdir(contract_path):
+                continue
+            for interval in sorted(os.listdir(contract_path)):
+                count += self.compact(contract, interval)
+        return count
@@ -0,0 +1,143 @@
+import logging
+import numpy as np
+
+from datetime import datetime
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Order of fields in candlestick items returned by exchange.
+EXCHANGE_FIELDS = ("time", "volume", "close", "high", "low", "open")
+# Order of fields used for columnar candles.
+CANDLE_FIELDS = ("time", "open", "high", "low", "close", "volume")
+# Time format of legacy list of dictionaries candles.
+TIME_FORMAT = "%H:%M %d.%m.%y"
+
+
+def empty_columns() -> Dict[str, np.ndarray]:
+    """Creates columnar candles without any data.
+
+    Returns:
+        dict: Field name to empty array mapping.
+    """
+    columns = {"time": np.empty(0, dtype=np.int64)}
+    for field in CANDLE_FIELDS[1:]:
+        columns[field] = np.empty(0, dtype=np.float64)
+    return columns
+
+
+def decode_columns(api_response: list) -> Dict[str, np.ndarray]:
+    """Decode exchange candlestick response into contiguous arrays.
+    Whole response is parsed by NumPy in one call, without per row
+    Python objects.
+
+    Params:
+        api_response(list): Candlestick items from list_candlesticks.
+
+    Returns:
+        dict: Field name to array mapping. Time is int64 epoch
+            seconds (UTC), other fields are float64.
+    """
+    if not api_response:
+        return empty_columns()
+
+    width = len(EXCHANGE_FIELDS)
+    # Rows are transposed and copied so every field is contiguous.
+    table = np.array(
+                [item[:width] for item in api_response],
+                dtype=np.float64).T.copy()
+    columns = {}
+    for field, row in zip(EXCHANGE_FIELDS, table):
+        columns[field] = row
+    columns["time"] = columns["time"].astype(np.int64)
+    return {field: columns[field] for field in CANDLE_FIELDS}
+
+
+def columns_to_records(columns: Dict[str, np.ndarray]) -> List[dict]:
+    """Convert columnar candles into legacy list of dictionaries with
+    time formatted as string.
+
+    Params:
+        columns(dict): Field name to array mapping.
+
+    Returns:
+        list: List of dictionary items with OHLC format data.
+    """
+    response = []
+    for i, timestamp in enumerate(columns["time"].tolist()):
+        dict_item = {
+            "time": datetime.fromtimestamp(timestamp).strftime(TIME_FORMAT)
+        }
+        for field in EXCHANGE_FIELDS[1:]:
+            dict_item[field] = float(columns[field][i])
+        response.append(dict_item)
+    return response
+
+
+def merge_columns(chunks: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Merge columnar candles into one time sorted set. For duplicated
+    time the candle from later chunk is kept.
+
+    Params:
+        chunks(list): Columnar candles.
+
+    Returns:
+        dict: Field name to array mapping without duplicated time.
+    """
+    chunks = [chunk for chunk in chunks if len(chunk["time"])]
+    if not chunks:
+        return empty_columns()
+
+    merged = {
+        field: np.concatenate([chunk[field] for chunk in chunks])
+        for field in CANDLE_FIELDS
+    }
+    # Reversed so unique keeps the last occurrence of each time.
+    times = merged["time"][::-1]
+    _, first = np.unique(times, return_index=True)
+    order = len(times) - 1 - first
+    return {field: merged[field][order] for field in CANDLE_FIELDS}
+
+
+def resample_columns(
+    columns: Dict[str, np.ndarray],
+    interval_seconds: int
+) -> Dict[str, np.ndarray]:
+    """Aggregate time sorted candles into candles of longer interval
+    aligned to epoch, f.e. 5m candles into 1h. Buckets are found and
+    reduced with NumPy, without per candle Python loop. Bucket of the
+    first candle is dropped if candles from its open are missing, as
+    its open, high and low are not known. The last bucket can be
+    partial, it holds candles received so far, same as forming candle
+    returned by exchange.
+
+    Params:
+        columns(dict): Columnar candles sorted by time.
+        interval_seconds(int): Length of resampled candle in seconds,
+            multiple of source interval.
+
+    Returns:
+        dict: Columnar candles of longer interval.
+    """
+    buckets = columns["time"] - columns["time"] % interval_seconds
+    begin = 0
+    if len(buckets) and columns["time"][0] != buckets[0]:
+        begin = int(np.searchsorted(buckets, buckets[0], side="right"))
+    buckets = buckets[begin:]
+    if not len(buckets):
+        return empty_columns()
+
+    starts = np.flatnonzero(
+                np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    ends = np.append(starts[1:], len(buckets)) - 1
+    high = columns["high"][begin:]
+    low = columns["low"][begin:]
+    volume = columns["volume"][begin:]
+    return {
+        "time": buckets[starts],
+        "open": columns["open"][begin:][starts],
+        "high": np.maximum.reduceat(high, starts),
+        "low": np.minimum.reduceat(low, starts),
+        "close": columns["close"][begin:][ends],
+        "volume": np.add.reduceat(volume, starts),
+    }
@@ -1,8 +1,26 @@
 import gate_api
 import logging
-
-from datetime import datetime, timezone
+import numpy as np
+import threading
+import time
+
+from candle_store import CandleStore
+from candles import (
+    columns_to_records,
+    decode_columns,
+    merge_columns,
+)
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from gate_api.exceptions import ApiException, GateApiException
+from pair_metadata import PairInfo, PairMetadataCache
+from request_scheduler import (
+    Priority,
+    RequestDeadlineExceeded,
+    RequestScheduler,
+)
+from typing import Dict, Iterator, List, Tuple, Union
+from urllib3.exceptions import HTTPError
 
 
 logger = logging.getLogger(__name__)
@@ -23,6 +41,118 @@ class Interval:
     INT_7D = "7d"
 
 
+# Length of interval candles in seconds.
+INTERVAL_SECONDS = {
+    Interval.INT_10S: 10,
+    Interval.INT_1M: 60,
+    Interval.INT_5M: 5 * 60,
+    Interval.INT_15M: 15 * 60,
+    Interval.INT_30M: 30 * 60,
+    Interval.INT_1H: 60 * 60,
+    Interval.INT_4H: 4 * 60 * 60,
+    Interval.INT_8H: 8 * 60 * 60,
+    Interval.INT_1D: 24 * 60 * 60,
+    Interval.INT_7D: 7 * 24 * 60 * 60,
+}
+# Maximum number of candles returned by exchange in one request.
+MAX_CANDLES_PER_REQUEST = 1000
+# Seconds until deadline of live and backfill requests.
+LIVE_REQUEST_TIMEOUT = 10
+BACKFILL_REQUEST_TIMEOUT = 120
+API_HOST = "https://api.gateio.ws/api/v4"
+# Kept-alive connections to exchange. Covers all request scheduler and
+# bot workers, so no connection is dropped and opened again.
+CONNECTION_POOL_SIZE = 16
+# Connect and read seconds of single HTTP request.
+HTTP_TIMEOUT = (3.05, 10)
+
+_shared_lock = threading.Lock()
+_shared_exchange_api = None
+
+
+def to_timestamp(value: datetime) -> int:
+    """Convert naive UTC datetime to epoch seconds.
+
+    Params:
+        value(datetime): Time in UTC.
+
+    Returns:
+        int: Epoch seconds.
+    """
+    return int(value.replace(tzinfo=timezone.utc).timestamp())
+
+
+def from_timestamp(value: int) -> datetime:
+    """Convert epoch seconds to naive UTC datetime.
+
+    Params:
+        value(int): Epoch seconds.
+
+    Returns:
+        datetime: Time in UTC.
+    """
+    return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
+
+
+def split_time_range(
+    start: int,
+    end: int,
+    interval_seconds: int,
+    chunk_size: int = MAX_CANDLES_PER_REQUEST
+) -> List[Tuple[int, int]]:
+    """Split [start, end) time range into chunks which fit in single
+    exchange request.
+
+    Params:
+        start(int): Range start in epoch seconds.
+        end(int): Range end in epoch seconds (exclusive).
+        interval_seconds(int): Length of one candle in seconds.
+        chunk_size(int): Maximum candles in chunk
+            (default MAX_CANDLES_PER_REQUEST)
+
+    Returns:
+        list: List of [start, end) epoch seconds pairs.
+    """
+    span = interval_seconds * chunk_size
+    return [
+        (chunk_start, min(chunk_start + span, end))
+        for chunk_start in range(start, end, span)
+    ]
+
+
+def create_api_client(
+    host: str = API_HOST,
+    pool_size: int = CONNECTION_POOL_SIZE,
+    compression: bool = True,
+    key: str = None,
+    secret: str = None
+) -> gate_api.ApiClient:
+    """Create exchange API client with tuned connection pool.
+    Connections are kept alive between requests, so only the first
+    request to exchange pays for TCP and TLS handshakes.
+
+    Params:
+        host(str): Exchange API address (default API_HOST)
+        pool_size(int): Maximum kept-alive connections
+            (default CONNECTION_POOL_SIZE)
+        compression(bool): Ask for gzip compressed responses
+            (default True)
+        key(str): API key signing private requests, f.e. orders.
+            None allows public requests only (default None)
+        secret(str): API secret of key (default None)
+
+    Returns:
+        gate_api.ApiClient: Configured API client.
+    """
+    configuration = gate_api.Configuration(
+                        host = host, key = key, secret = secret)
+    configuration.connection_pool_maxsize = pool_size
+    api_client = gate_api.ApiClient(configuration)
+    if compression:
+        api_client.set_default_header("Accept-Encoding", "gzip, deflate")
+    return api_client
+
+
 class ExchangeApi:
     """Util class for crypto exchange interactions.
     
@@ -31,76 +161,142 @@ class ExchangeApi:
         api_client(ApiClient): API client
         api_instance(SpotApi): Spot API instance
         settle(str): Settle currency
+        scheduler(RequestScheduler): Rate limits, prioritizes and
+            retries requests
+        candle_store(CandleStore): Local store of historical candles
+        pairs(PairMetadataCache): Cached currency pairs metadata
 
     Methods:
-    get_candle_stick(contract, interval, limit=100):
-        Download data in candle stick format (ohlc)"""
-
-    def __init__(self) -> None:
-        # Defining the host is optional and defaults to:
-        # https://api.gateio.ws/api/v4
-        self.configuration = gate_api.Configuration(
-            host = "https://api.gateio.ws/api/v4"
-        )
-        self.api_client = gate_api.ApiClient(self.configuration)
+    get_candle_stick(contract, interval, limit=100, columnar=False):
+        Download data in candle stick format (ohlc)
+    get_candle_stick_time_range(contract, interval, start, end):
+        Download data in candle stick format (ohlc) in time range
+    iter_candle_stick_history(contract, interval, start, end):
+        Download time range of any size in chunks, yielded in order
+    get_candle_stick_history(contract, interval, start, end):
+        Download time range of any size merged into one set
+    get_pair_info(contract):
+        Get cached currency pair metadata
+    get_request_metrics():
+        Get request queue depth and throttling metrics
+    shared():
+        Process-wide instance reusing kept-alive connections"""
+
+    def __init__(
+        self,
+        candle_store: CandleStore = None,
+        api_instance = None,
+        api_client: gate_api.ApiClient = None,
+        http_timeout: Tuple[float, float] = HTTP_TIMEOUT
+    ) -> None:
+        """Params:
+            candle_store(CandleStore): Local store checked before
+                downloading historical candles. None disables it
+                (default None)
+            api_instance(SpotApi): Spot API implementation, f.e.
+                ReplaySpotApi for offline runs. None creates SpotApi
+                connected to exchange (default None)
+            api_client(gate_api.ApiClient): Client used by created
+                SpotApi. None creates one with create_api_client()
+                (default None)
+            http_timeout(tuple): Connect and read seconds of single
+                HTTP request (default HTTP_TIMEOUT)"""
+        if api_client is None:
+            api_client = create_api_client()
+        self.api_client = api_client
+        self.configuration = api_client.configuration
+        self.http_timeout = http_timeout
         # Create an instance of the API class
-        self.api_instance = gate_api.SpotApi(self.api_client)
+        if api_instance is None:
+            api_instance = gate_api.SpotApi(self.api_client)
+        self.api_instance = api_instance
         self.settle = 'usdt' # str | Settle currency
+        self.scheduler = RequestScheduler()
+        self.candle_store = candle_store
+        self.pairs = PairMetadataCache(
+                        self.api_instance,
+                        scheduler = self.scheduler,
+                        timeout = LIVE_REQUEST_TIMEOUT,
+                        http_timeout = http_timeout)
+
+    @classmethod
+    def shared(cls) -> "ExchangeApi":
+        """Get process-wide instance, created on first use. Bot, web
+        app jobs and routes share its connection pool, request
+        scheduler and pairs metadata, so periodic jobs reuse warm
+        connections instead of opening new ones.
+
+        Returns:
+            ExchangeApi: Shared instance.
+        """
+        global _shared_exchange_api
+        with _shared_lock:
+            if _shared_exchange_api is None:
+                _shared_exchange_api = cls()
+            return _shared_exchange_api
+
+    def get_pair_info(self, contract: str) -> PairInfo:
+        """Get currency pair metadata (precision, minimal order size,
+        trading status) from cache loaded in bulk from exchange.
+
+        Params:
+            contract(str): String describing currency pair.
+
+        Returns:
+            PairInfo: Pair metadata or None if pair is unknown.
+        """
+        return self.pairs.get(contract)
+
+    def get_request_metrics(self) -> dict:
+        """Get request queue depth, throttling and retries metrics.
+
+        Returns:
+            dict: Snapshot of request scheduler metrics.
+        """
+        return self.scheduler.metrics()
 
     def get_candle_stick(
         self,
         contract: str,
         interval: str,
-        limit: int = 100
-    ) -> list:
+        limit: int = 100,
+        columnar: bool = False
+    ) -> Union[list, Dict[str, np.ndarray]]:
         """Download data in candle stick format (ohlc) for crypto pair,
         f.e. BTC_USDT.
 
         Params:
             contract(str): String describing currency pair.
             interval(str): String describing time interval of data.
-            limit(int): Number of last candles with data to download
-                        (default 100)
+            limit(int): Number of last candles with data to download,
+                        more than MAX_CANDLES_PER_REQUEST are
+                        downloaded in chunks (default 100)
+            columnar(bool): Return contiguous arrays instead of list
+                of dictionaries (default False)
 
         Returns:
             list: List of dictionary items with OHLC format data.
+                With columnar dict of arrays, time as int64 epoch
+                seconds (UTC) and OHLCV as float64.
         """
-        try:
-            pair = self.api_instance.get_currency_pair(contract)
-            api_response = self.api_instance.list_candlesticks(
-                                currency_pair = contract,
-                                limit = limit,
-                                interval = interval
-                            )
-
-            logger.info("Exchange data '{}':\n'{}'".format(contract, api_response))
-            keys = ["time", "volume", "close", "high", "low", "open"]
-            response = []
-
-            for item in api_response:
-                dict_item = dict (zip(keys, item))
-                dict_item["time"] = datetime.fromtimestamp(
-                                        int(dict_item["time"])
-                                    ).strftime('%H:%M %d.%m.%y')
-
-                for k,v in dict_item.items():
-                    if k != "time":
-                        dict_item[k] = float(v)
-
-                response.append(dict_item)
-
-            return response
-
-        except GateApiException as ex:
-            logger.error(
-                "Gate api exception, label: %s, message: %s\n"
-                % (ex.label, ex.message)
-            )
-
-        except ApiException as e:
-            logger.error(
-                "Exception when calling SpotApi->list_candlesticks: %s\n" % e
-            )
+        if limit > MAX_CANDLES_PER_REQUEST:
+            # Does not fit in single request, f.e. warmup of interval
+            # resampled to longer ones.
+            interval_seconds = INTERVAL_SECONDS[interval]
+            end = (int(time.time()) // interval_seconds + 1) * interval_seconds
+            columns = self.get_candle_stick_history(
+                        contract,
+                        interval,
+                        from_timestamp(end - limit * interval_seconds),
+                        from_timestamp(end))
+            return columns if columnar else columns_to_records(columns)
+
+        return self._list_candlesticks(
+                    columnar,
+                    currency_pair = contract,
+                    limit = limit,
+                    interval = interval
+                )
 
     def get_candle_stick_time_range(
         self,
@@ -108,8 +304,9 @@ class ExchangeApi:
         interval: str,
         start: datetime,
         end: datetime,
-        limit: int = 100
-    ) -> list:
+        limit: int = 100,
+        columnar: bool = False
+    ) -> Union[list, Dict[str, np.ndarray]]:
         """Download data in candle stick format (ohlc) for crypto pair,
         f.e. BTC_USDT in specific time range.
 
@@ -120,40 +317,278 @@ class ExchangeApi:
             end(datetime): End of time range
             limit(int): Irrelevant. Conflicts with start/end
                 (default 100)
+            columnar(bool): Return contiguous arrays instead of list
+                of dictionaries (default False)
 
         Returns:
             list: List of dictionary items with OHLC format data from
-                specified time range.
+                specified time range. With columnar dict of arrays.
         """
+        timestamp1 = to_timestamp(start)
+        timestamp2 = to_timestamp(end)
+        interval_seconds = INTERVAL_SECONDS[interval]
+        if (self.candle_store is not None
+                or (timestamp2 - timestamp1) // interval_seconds + 1
+                > MAX_CANDLES_PER_REQUEST):
+            # Range does not fit in single request, end is inclusive.
+            columns = self.get_candle_stick_history(
+                        contract,
+                        interval,
+                        start,
+                        end + timedelta(seconds=interval_seconds))
+            return columns if columnar else columns_to_records(columns)
+
+        return self._list_candlesticks(
+                    columnar,
+                    currency_pair = contract,
+                    limit = limit,
+                    _from = timestamp1,
+                    to = timestamp2,
+                    interval = interval
+                )
+
+    def iter_candle_stick_history(
+        self,
+        contract: str,
+        interval: str,
+        start: datetime,
+        end: datetime,
+        max_workers: int = 4,
+        chunk_size: int = MAX_CANDLES_PER_REQUEST
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        """Download [start, end) time range of any size. Range is split
+        into chunks fetched concurrently under rate limit. Chunks are
+        yielded in time order, without candles repeated between them.
+
+        Params:
+            contract(str): String describing currency pair.
+            interval(str): String describing time interval of data.
+            start(datetime): Start of time range (UTC)
+            end(datetime): End of time range, exclusive (UTC)
+            max_workers(int): Maximum concurrent requests (default 4)
+            chunk_size(int): Maximum candles in one request
+                (default MAX_CANDLES_PER_REQUEST)
+
+        Yields:
+            dict: Columnar candles of one chunk.
+        """
+        ranges = split_time_range(
+                    to_timestamp(start),
+                    to_timestamp(end),
+                    INTERVAL_SECONDS[interval],
+                    chunk_size)
+        last_time = None
+        for _, chunk in self._iter_history_chunks(
+                contract, interval, ranges, max_workers):
+            if chunk is None:
+                continue
+            if last_time is not None:
+                newer = chunk["time"] > last_time
+                chunk = {field: v[newer] for field, v in chunk.items()}
+            if len(chunk["time"]):
+                last_time = chunk["time"][-1]
+                yield chunk
+
+    def get_candle_stick_history(
+        self,
+        contract: str,
+        interval: str,
+        start: datetime,
+        end: datetime,
+        max_workers: int = 4,
+        columnar: bool = True
+    ) -> Union[list, Dict[str, np.ndarray]]:
+        """Download [start, end) time range of any size merged into one
+        time sorted set without duplicates. With candle store only
+        ranges missing in the store are downloaded and then stored.
+
+        Params:
+            contract(str): String describing currency pair.
+            interval(str): String describing time interval of data.
+            start(datetime): Start of time range (UTC)
+            end(datetime): End of time range, exclusive (UTC)
+            max_workers(int): Maximum concurrent requests (default 4)
+            columnar(bool): Return contiguous arrays instead of list
+                of dictionaries (default True)
+
+        Returns:
+            dict: Columnar candles. With columnar False list of
+                dictionary items.
+        """
+        if self.candle_store is None:
+            columns = merge_columns(list(self.iter_candle_stick_history(
+                        contract, interval, start, end, max_workers)))
+        else:
+            columns = self._get_stored_history(
+                        contract,
+                        interval,
+                        to_timestamp(start),
+                        to_timestamp(end),
+                        max_workers)
+        return columns if columnar else columns_to_records(columns)
+
+    def _get_stored_history(
+        self,
+        contract: str,
+        interval: str,
+        start: int,
+        end: int,
+        max_workers: int
+    ) -> Dict[str, np.ndarray]:
+        """Read [start, end) time range from candle store, downloading
+        and storing missing parts first. Candles which are not closed yet
+        are downloaded but not stored.
+
+        Params:
+            contract(str): String describing currency pair.
+            interval(str): String describing time interval of data.
+            start(int): Range start in epoch seconds.
+            end(int): Range end in epoch seconds (exclusive).
+            max_workers(int): Maximum concurrent requests.
+
+        Returns:
+            dict: Columnar candles.
+        """
+        interval_seconds = INTERVAL_SECONDS[interval]
+        closed_end = int(time.time()) // interval_seconds * interval_seconds
+        stored_end = max(start, min(end, closed_end))
+
+        ranges = []
+        for missing_start, missing_end in self.candle_store.missing_ranges(
+                contract, interval, start, stored_end):
+            ranges += split_time_range(
+                        missing_start, missing_end, interval_seconds)
+        for (chunk_start, chunk_end), chunk in self._iter_history_chunks(
+                contract, interval, ranges, max_workers):
+            # Failed chunks are not stored, next read retries them.
+            if chunk is not None:
+                self.candle_store.write(
+                    contract, interval, chunk_start, chunk_end, chunk)
+
+        columns = self.candle_store.read(contract, interval, start, stored_end)
+        if stored_end < end:
+            forming = [
+                chunk
+                for _, chunk in self._iter_history_chunks(
+                    contract,
+                    interval,
+                    split_time_range(stored_end, end, interval_seconds),
+                    max_workers)
+                if chunk is not None
+            ]
+            columns = merge_columns([columns] + forming)
+        return columns
+
+    def _iter_history_chunks(
+        self,
+        contract: str,
+        interval: str,
+        ranges: List[Tuple[int, int]],
+        max_workers: int
+    ) -> Iterator[Tuple[Tuple[int, int], Dict[str, np.ndarray]]]:
+        """Download history chunks concurrently, yielded in ranges order.
+
+        Params:
+            contract(str): String describing currency pair.
+            interval(str): String describing time interval of data.
+            ranges(list): [start, end) epoch seconds pairs.
+            max_workers(int): Maximum concurrent requests.
+
+        Yields:
+            tuple: Chunk range and its columnar candles (None on error).
+        """
+        executor = ThreadPoolExecutor(
+                        max_workers=max_workers,
+                        thread_name_prefix="backfill")
         try:
+            futures = [
+                executor.submit(
+                    self._get_history_chunk,
+                    contract,
+                    interval,
+                    chunk_start,
+                    chunk_end)
+                for chunk_start, chunk_end in ranges
+            ]
+            for chunk_range, future in zip(ranges, futures):
+                yield chunk_range, future.result()
+        finally:
+            # Stop pending requests if consumer does not read all chunks.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_history_chunk(
+        self,
+        contract: str,
+        interval: str,
+        chunk_start: int,
+        chunk_end: int
+    ) -> Dict[str, np.ndarray]:
+        """Download one [chunk_start, chunk_end) chunk of history.
 
-            timestamp1 = start.replace(tzinfo=timezone.utc).timestamp()
-            timestamp2 = end.replace(tzinfo=timezone.utc).timestamp()
-            api_response = self.api_instance.list_candlesticks(
-                                currency_pair = contract,
-                                limit = limit,
-                                _from = int(timestamp1),
-                                to = int(timestamp2),
-                                interval = interval
-                            )
+        Params:
+            contract(str): String describing currency pair.
+            interval(str): String describing time interval of data.
+            chunk_start(int): Chunk start in epoch seconds.
+            chunk_end(int): Chunk end in epoch seconds (exclusive).
 
-            logger.info("Exchange data:\n'{}'".format(api_response))
-            keys = ["time", "volume", "close", "high", "low", "open"]
-            response = []
+        Returns:
+            dict: Time sorted columnar candles. None on exchange error.
+        """
+        columns = self._list_candlesticks(
+                    True,
+                    priority = Priority.BACKFILL,
+                    currency_pair = contract,
+                    _from = chunk_start,
+                    to = chunk_end - 1,
+                    interval = interval
+                )
+        if columns is None:
+            logger.error("Missing '{}' {} candles from {} to {}".format(
+                contract, interval, chunk_start, chunk_end))
+            return None
+
+        columns = merge_columns([columns])
+        inside = ((columns["time"] >= chunk_start)
+                  & (columns["time"] < chunk_end))
+        return {field: v[inside] for field, v in columns.items()}
+
+    def _list_candlesticks(
+        self,
+        columnar: bool,
+        priority: int = Priority.LIVE,
+        **kwargs
+    ) -> Union[list, Dict[str, np.ndarray]]:
+        """Request candlesticks through request scheduler and decode
+        the response.
 
-            for item in api_response:
-                dict_item = dict (zip(keys, item))
-                dict_item["time"] = datetime.fromtimestamp(
-                                        int(dict_item["time"])
-                                    ).strftime('%H:%M %d.%m.%y')
+        Params:
+            columnar(bool): Return dict of arrays instead of list
+                of dictionaries.
+            priority(int): Request priority (default Priority.LIVE)
+            kwargs: Arguments of SpotApi->list_candlesticks.
 
-                for k,v in dict_item.items():
-                    if k != "time":
-                        dict_item[k] = float(v)
+        Returns:
+            list: Decoded candles. None on exchange error.
+        """
+        timeout = (LIVE_REQUEST_TIMEOUT if priority == Priority.LIVE
+                   else BACKFILL_REQUEST_TIMEOUT)
+        try:
+            api_response = self.scheduler.call(
+                                "list_candlesticks",
+                                self.api_instance.list_candlesticks,
+                                priority = priority,
+                                timeout = timeout,
+                                _request_timeout = self.http_timeout,
+                                **kwargs
+                            )
 
-                response.append(dict_item)
+            logger.debug("Exchange data '{}': {} candles".format(
+                kwargs["currency_pair"], len(api_response)))
+            columns = decode_columns(api_response)
+            if columnar:
+                return columns
 
-            return response
+            return columns_to_records(columns)
 
         except GateApiException as ex:
             logger.error(
@@ -166,6 +601,11 @@ class ExchangeApi:
                 "Exception when calling SpotApi->list_candlesticks: %s\n" % e
             )
 
+        except (RequestDeadlineExceeded, HTTPError) as e:
+            logger.error(
+                "Request SpotApi->list_candlesticks failed: %s\n" % e
+            )
+
 
 if __name__ == '__main__':
     api = ExchangeApi()
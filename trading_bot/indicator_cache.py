@@ -0,0 +1,125 @@
+import threading
+import numpy as np
+
+from collections import OrderedDict
+from pandas import DataFrame
+from typing import Callable, Dict, Hashable, Tuple
+
+
+def fingerprint(df: DataFrame) -> tuple:
+    """Identify candles data in constant time. Closed candles do not
+    change, so data is identified by its time range and values of the
+    last (forming) candle.
+
+    Params:
+        df(DataFrame): Candles with time column.
+
+    Returns:
+        tuple: Hashable data fingerprint.
+    """
+    if df.empty:
+        return (0,)
+    last = df.iloc[-1]
+    return (
+        len(df),
+        int(df["time"].iloc[0]),
+        int(last["time"]),
+        float(last["high"]),
+        float(last["low"]),
+        float(last["close"]),
+    )
+
+
+class IndicatorCache:
+    """Size bounded least recently used cache of computed indicator
+    columns, keyed by contract, interval, indicator, its parameters and
+    data fingerprint.
+
+    Attributes:
+        maxsize(int): Maximum number of cached results.
+        hits(int): Number of results served from cache.
+        misses(int): Number of computed results.
+
+    Methods:
+    get(contract, interval, name, params, df, compute):
+        Cached indicator columns or compute them.
+    clear():
+        Remove all cached results.
+    metrics():
+        Hits, misses and size counters.
+    """
+
+    def __init__(self, maxsize: int = 256) -> None:
+        """Params:
+            maxsize(int): Maximum number of cached results
+                (default 256)"""
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results: "OrderedDict[Hashable, Dict[str, np.ndarray]]" = (
+            OrderedDict())
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        contract: str,
+        interval: str,
+        name: str,
+        params: Tuple,
+        df: DataFrame,
+        compute: Callable[[], Dict[str, np.ndarray]]
+    ) -> Dict[str, np.ndarray]:
+        """Get cached indicator columns or compute and cache them.
+
+        Params:
+            contract(str): Currency pair.
+            interval(str): Candles interval.
+            name(str): Indicator name, f.e. ema.
+            params(tuple): Indicator parameters, f.e. (20,).
+            df(DataFrame): Candles indicator is computed from.
+            compute(Callable): Returns dict of column name to values.
+
+        Returns:
+            dict: Column name to read only values.
+        """
+        key = (contract, interval, name, tuple(params), fingerprint(df))
+        with self._lock:
+            columns = self._results.get(key)
+            if columns is not None:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return columns
+            self.misses += 1
+
+        columns = {}
+        for column, values in compute().items():
+            values = np.array(values)
+            values.flags.writeable = False
+            columns[column] = values
+        with self._lock:
+            self._results[key] = columns
+            self._results.move_to_end(key)
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+        return columns
+
+    def clear(self) -> None:
+        """Remove all cached results."""
+        with self._lock:
+            self._results.clear()
+
+    def metrics(self) -> dict:
+        """Hits, misses and size counters.
+
+        Returns:
+            dict: Snapshot of cache counters.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._results),
+                "maxsize": self.maxsize,
+            }
@@ -0,0 +1,165 @@
+import logging
+import numpy as np
+
+from concurrent.futures import Executor
+from indicators import Indicators
+from pandas import DataFrame
+from streaming_indicators import StreamingIndicator, make_indicator
+from typing import Callable, Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class IndicatorGraph:
+    """Indicators required by all active strategies, deduplicated and
+    ordered in levels. Indicators of one level do not depend on each
+    other and are computed in parallel, each indicator once per
+    contract and interval, however many strategies need it.
+
+    Attributes:
+        indicators(dict): Indicator spec to indicator.
+        levels(list): Lists of independent specs, every level depends
+            only on previous ones.
+
+    Methods:
+    columns(specs):
+        Names of columns added by indicators.
+    add_to(indicators, df, contract, interval, executor):
+        Add all indicators to DataFrame of contract.
+    compute_panel(indicators, panel, executor):
+        Compute all indicators for many contracts at once.
+    """
+
+    def __init__(self, strategies: Iterable) -> None:
+        """Params:
+            strategies(Iterable): Strategies declaring
+                required_indicators."""
+        self.indicators: Dict[Tuple, StreamingIndicator] = {}
+        pending = [
+            tuple(spec)
+            for strategy in strategies
+            for spec in strategy.required_indicators
+        ]
+        while pending:
+            spec = pending.pop()
+            if spec not in self.indicators:
+                self.indicators[spec] = make_indicator(spec)
+                pending.extend(self.indicators[spec].requires)
+        self._check_columns()
+        self.levels = self._levels()
+
+    def _check_columns(self) -> None:
+        """Reject indicators writing the same column, f.e. Psar with
+        different steps, one would silently overwrite the other."""
+        owners = {}
+        for spec in sorted(self.indicators):
+            for column in self.indicators[spec].columns:
+                if column in owners:
+                    raise ValueError(
+                        "Indicators {} and {} write the same column '{}'"
+                        .format(owners[column], spec, column))
+                owners[column] = spec
+
+    def _levels(self) -> List[List[Tuple]]:
+        levels = []
+        done = set()
+        remaining = sorted(self.indicators)
+        while remaining:
+            level = [
+                spec for spec in remaining
+                if all(tuple(r) in done for r in self.indicators[spec].requires)
+            ]
+            if not level:
+                raise ValueError("Indicators {} depend on each other".format(
+                    remaining))
+            levels.append(level)
+            done.update(level)
+            remaining = [spec for spec in remaining if spec not in done]
+        return levels
+
+    def columns(self, specs: Iterable[Tuple]) -> List[str]:
+        """Names of columns added by indicators.
+
+        Params:
+            specs(Iterable): Indicator specs, f.e. {("ema", 20)}.
+
+        Returns:
+            list: Column names.
+        """
+        return [
+            column
+            for spec in sorted(specs)
+            for column in make_indicator(spec).columns
+        ]
+
+    @staticmethod
+    def _map(
+        executor: Executor,
+        function: Callable,
+        level: List[Tuple]
+    ) -> list:
+        if executor is None or len(level) < 2:
+            return [function(spec) for spec in level]
+        return list(executor.map(function, level))
+
+    def add_to(
+        self,
+        indicators: Indicators,
+        df: DataFrame,
+        contract: str,
+        interval: str,
+        executor: Executor = None
+    ) -> None:
+        """Add all indicators to DataFrame of contract. Columns of a
+        level are added before the next level is computed.
+
+        Params:
+            indicators(Indicators): Streaming indicators state and cache.
+            df(DataFrame): Live data of contract.
+            contract(str): Currency pair.
+            interval(str): Candles interval.
+            executor(Executor): Pool computing independent indicators
+                in parallel. None computes them one by one
+                (default None)
+        """
+        for level in self.levels:
+            results = self._map(
+                        executor,
+                        lambda spec: indicators.compute_streaming(
+                            df, contract, interval, self.indicators[spec]),
+                        level)
+            for columns in results:
+                for name, values in columns.items():
+                    df[name] = values
+
+    def compute_panel(
+        self,
+        indicators: Indicators,
+        panel: Dict[str, np.ndarray],
+        executor: Executor = None
+    ) -> Dict[str, np.ndarray]:
+        """Compute all indicators for many contracts at once.
+
+        Params:
+            indicators(Indicators): Object computing panel indicators.
+            panel(dict): Field name to array, contracts x time.
+            executor(Executor): Pool computing independent indicators
+                in parallel. None computes them one by one
+                (default None)
+
+        Returns:
+            dict: Column name to values, contracts x time.
+        """
+        panel = dict(panel)
+        for level in self.levels:
+            results = self._map(
+                        executor,
+                        lambda spec: indicators.panel(
+                            panel, [self.indicators[spec]]),
+                        level)
+            for columns in results:
+                panel.update(columns)
+        return {
+            column: panel[column]
+            for column in self.columns(self.indicators)
+        }
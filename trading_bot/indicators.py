@@ -1,33 +1,229 @@
 import logging
+import numpy as np
+import panel_indicators
 
+from candles import CANDLE_FIELDS
+from indicator_cache import IndicatorCache
+from numpy.lib.stride_tricks import sliding_window_view
 from pandas import DataFrame
+from streaming_indicators import (
+    INPUT_FIELDS,
+    IndicatorEngine,
+    StreamingIndicator,
+)
 from ta.momentum import RSIIndicator
 from ta.trend import EMAIndicator, PSARIndicator, SMAIndicator
 from ta.volatility import AverageTrueRange
-from typing import Tuple
+from typing import Dict, Iterable, Tuple
 
 logger = logging.getLogger(__name__)
 
 
+def swing_extremes(
+    values: np.ndarray,
+    next_no: int = 5,
+    lowest: bool = True
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Find lowest (highest) value near every candle at once. Like
+    Indicators.find_lowest_near() started at each candle, search moves
+    to every next candle not worse than the found one and stops after
+    next_no worse candles in a row.
+
+    Params:
+        values(np.ndarray): Lows (highs) of candles. 2-D array is
+            searched along the last axis, f.e. contracts x time.
+        next_no(int): Number of next candles to check (default 5)
+        lowest(bool): Search lows if True, highs otherwise
+            (default True)
+
+    Returns:
+        tuple: Arrays of found candles indexes and values, shaped like
+            values.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    size = values.shape[-1]
+    padding = np.full(values.shape[:-1] + (next_no,),
+                      np.inf if lowest else -np.inf)
+    # Row j of windows holds next_no candles following candle j.
+    windows = sliding_window_view(
+                np.concatenate([values[..., 1:], padding], axis=-1),
+                next_no,
+                axis=-1)
+    if lowest:
+        better = windows <= values[..., None]
+    else:
+        better = windows >= values[..., None]
+    index = np.broadcast_to(np.arange(size), values.shape)
+    found = np.where(
+                better.any(axis=-1), index + better.argmax(axis=-1) + 1, index)
+    # Follow chains of found candles by pointer jumping, each pass
+    # doubles followed chain length.
+    while True:
+        jumped = np.take_along_axis(found, found, axis=-1)
+        if np.array_equal(jumped, found):
+            break
+        found = jumped
+    return found, np.take_along_axis(values, found, axis=-1)
+
+
 class Indicators():
     """Adds technical analysis indicators to pandas DataFrame.
-    It uses ta 3rd party module for technical analysis.
+    It uses ta 3rd party module for technical analysis. Live data
+    indicators are updated incrementally by streaming engine. Results
+    computed for contract data are cached and reused.
+
+    Attributes:
+        engine(IndicatorEngine): Streaming indicators state.
+        cache(IndicatorCache): Computed indicators cache.
 
     Methods:
+    add_streaming(df, contract, interval, indicators):
+        Add to DataFrame incrementally updated indicators.
+    compute_streaming(df, contract, interval, indicator):
+        Incrementally updated indicator values.
+    add_cached(df, contract, interval, name, *params):
+        Add to DataFrame indicator computed once per data.
+    panel(panel, indicators):
+        Compute indicators of many contracts at once.
     add_psar(self, df: DataFrame):
         Add to DataFrame the Parabolic Stop and reverse indicator.
-    add_rsi(df):
+    add_rsi(df, window=14):
         Add to DataFrame the Relative Strength index indicator.
     add_sma(df, periods):
         Add to DataFrame the Simple Moving Average indicator.
     add_ema(df, periods):
         Add to DataFrame the Exponential Moving Average indicator.
-    add_atr(df):
+    add_atr(df, window=14):
         Add to DataFrame the Average True Range indicator.
     find_lowest_near(df, i, l, next_no=5):
         Find lowest value in number of next candles.
     def find_highest_near(df, i, h, next_no=5):
-        Find highiest value in number of next candles."""
+        Find highiest value in number of next candles.
+    find_lowest_near_all(df, next_no=5):
+        Find lowest value near every candle.
+    find_highest_near_all(df, next_no=5):
+        Find highiest value near every candle."""
+
+    def __init__(
+        self,
+        engine: IndicatorEngine = None,
+        cache: IndicatorCache = None
+    ) -> None:
+        """Params:
+            engine(IndicatorEngine): Streaming indicators state. None
+                creates new one (default None)
+            cache(IndicatorCache): Computed indicators cache, can be
+                shared by many Indicators. None creates new one
+                (default None)"""
+        self.engine = IndicatorEngine() if engine is None else engine
+        self.cache = IndicatorCache() if cache is None else cache
+
+    def add_streaming(
+        self,
+        df: DataFrame,
+        contract: str,
+        interval: str,
+        indicators: Iterable[StreamingIndicator]
+    ) -> None:
+        """Add to DataFrame indicators updated only with candles closed
+        since the previous call, instead of recomputing all candles.
+        The last candle is still forming and gets provisional values.
+
+        Params:
+            df(DataFrame): Live data of contract.
+            contract(str): Currency pair.
+            interval(str): Candles interval.
+            indicators(Iterable): Streaming indicators, f.e.
+                [Atr(), Ema(20)].
+        """
+        for indicator in indicators:
+            for name, column in self.compute_streaming(
+                    df, contract, interval, indicator).items():
+                df[name] = column
+
+    def compute_streaming(
+        self,
+        df: DataFrame,
+        contract: str,
+        interval: str,
+        indicator: StreamingIndicator
+    ) -> Dict[str, np.ndarray]:
+        """Compute streaming indicator values without changing
+        DataFrame. Safe to call for different indicators in parallel.
+
+        Params:
+            df(DataFrame): Live data of contract.
+            contract(str): Currency pair.
+            interval(str): Candles interval.
+            indicator(StreamingIndicator): Indicator with parameters.
+
+        Returns:
+            dict: Column name to values aligned with candles.
+        """
+        return self.cache.get(
+                    contract,
+                    interval,
+                    indicator.key,
+                    (),
+                    df,
+                    lambda: self.engine.update(
+                                contract,
+                                interval,
+                                indicator,
+                                {f: df[f].to_numpy() for f in INPUT_FIELDS}))
+
+    def add_cached(
+        self,
+        df: DataFrame,
+        contract: str,
+        interval: str,
+        name: str,
+        *params
+    ) -> None:
+        """Add to DataFrame indicator computed by add_<name> method.
+        Result is computed once for the same contract data and
+        parameters, then served from cache.
+
+        Params:
+            df(DataFrame): Live data of contract.
+            contract(str): Currency pair.
+            interval(str): Candles interval.
+            name(str): Indicator name: psar, rsi, sma, ema or atr.
+            params: Parameters of add_<name> method, f.e. 20 for EMA20.
+        """
+        add = getattr(self, "add_" + name)
+
+        def compute():
+            candles = df[[f for f in CANDLE_FIELDS if f in df.columns]]
+            add(candles, *params)
+            return {
+                column: candles[column].to_numpy()
+                for column in candles.columns
+                if column not in CANDLE_FIELDS
+            }
+
+        columns = self.cache.get(contract, interval, name, params, df, compute)
+        for column, values in columns.items():
+            df[column] = values
+
+    def panel(
+        self,
+        panel: Dict[str, np.ndarray],
+        indicators: Iterable[StreamingIndicator]
+    ) -> Dict[str, np.ndarray]:
+        """Compute indicators of many contracts in one vectorized pass
+        along time axis, f.e. for LiveData.panel().
+
+        Params:
+            panel(dict): Field name to array, contracts x time. Rows
+                are aligned at the newest candle.
+            indicators(Iterable): Ema, Sma, Atr or Rsi indicators,
+                f.e. [Atr(), Ema(20)].
+
+        Returns:
+            dict: Column name to values, contracts x time.
+        """
+        return panel_indicators.compute(panel, indicators)
 
     def add_psar(self, df: DataFrame)-> None:
         """Add to DataFrame the Parabolic Stop and reverse indicator.
@@ -40,14 +236,15 @@ class Indicators():
         df["psar_up_ind"] = psar.psar_up_indicator()
         df["psar_down_ind"] = psar.psar_down_indicator()
 
-    def add_rsi(self, df: DataFrame)-> None:
+    def add_rsi(self, df: DataFrame, window: int = 14)-> None:
         """Add to DataFrame the Relative Strength index indicator.
         
         Params:
             df(DataFrame): Data.
+            window(int): RSI periods. Like RSI14 (default 14)
         """
-        rsi = RSIIndicator(df["close"])
-        df["rsi"] = rsi.rsi()
+        rsi = RSIIndicator(df["close"], window=window)
+        df["rsi" + str(window)] = rsi.rsi()
 
     def add_sma(self, df: DataFrame, periods: int)-> None:
         """Add to DataFrame the Simple Moving Average indicator.
@@ -77,22 +274,25 @@ class Indicators():
                         fillna=True
                         ).ema_indicator()
 
-    def add_atr(self, df: DataFrame)-> None:
+    def add_atr(self, df: DataFrame, window: int = 14)-> None:
         """Add to DataFrame the Average True Range indicator.
         
         Params:
             df(DataFrame): Data.
+            window(int): ATR periods. Like ATR14 (default 14)
         """
-        if(len(df) > 14): # ATR is calculated from last 14 values.
-            df["atr"] = AverageTrueRange(
+        if(len(df) > window): # ATR is calculated from last window values.
+            df["atr" + str(window)] = AverageTrueRange(
                         high=df["high"],
                         low=df["low"],
                         close=df["close"],
+                        window=window,
                         fillna=True
                         ).average_true_range()
         else:
             logger.warning(
-                "Failed adding ATR to data which lenght is lower than 14.")
+                "Failed adding ATR to data which lenght is lower than {}."
+                .format(window))
 
     def find_lowest_near(
         self,
@@ -156,4 +356,38 @@ class Indicators():
                 break
         return (idx, h)
 
+    def find_lowest_near_all(
+        self,
+        df: DataFrame,
+        next_no: int = 5
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Find lowest value near every candle in one pass. Item i is
+        equal to find_lowest_near(df, i, df['low'].iloc[i], next_no).
+
+        Params:
+            df(DataFrame): Data.
+            next_no(int): Number of next candles to check.
+
+        Returns:
+            tuple: Arrays of indexes and values of candles with lowest
+                low.
+        """
+        return swing_extremes(df['low'].to_numpy(), next_no, lowest=True)
+
+    def find_highest_near_all(
+        self,
+        df: DataFrame,
+        next_no: int = 5
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Find highiest value near every candle in one pass. Item i is
+        equal to find_highest_near(df, i, df['high'].iloc[i], next_no).
+
+        Params:
+            df(DataFrame): Data.
+            next_no(int): Number of next candles to check.
 
+        Returns:
+            tuple: Arrays of indexes and values of candles with
+                highiest high.
+        """
+        return swing_extremes(df['high'].to_numpy(), next_no, lowest=False)
@@ -1,14 +1,265 @@
 import logging
+import threading
+import time
+import numpy as np
 
+from candles import CANDLE_FIELDS
+from gateio_utils import INTERVAL_SECONDS
 from pandas import DataFrame
+from typing import Dict, List, Tuple
 
 logger = logging.getLogger(__name__)
 
 
+class CandleRingBuffer:
+    """Fixed capacity buffer of candles backed by preallocated NumPy
+    arrays. Every value is written twice, at slot and slot + capacity,
+    so stored candles are always one contiguous slice and can be
+    returned as views without copying.
+
+    Attributes:
+        capacity(int): Maximum number of stored candles.
+
+    Methods:
+    update(columns):
+        Store candles newer than the last one, overwrite the last one.
+    columns():
+        Read only array views of stored candles.
+    to_dataframe():
+        DataFrame sharing memory with the buffer.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        """Params:
+            capacity(int): Maximum number of stored candles."""
+        self.capacity = capacity
+        self._size = 0
+        self._end = 0 # slot after the newest candle
+        self._arrays = {
+            field: np.zeros(
+                        2 * capacity,
+                        dtype=np.int64 if field == "time" else np.float64)
+            for field in CANDLE_FIELDS
+        }
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def last_time(self) -> int:
+        """Returns:
+            int: Epoch time of the newest candle or None if empty.
+        """
+        if not self._size:
+            return None
+        return int(self._arrays["time"][self._end - 1 + self.capacity])
+
+    def update(self, columns: Dict[str, np.ndarray]) -> int:
+        """Store candles newer than the last stored one. Candle with the
+        same time as the last stored one (still forming) is overwritten
+        in place.
+
+        Params:
+            columns(dict): Columnar candles sorted by time.
+
+        Returns:
+            int: Number of appended candles.
+        """
+        times = columns["time"]
+        start = 0
+        if self._size:
+            last = self.last_time
+            start = int(np.searchsorted(times, last))
+            if start < len(times) and times[start] == last:
+                slot = (self._end - 1) % self.capacity
+                for field in CANDLE_FIELDS:
+                    value = columns[field][start]
+                    self._arrays[field][slot] = value
+                    self._arrays[field][slot + self.capacity] = value
+                start += 1
+
+        count = len(times) - start
+        if count <= 0:
+            return 0
+        # Only the newest capacity candles can be kept.
+        skip = max(0, count - self.capacity)
+        slots = (self._end + np.arange(count - skip)) % self.capacity
+        for field in CANDLE_FIELDS:
+            values = columns[field][start + skip:]
+            self._arrays[field][slots] = values
+            self._arrays[field][slots + self.capacity] = values
+
+        self._end = (self._end + count - skip) % self.capacity
+        self._size = min(self._size + count, self.capacity)
+        return count
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Read only array views of stored candles, oldest first.
+
+        Returns:
+            dict: Field name to array view mapping.
+        """
+        stop = self._end + self.capacity
+        views = {}
+        for field in CANDLE_FIELDS:
+            view = self._arrays[field][stop - self._size : stop]
+            view.flags.writeable = False
+            views[field] = view
+        return views
+
+    def to_dataframe(self) -> DataFrame:
+        """DataFrame of stored candles sharing memory with the buffer.
+        Columns added to it (f.e. indicators) do not affect the buffer.
+
+        Returns:
+            DataFrame: Stored candles, oldest first.
+        """
+        return DataFrame(self.columns(), copy=False)
+
+
 class LiveData:
-    """Stores real time downloaded data in DataFrame format"""
+    """Stores real time downloaded data in DataFrame format
 
-    def __init__(self) -> None:
+    Attributes:
+        df(DataFrame): Candles of currently processed contract.
+        pair_info(PairInfo): Metadata of currently processed contract
+            (precision, minimal order size, trading status).
+        capacity(int): Number of candles kept per contract and interval.
+        capacities(dict): Interval to number of candles kept, overrides
+            capacity.
+        buffers(dict): Ring buffer per (contract, interval).
+        lock(RLock): Guards buffers updated from other threads, f.e.
+            by market stream. Hold it while reading views.
+
+    Methods:
+    buffer(contract, interval):
+        Get ring buffer, created on first use.
+    fetch_limit(contract, interval):
+        Number of candles missing in buffer.
+    update(contract, interval, columns):
+        Store downloaded candles.
+    view(contract, interval):
+        DataFrame view of stored candles.
+    panel(contracts, interval):
+        Candles of many contracts as 2-D arrays."""
+
+    def __init__(
+        self,
+        capacity: int = 500,
+        capacities: Dict[str, int] = None
+    ) -> None:
+        """Params:
+            capacity(int): Number of candles kept per contract and
+                interval (default 500)
+            capacities(dict): Interval to number of candles kept, f.e.
+                more candles of interval resampled to longer ones.
+                Other intervals keep capacity (default None)"""
         #TODO add other data about downloaded data
         self.df = DataFrame()
+        self.pair_info = None
+        self.capacity = capacity
+        self.capacities = dict(capacities or {})
+        self.buffers: Dict[Tuple[str, str], CandleRingBuffer] = {}
+        self.lock = threading.RLock()
+
+    def buffer(self, contract: str, interval: str) -> CandleRingBuffer:
+        """Get ring buffer of contract and interval, created on first use.
+
+        Params:
+            contract(str): Currency pair.
+            interval(str): Candles interval.
+
+        Returns:
+            CandleRingBuffer: Buffer with stored candles.
+        """
+        key = (contract, interval)
+        with self.lock:
+            if key not in self.buffers:
+                self.buffers[key] = CandleRingBuffer(
+                    self.capacities.get(interval, self.capacity))
+            return self.buffers[key]
+
+    def fetch_limit(self, contract: str, interval: str) -> int:
+        """Number of candles to download to bring buffer up to date.
+        Empty buffer needs full warmup, otherwise only candles newer than
+        the last stored one and the stored one (could still be forming).
+
+        Params:
+            contract(str): Currency pair.
+            interval(str): Candles interval.
+
+        Returns:
+            int: Candles limit for the request.
+        """
+        buffer = self.buffer(contract, interval)
+        last_time = buffer.last_time
+        if last_time is None:
+            return buffer.capacity
+        missing = (int(time.time()) - last_time) // INTERVAL_SECONDS[interval]
+        return max(1, min(buffer.capacity, missing + 1))
+
+    def update(
+        self,
+        contract: str,
+        interval: str,
+        columns: Dict[str, np.ndarray]
+    ) -> int:
+        """Store downloaded candles in contract and interval buffer.
+
+        Params:
+            contract(str): Currency pair.
+            interval(str): Candles interval.
+            columns(dict): Columnar candles sorted by time.
+
+        Returns:
+            int: Number of appended candles.
+        """
+        with self.lock:
+            return self.buffer(contract, interval).update(columns)
+
+    def view(self, contract: str, interval: str) -> DataFrame:
+        """DataFrame view of stored candles without copying. View
+        values change with the next update of the buffer.
+
+        Params:
+            contract(str): Currency pair.
+            interval(str): Candles interval.
+
+        Returns:
+            DataFrame: Stored candles, oldest first.
+        """
+        return self.buffer(contract, interval).to_dataframe()
+
+    def panel(
+        self,
+        contracts: List[str],
+        interval: str,
+        fields: Tuple[str, ...] = ("open", "high", "low", "close", "volume")
+    ) -> Dict[str, np.ndarray]:
+        """Copy stored candles of many contracts into 2-D arrays,
+        contracts x time. Rows are aligned at the newest candle, shorter
+        rows are padded with leading NaN.
+
+        Params:
+            contracts(list): Currency pairs, order of rows.
+            interval(str): Candles interval.
+            fields(tuple): Copied candle fields (default all but time)
 
+        Returns:
+            dict: Field name to array mapping.
+        """
+        with self.lock:
+            columns = [
+                self.buffer(contract, interval).columns()
+                for contract in contracts
+            ]
+            width = max((len(c["time"]) for c in columns), default=0)
+            panel = {
+                field: np.full((len(contracts), width), np.nan)
+                for field in fields
+            }
+            for row, candles in enumerate(columns):
+                size = len(candles["time"])
+                for field in fields:
+                    panel[field][row, width - size:] = candles[field]
+        return panel
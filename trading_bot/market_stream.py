@@ -0,0 +1,270 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+import numpy as np
+
+from gateio_utils import ExchangeApi
+from live_data import LiveData
+from typing import Callable, Dict, List, Set, Tuple
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed, InvalidHandshake
+
+logger = logging.getLogger(__name__)
+
+WS_URL = "wss://api.gateio.ws/ws/v4/"
+CANDLES_CHANNEL = "spot.candlesticks"
+TICKERS_CHANNEL = "spot.tickers"
+
+
+def decode_candle_update(result: dict) -> Tuple[str, str, Dict[str, np.ndarray]]:
+    """Decode candlestick channel update into columnar candle.
+
+    Params:
+        result(dict): Update result, f.e. {"t": "1606292580",
+            "v": "2362.3", "c": "19128.1", "h": "19128.1",
+            "l": "19128.1", "o": "19128.1", "n": "1m_BTC_USDT"}
+
+    Returns:
+        tuple: Contract, interval and columnar candle.
+    """
+    interval, _, contract = result["n"].partition("_")
+    columns = {
+        "time": np.array([int(result["t"])], dtype=np.int64),
+        "open": np.array([float(result["o"])]),
+        "high": np.array([float(result["h"])]),
+        "low": np.array([float(result["l"])]),
+        "close": np.array([float(result["c"])]),
+        "volume": np.array([float(result["v"])]),
+    }
+    return contract, interval, columns
+
+
+class MarketStream:
+    """Push based market data client of exchange spot WebSocket
+    channels (candlesticks and tickers). Reconnects automatically,
+    renews subscriptions and downloads candles missed while
+    disconnected with REST API.
+
+    Attributes:
+        exchange_api(ExchangeApi): REST API used for gap backfill.
+        live_data(LiveData): Updated with received candles.
+        url(str): WebSocket address.
+        reconnect_delay(float): Initial seconds before reconnect.
+        max_reconnect_delay(float): Maximum seconds before reconnect.
+        connected(threading.Event): Set while subscriptions are active.
+
+    Methods:
+    subscribe_candles(contract, interval):
+        Receive candle updates of contract.
+    subscribe_tickers(contract):
+        Receive price updates of contract.
+    is_subscribed(contract, interval):
+        Check if candle updates of contract are received.
+    add_candle_listener(listener):
+        Call listener with every candle update.
+    add_ticker_listener(listener):
+        Call listener with every price update.
+    run():
+        Coroutine receiving updates until stopped.
+    start():
+        Run in background thread.
+    stop():
+        Stop background thread.
+    """
+
+    def __init__(
+        self,
+        exchange_api: ExchangeApi,
+        live_data: LiveData,
+        url: str = WS_URL,
+        reconnect_delay: float = 1,
+        max_reconnect_delay: float = 30
+    ) -> None:
+        """Params:
+            exchange_api(ExchangeApi): REST API used for gap backfill.
+            live_data(LiveData): Updated with received candles.
+            url(str): WebSocket address (default WS_URL)
+            reconnect_delay(float): Initial seconds before reconnect,
+                doubled after each failure (default 1)
+            max_reconnect_delay(float): Maximum seconds before reconnect
+                (default 30)"""
+        self.exchange_api = exchange_api
+        self.live_data = live_data
+        self.url = url
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.connected = threading.Event()
+        self._candles: Set[Tuple[str, str]] = set()
+        self._tickers: Set[str] = set()
+        self._candle_listeners: List[Callable] = []
+        self._ticker_listeners: List[Callable] = []
+        self._stopped = False
+        self._loop = None
+        self._task = None
+        self._thread = None
+
+    def subscribe_candles(self, contract: str, interval: str) -> None:
+        """Receive candle updates of contract. Takes effect on next
+        (re)connection if already running.
+
+        Params:
+            contract(str): Currency pair.
+            interval(str): Candles interval.
+        """
+        self._candles.add((contract, interval))
+
+    def is_subscribed(self, contract: str, interval: str) -> bool:
+        """Check if candle updates of contract are received.
+
+        Params:
+            contract(str): Currency pair.
+            interval(str): Candles interval.
+
+        Returns:
+            bool: True if candles of contract and interval are
+                subscribed and stream is connected.
+        """
+        return (self.connected.is_set()
+                and (contract, interval) in self._candles)
+
+    def subscribe_tickers(self, contract: str) -> None:
+        """Receive price updates of contract. Takes effect on next
+        (re)connection if already running.
+
+        Params:
+            contract(str): Currency pair.
+        """
+        self._tickers.add(contract)
+
+    def add_candle_listener(self, listener: Callable) -> None:
+        """Call listener(contract, interval, columns) with every candle
+        update, after live data is updated.
+
+        Params:
+            listener(Callable): Candle update handler.
+        """
+        self._candle_listeners.append(listener)
+
+    def add_ticker_listener(self, listener: Callable) -> None:
+        """Call listener(contract, price) with every price update.
+
+        Params:
+            listener(Callable): Price update handler.
+        """
+        self._ticker_listeners.append(listener)
+
+    async def run(self) -> None:
+        """Receive updates until stopped. Connection failures are
+        followed by reconnect with exponential backoff."""
+        delay = self.reconnect_delay
+        while not self._stopped:
+            try:
+                async with connect(self.url) as websocket:
+                    await self._subscribe(websocket)
+                    await self._backfill()
+                    self.connected.set()
+                    delay = self.reconnect_delay
+                    async for message in websocket:
+                        try:
+                            self._handle(json.loads(message))
+                        except Exception:
+                            logger.exception(
+                                "Failed handling market stream message")
+            except (ConnectionClosed, InvalidHandshake, OSError) as ex:
+                logger.warning("Market stream disconnected: {}".format(ex))
+            except Exception:
+                # F.e. REST backfill failure. Stream reconnects instead
+                # of leaving stale buffers. CancelledError is not caught.
+                logger.exception("Market stream failed")
+            finally:
+                self.connected.clear()
+
+            if not self._stopped:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _subscribe(self, websocket) -> None:
+        for contract, interval in sorted(self._candles):
+            await websocket.send(self._request(
+                CANDLES_CHANNEL, [interval, contract]))
+        if self._tickers:
+            await websocket.send(self._request(
+                TICKERS_CHANNEL, sorted(self._tickers)))
+
+    @staticmethod
+    def _request(channel: str, payload: list) -> str:
+        return json.dumps({
+            "time": int(time.time()),
+            "channel": channel,
+            "event": "subscribe",
+            "payload": payload,
+        })
+
+    async def _backfill(self) -> None:
+        """Download candles missed while disconnected with REST API."""
+        loop = asyncio.get_running_loop()
+        for contract, interval in sorted(self._candles):
+            columns = await loop.run_in_executor(
+                None,
+                lambda: self.exchange_api.get_candle_stick(
+                    contract=contract,
+                    interval=interval,
+                    limit=self.live_data.fetch_limit(contract, interval),
+                    columnar=True))
+            if columns is not None and len(columns["time"]):
+                self._on_candles(contract, interval, columns)
+
+    def _handle(self, message: dict) -> None:
+        if message.get("event") != "update":
+            if message.get("error"):
+                logger.error("Market stream error: {}".format(
+                    message["error"]))
+            return
+
+        channel = message.get("channel")
+        if channel == CANDLES_CHANNEL:
+            self._on_candles(*decode_candle_update(message["result"]))
+        elif channel == TICKERS_CHANNEL:
+            result = message["result"]
+            for listener in self._ticker_listeners:
+                listener(result["currency_pair"], float(result["last"]))
+
+    def _on_candles(
+        self,
+        contract: str,
+        interval: str,
+        columns: Dict[str, np.ndarray]
+    ) -> None:
+        self.live_data.update(contract, interval, columns)
+        for listener in self._candle_listeners:
+            listener(contract, interval, columns)
+
+    def start(self) -> None:
+        """Run in background daemon thread with own event loop."""
+        self._stopped = False
+        self._loop = asyncio.new_event_loop()
+        self._task = self._loop.create_task(self.run())
+        self._thread = threading.Thread(
+                            target=self._run_loop,
+                            name="market_stream",
+                            daemon=True)
+        self._thread.start()
+
+    def _run_loop(self) -> None:
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+
+    def stop(self) -> None:
+        """Stop background thread."""
+        self._stopped = True
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._task.cancel)
+        self._thread.join()
+        self._thread = None
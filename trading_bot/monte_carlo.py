@@ -0,0 +1,193 @@
+import logging
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+from pandas import DataFrame
+from typing import List, NamedTuple, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Memory used by one chunk of paths.
+CHUNK_BYTES = 256 * 2**20
+# Temporary path x trade arrays alive at once in a chunk.
+CHUNK_ARRAYS = 3
+PERCENTILES = (5, 25, 50, 75, 95)
+BOOTSTRAP, SHUFFLE = "bootstrap", "shuffle"
+
+
+class MonteCarloResult(NamedTuple):
+    """Final return and maximum drawdown of every simulated path."""
+
+    returns: np.ndarray
+    max_drawdowns: np.ndarray
+
+
+def r_multiples(trades: DataFrame) -> np.ndarray:
+    """Trade results in units of initial risk, distance from entry to
+    stop loss.
+
+    Params:
+        trades(DataFrame): Trade log of Backtest.
+
+    Returns:
+        ndarray: R-multiple of every trade ordered by exit time.
+    """
+    trades = trades.sort_values("exit_time", kind="stable")
+    risk = trades["quantity"] * (trades["entry_price"] - trades["stop_loss"])
+    return (trades["pnl"] / risk).to_numpy(dtype=np.float64)
+
+
+def _simulate_chunk(
+    task: Tuple[np.ndarray, int, int, np.random.SeedSequence, str, float]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Final returns and maximum drawdowns of chunk of paths.
+
+    Params:
+        task(tuple): R-multiples, number of paths, trades per path,
+            seed, method and risk fraction.
+
+    Returns:
+        tuple: Arrays of final returns and maximum drawdowns.
+    """
+    r, paths, trades, seed, method, risk = task
+    rng = np.random.default_rng(seed)
+    if method == BOOTSTRAP:
+        sample = r[rng.integers(0, len(r), size=(paths, trades))]
+    else:
+        sample = rng.permuted(np.broadcast_to(r, (paths, len(r))), axis=1)
+    if risk:
+        # Compounding, risk fraction of equity is lost on -1R. Loss
+        # above whole equity is total ruin, log equity stays -inf.
+        np.multiply(sample, risk, out=sample)
+        np.maximum(sample, -1, out=sample)
+        with np.errstate(divide="ignore"):
+            np.log1p(sample, out=sample)
+    equity = np.cumsum(sample, axis=1, out=sample)
+    peaks = np.maximum.accumulate(equity, axis=1)
+    np.maximum(peaks, 0, out=peaks)
+    drawdowns = np.subtract(peaks, equity, out=peaks).max(axis=1)
+    returns = equity[:, -1].copy()
+    if risk:
+        # Drawdown from peak equity as fraction of the peak.
+        drawdowns = -np.expm1(-drawdowns)
+        returns = np.expm1(returns)
+    return returns, drawdowns
+
+
+class MonteCarlo:
+    """Robustness analysis of trade sequence. Trade results are
+    resampled with replacement (bootstrap) or shuffled into many
+    equity paths, simulated as batched NumPy arrays. Paths are split
+    into chunks fitting memory limit, chunks can run on process pool.
+
+    Attributes:
+        paths(int): Number of simulated paths.
+        method(str): BOOTSTRAP or SHUFFLE.
+        risk(float): Fraction of equity risked per trade. None sums
+            R-multiples without compounding. Path losing whole equity
+            is ruined, return -1 and drawdown 1.
+        chunk_bytes(int): Memory limit of one chunk.
+        processes(int): Worker processes. 1 runs in this process.
+        seed(int): Random generator seed.
+
+    Methods:
+    run(r, trades):
+        Simulate paths of R-multiples.
+    bands(result, percentiles):
+        Percentile bands of return and drawdown.
+    """
+
+    def __init__(
+        self,
+        paths: int = 10000,
+        method: str = BOOTSTRAP,
+        risk: float = None,
+        chunk_bytes: int = CHUNK_BYTES,
+        processes: int = 1,
+        seed: int = None
+    ) -> None:
+        """Params:
+            paths(int): Number of simulated paths (default 10000)
+            method(str): BOOTSTRAP resamples trades with replacement,
+                SHUFFLE reorders them (default BOOTSTRAP)
+            risk(float): Fraction of equity risked per trade. None sums
+                R-multiples without compounding (default None)
+            chunk_bytes(int): Memory limit of one chunk
+                (default CHUNK_BYTES)
+            processes(int): Worker processes, 1 runs chunks in this
+                process (default 1)
+            seed(int): Random generator seed. Results do not depend on
+                number of processes (default None)"""
+        if method not in (BOOTSTRAP, SHUFFLE):
+            raise ValueError("Unknown Monte Carlo method '{}'".format(method))
+        self.paths = paths
+        self.method = method
+        self.risk = risk
+        self.chunk_bytes = chunk_bytes
+        self.processes = processes
+        self.seed = seed
+
+    def _tasks(self, r: np.ndarray, trades: int) -> List[Tuple]:
+        chunk = max(1, self.chunk_bytes // (CHUNK_ARRAYS * 8 * trades))
+        sizes = [min(chunk, self.paths - start)
+                 for start in range(0, self.paths, chunk)]
+        seeds = np.random.SeedSequence(self.seed).spawn(len(sizes))
+        return [
+            (r, size, trades, seed, self.method, self.risk)
+            for size, seed in zip(sizes, seeds)
+        ]
+
+    def run(self, r: Sequence[float], trades: int = None) -> MonteCarloResult:
+        """Simulate equity paths of R-multiples.
+
+        Params:
+            r(Sequence): R-multiples of trades, f.e. from r_multiples().
+            trades(int): Trades per bootstrap path. None uses number of
+                R-multiples (default None)
+
+        Returns:
+            MonteCarloResult: Final return and maximum drawdown of every
+                path, in R or in equity fraction if risk is set.
+        """
+        r = np.asarray(r, dtype=np.float64)
+        if not len(r):
+            raise ValueError("No trades to simulate")
+        if self.method == SHUFFLE or trades is None:
+            trades = len(r)
+        tasks = self._tasks(r, trades)
+        logger.debug("Monte Carlo of {} paths x {} trades in {} chunks"
+            .format(self.paths, trades, len(tasks)))
+
+        if self.processes == 1 or len(tasks) < 2:
+            results = [_simulate_chunk(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(
+                    max_workers=min(self.processes, len(tasks))) as executor:
+                results = list(executor.map(_simulate_chunk, tasks))
+        return MonteCarloResult(
+                np.concatenate([returns for returns, _ in results]),
+                np.concatenate([drawdowns for _, drawdowns in results]))
+
+    @staticmethod
+    def bands(
+        result: MonteCarloResult,
+        percentiles: Sequence[float] = PERCENTILES
+    ) -> DataFrame:
+        """Percentile bands of final return and maximum drawdown.
+
+        Params:
+            result(MonteCarloResult): Simulated paths.
+            percentiles(Sequence): Percentiles in 0-100 range
+                (default PERCENTILES)
+
+        Returns:
+            DataFrame: Return and max_drawdown columns, one row per
+                percentile.
+        """
+        return DataFrame(
+                {
+                    "return": np.percentile(result.returns, percentiles),
+                    "max_drawdown": np.percentile(
+                                        result.max_drawdowns, percentiles),
+                },
+                index=list(percentiles))
@@ -0,0 +1,443 @@
+import hashlib
+import logging
+import random
+import time
+
+import gate_api
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from decimal import Decimal, ROUND_DOWN, ROUND_HALF_UP
+from gate_api.exceptions import ApiException
+from gateio_utils import ExchangeApi
+from request_scheduler import RequestDeadlineExceeded, is_retryable
+from strategy import Signal
+from typing import List, NamedTuple, Optional
+from urllib3.exceptions import HTTPError
+
+logger = logging.getLogger(__name__)
+
+# Order results.
+PLACED, REJECTED, TIMEOUT = "placed", "rejected", "timeout"
+# Custom order ID prefix required by exchange.
+CLIENT_ID_PREFIX = "t-"
+# Hex digest length, keeps ID within 28 characters allowed by exchange.
+CLIENT_ID_DIGEST = 13
+# Finished orders searched for client ID after ambiguous failure.
+LOOKUP_LIMIT = 100
+
+
+class OrderRequest(NamedTuple):
+    """Entry order with attached stop loss and target, prices and
+    amount rounded to pair precision.
+
+    Attributes:
+        text(str): Client order ID.
+        contract(str): Currency pair.
+        market(bool): If entry is market order.
+        amount(str): Base amount, quote amount of market order.
+        price(str): Limit price. None for market order.
+        stop_loss(str): Stop loss trigger price.
+        target(str): Target trigger price.
+    """
+
+    text: str
+    contract: str
+    market: bool
+    amount: str
+    price: Optional[str]
+    stop_loss: str
+    target: str
+
+    def to_order(self) -> gate_api.Order:
+        """Returns:
+            gate_api.Order: Buy order model of spot API.
+        """
+        return gate_api.Order(
+                    text=self.text,
+                    currency_pair=self.contract,
+                    type="market" if self.market else "limit",
+                    side="buy",
+                    amount=self.amount,
+                    price=self.price,
+                    time_in_force="ioc" if self.market else "gtc",
+                    stop_loss=gate_api.SpotOrderStopLoss(
+                        trigger_price=self.stop_loss,
+                        order_price="0"),
+                    stop_profit=gate_api.SpotOrderStopProfit(
+                        trigger_price=self.target,
+                        order_price="0"))
+
+
+class OrderResult(NamedTuple):
+    """Outcome of order placement.
+
+    Attributes:
+        text(str): Client order ID.
+        contract(str): Currency pair.
+        status(str): PLACED, REJECTED or TIMEOUT. Order of TIMEOUT
+            result may still exist, look it up by client order ID.
+        order_id(str): Exchange order ID. None unless placed.
+        attempts(int): Number of create_order requests.
+        latency(float): Seconds from submit to result.
+        error(str): Last error. None if placed.
+    """
+
+    text: str
+    contract: str
+    status: str
+    order_id: Optional[str]
+    attempts: int
+    latency: float
+    error: Optional[str]
+
+
+def client_order_id(signal: Signal, interval: str = "") -> str:
+    """Deterministic client order ID of signal. Repeated placement of
+    the same signal, f.e. after restart, has the same ID. Signals of
+    different intervals or strategy parameters, which are part of
+    strategy name, have different IDs.
+
+    Params:
+        signal(Signal): Setup found by strategy.
+        interval(str): Candles interval of signal (default "")
+
+    Returns:
+        str: Client order ID accepted by exchange.
+    """
+    key = "{}|{}|{}|{}".format(
+            signal.strategy, interval, signal.contract, signal.time)
+    digest = hashlib.blake2b(
+                key.encode(), digest_size=CLIENT_ID_DIGEST).hexdigest()
+    return CLIENT_ID_PREFIX + digest
+
+
+def _quantize(value: float, places: int, rounding: str) -> Decimal:
+    return Decimal(repr(value)).quantize(
+                Decimal(1).scaleb(-places), rounding=rounding)
+
+
+class OrderExecutor:
+    """Places entry orders of signals with stop loss and target
+    attached. Every order has client order ID and latency budget.
+    Failed requests are retried within the budget, but after failure
+    which could have reached exchange (5xx or lost response) order is
+    looked up by its client ID first, so retry never places it twice.
+    Orders of many contracts are placed concurrently under rate limit.
+    Every failure ends in logged REJECTED or TIMEOUT result, submitted
+    orders never fail silently.
+
+    Attributes:
+        exchange_api(ExchangeApi): API to exchange.
+        stake(float): Quote amount of every order.
+        latency_budget(float): Seconds order placement may take.
+        base_delay(float): Backoff seconds of the first retry.
+        scheduler(RequestScheduler): Rate limits order requests, the
+            one of exchange_api.
+
+    Methods:
+    build(signal, interval, market):
+        Rounded order request of signal.
+    execute(signal, interval, market):
+        Place order of signal and wait for result.
+    submit(signal, interval, market):
+        Place order of signal in background.
+    execute_signals(signals, interval, market):
+        Place orders of signals concurrently.
+    shutdown():
+        Wait for submitted orders and stop workers.
+    """
+
+    def __init__(
+        self,
+        exchange_api: ExchangeApi,
+        stake: float = 100.0,
+        latency_budget: float = 2.0,
+        max_workers: int = 8,
+        base_delay: float = 0.05
+    ) -> None:
+        """Params:
+            exchange_api(ExchangeApi): API to exchange created with
+                API key and secret. Its request scheduler limits
+                order requests together with market data ones.
+            stake(float): Quote amount of every order (default 100.0)
+            latency_budget(float): Seconds order placement may take,
+                retries included (default 2.0)
+            max_workers(int): Maximum concurrent orders (default 8)
+            base_delay(float): Backoff seconds of the first retry
+                (default 0.05)
+
+        Raises:
+            ValueError: Exchange API has no API key.
+        """
+        if not exchange_api.configuration.key:
+            raise ValueError("Placing orders needs ExchangeApi with API key")
+        self.exchange_api = exchange_api
+        self.stake = stake
+        self.latency_budget = latency_budget
+        self.base_delay = base_delay
+        self.scheduler = exchange_api.scheduler
+        self._executor = ThreadPoolExecutor(
+                            max_workers=max_workers,
+                            thread_name_prefix="orders")
+
+    def build(
+        self,
+        signal: Signal,
+        interval: str = "",
+        market: bool = False
+    ) -> OrderRequest:
+        """Rounded order request of signal. Limit order buys stake
+        worth of base currency at signal entry, market order spends
+        stake.
+
+        Params:
+            signal(Signal): Setup found by strategy.
+            interval(str): Candles interval of signal (default "")
+            market(bool): If entry is market order (default False)
+
+        Returns:
+            OrderRequest: Order ready to be placed.
+
+        Raises:
+            ValueError: Pair is unknown, not tradable or order is
+                below minimal size.
+        """
+        pair = self.exchange_api.get_pair_info(signal.contract)
+        if pair is None or not pair.tradable:
+            raise ValueError("Pair '{}' is not tradable".format(
+                signal.contract))
+
+        def price(value: float) -> str:
+            return str(_quantize(value, pair.precision, ROUND_HALF_UP))
+
+        if market:
+            amount = _quantize(self.stake, pair.precision, ROUND_DOWN)
+            quote = float(amount)
+        else:
+            amount = _quantize(
+                        self.stake / signal.entry,
+                        pair.amount_precision,
+                        ROUND_DOWN)
+            if float(amount) < pair.min_base_amount:
+                raise ValueError("Amount '{}' of '{}' is below minimum"
+                    .format(amount, signal.contract))
+            quote = float(amount) * signal.entry
+        if quote < pair.min_quote_amount:
+            raise ValueError("Total '{}' of '{}' is below minimum".format(
+                quote, signal.contract))
+
+        return OrderRequest(
+                client_order_id(signal, interval),
+                signal.contract,
+                market,
+                str(amount),
+                None if market else price(signal.entry),
+                price(signal.stop_loss),
+                price(signal.target))
+
+    def _call(self, endpoint: str, func, deadline: float, *args, **kwargs):
+        """Make request through scheduler with deadline and HTTP
+        timeout cut to remaining budget."""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise RequestDeadlineExceeded(
+                "Request to '{}' exceeded deadline".format(endpoint))
+        connect, read = self.exchange_api.http_timeout
+        # Retries are done here, blind retry could duplicate order.
+        return self.scheduler.call(
+                    endpoint,
+                    func,
+                    *args,
+                    timeout=remaining,
+                    max_retries=0,
+                    _request_timeout=(
+                        min(connect, remaining), min(read, remaining)),
+                    **kwargs)
+
+    def _find(
+        self,
+        request: OrderRequest,
+        deadline: float
+    ) -> Optional[gate_api.Order]:
+        """Look up order by client ID. Exchange finds open orders by
+        it, finished ones are searched in recent orders."""
+        api = self.exchange_api.api_instance
+        try:
+            return self._call(
+                        "get_order",
+                        api.get_order,
+                        deadline,
+                        request.text,
+                        request.contract)
+        except ApiException as ex:
+            if ex.status != 404:
+                raise
+        orders = self._call(
+                    "list_orders",
+                    api.list_orders,
+                    deadline,
+                    request.contract,
+                    "finished",
+                    limit=LOOKUP_LIMIT)
+        return next((o for o in orders if o.text == request.text), None)
+
+    def _place(self, request: OrderRequest, submitted: float) -> OrderResult:
+        deadline = submitted + self.latency_budget
+        api = self.exchange_api.api_instance
+        order = request.to_order()
+        attempts = 0
+        retries = 0
+        ambiguous = False
+        error = None
+        while True:
+            try:
+                if ambiguous:
+                    found = self._find(request, deadline)
+                    if found is not None:
+                        return self._result(
+                                request, PLACED, found.id, attempts, submitted)
+                attempts += 1
+                placed = self._call(
+                            "create_order", api.create_order, deadline, order)
+                return self._result(
+                        request, PLACED, placed.id, attempts, submitted)
+            except RequestDeadlineExceeded as ex:
+                error = error or ex
+                break
+            except (ApiException, HTTPError) as ex:
+                error = ex
+                if not is_retryable(ex):
+                    return self._result(
+                            request, REJECTED, None, attempts, submitted, ex)
+                # Request could have been executed before it failed.
+                ambiguous = ambiguous or not (
+                    isinstance(ex, ApiException) and ex.status == 429)
+            except Exception as ex:
+                # Unexpected failure, order could have been placed.
+                logger.exception("Placing order '{}' failed".format(
+                    request.text))
+                return self._result(
+                        request, TIMEOUT, None, attempts, submitted, ex)
+
+            delay = random.uniform(0, self.base_delay * 2 ** retries)
+            if time.monotonic() + delay >= deadline:
+                break
+            retries += 1
+            logger.warning("Retry {} of order '{}' in {:.3f}s: {}".format(
+                retries, request.text, delay, error))
+            time.sleep(delay)
+
+        return self._result(
+                request, TIMEOUT, None, attempts, submitted, error)
+
+    @staticmethod
+    def _result(
+        request: OrderRequest,
+        status: str,
+        order_id: Optional[str],
+        attempts: int,
+        submitted: float,
+        error: Exception = None
+    ) -> OrderResult:
+        result = OrderResult(
+                    request.text,
+                    request.contract,
+                    status,
+                    order_id,
+                    attempts,
+                    time.monotonic() - submitted,
+                    None if error is None else str(error).strip())
+        if status == PLACED:
+            logger.info("Order '{}' of '{}' placed as {} in {:.3f}s".format(
+                result.text, result.contract, order_id, result.latency))
+        else:
+            logger.error("Order '{}' of '{}' {} after {} attempts: {}".format(
+                result.text, result.contract, status, attempts, result.error))
+        return result
+
+    def _execute(
+        self,
+        signal: Signal,
+        interval: str,
+        market: bool,
+        submitted: float
+    ) -> OrderResult:
+        try:
+            request = self.build(signal, interval, market)
+        except Exception as ex:
+            # Invalid order or pair metadata not available, nothing
+            # was sent.
+            request = OrderRequest(
+                        client_order_id(signal, interval),
+                        signal.contract,
+                        market,
+                        None,
+                        None,
+                        None,
+                        None)
+            return self._result(request, REJECTED, None, 0, submitted, ex)
+        return self._place(request, submitted)
+
+    def execute(
+        self,
+        signal: Signal,
+        interval: str = "",
+        market: bool = False
+    ) -> OrderResult:
+        """Place entry order of signal with stop loss and target and
+        wait for result.
+
+        Params:
+            signal(Signal): Setup found by strategy.
+            interval(str): Candles interval of signal (default "")
+            market(bool): If entry is market order (default False)
+
+        Returns:
+            OrderResult: Outcome of placement.
+        """
+        return self._execute(signal, interval, market, time.monotonic())
+
+    def submit(
+        self,
+        signal: Signal,
+        interval: str = "",
+        market: bool = False
+    ) -> Future:
+        """Place entry order of signal in background. Latency budget
+        starts now, time waiting for worker included. Result is logged,
+        so future can be dropped.
+
+        Params:
+            signal(Signal): Setup found by strategy.
+            interval(str): Candles interval of signal (default "")
+            market(bool): If entry is market order (default False)
+
+        Returns:
+            Future: OrderResult of placement.
+        """
+        return self._executor.submit(
+                    self._execute, signal, interval, market, time.monotonic())
+
+    def execute_signals(
+        self,
+        signals: List[Signal],
+        interval: str = "",
+        market: bool = False
+    ) -> List[OrderResult]:
+        """Place orders of signals concurrently.
+
+        Params:
+            signals(list): Setups found by strategies.
+            interval(str): Candles interval of signals (default "")
+            market(bool): If entries are market orders (default False)
+
+        Returns:
+            list: OrderResult of every signal, in signals order.
+        """
+        futures = [
+            self.submit(signal, interval, market) for signal in signals]
+        return [future.result() for future in futures]
+
+    def shutdown(self) -> None:
+        """Wait for submitted orders and stop workers."""
+        self._executor.shutdown(wait=True)
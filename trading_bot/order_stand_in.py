@@ -0,0 +1,250 @@
+import copy
+import itertools
+import random
+import threading
+import time
+
+import gate_api
+
+from collections import deque
+from gate_api.exceptions import ApiException
+from typing import Dict, List
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+
+# Custom order ID rules of exchange.
+TEXT_PREFIX = "t-"
+MAX_TEXT_LENGTH = 28
+
+
+class SpotOrderStandIn:
+    """Local stand-in of exchange spot order endpoints for offline tests
+    and timing. Supports create_order, get_order, list_orders and
+    cancel_order subset of SpotApi with injected latency and failures.
+    Buy orders fill against prices set by the test. Other SpotApi
+    methods are passed to market_data, f.e. ReplaySpotApi, so the
+    stand-in can back whole ExchangeApi.
+
+    Attributes:
+        market_data(SpotApi): Serves not order related requests.
+        latency(float): Seconds added to every request.
+        jitter(float): Maximum random seconds added to latency.
+        requests(int): Number of served order requests.
+        orders(dict): Order id to stored order.
+
+    Methods:
+    set_price(contract, price):
+        Set last price and fill crossed buy orders.
+    fail_next(count, status, accepted):
+        Inject failures of the next order requests.
+    create_order(order):
+        Place order.
+    get_order(order_id, currency_pair):
+        Get order by id or by text of open order.
+    list_orders(currency_pair, status):
+        List open or finished orders.
+    cancel_order(order_id, currency_pair):
+        Cancel open order.
+    """
+
+    def __init__(
+        self,
+        market_data=None,
+        latency: float = 0,
+        jitter: float = 0,
+        seed: int = None
+    ) -> None:
+        """Params:
+            market_data(SpotApi): Serves not order related requests.
+                None rejects them (default None)
+            latency(float): Seconds added to every request (default 0)
+            jitter(float): Maximum random seconds added to latency
+                (default 0)
+            seed(int): Seed of random generator for reproducible
+                runs (default None)"""
+        self.market_data = market_data
+        self.latency = latency
+        self.jitter = jitter
+        self.requests = 0
+        self.orders: Dict[str, gate_api.Order] = {}
+        self._prices: Dict[str, float] = {}
+        self._failures = deque()
+        self._ids = itertools.count(1000)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str):
+        market_data = self.__dict__.get("market_data")
+        if market_data is None:
+            raise AttributeError(name)
+        return getattr(market_data, name)
+
+    def set_price(self, contract: str, price: float) -> None:
+        """Set last price of contract and fill open buy orders at or
+        above it.
+
+        Params:
+            contract(str): Currency pair.
+            price(float): Last price.
+        """
+        with self._lock:
+            self._prices[contract] = price
+            for order in self.orders.values():
+                if (order.currency_pair == contract and order.status == "open"
+                        and float(order.price) >= price):
+                    self._fill(order, float(order.price))
+
+    def fail_next(
+        self,
+        count: int = 1,
+        status: int = 503,
+        accepted: bool = False
+    ) -> None:
+        """Inject failures of the next order requests.
+
+        Params:
+            count(int): Number of failed requests (default 1)
+            status(int): HTTP status of failure. 0 drops connection
+                (default 503)
+            accepted(bool): If create_order is executed before its
+                response is lost (default False)
+        """
+        with self._lock:
+            self._failures.extend([(status, accepted)] * count)
+
+    def _simulate(self, kwargs: dict) -> tuple:
+        """Sleep for injected latency. Returns injected failure and if
+        request times out on client side."""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            failure = self._failures.popleft() if self._failures else None
+        timeout = kwargs.get("_request_timeout")
+        if isinstance(timeout, tuple):
+            timeout = timeout[1]
+        timed_out = timeout is not None and delay > timeout
+        if delay:
+            time.sleep(min(delay, timeout) if timed_out else delay)
+        return failure, timed_out
+
+    @staticmethod
+    def _raise(failure: tuple, timed_out: bool) -> None:
+        if timed_out:
+            raise ReadTimeoutError(None, "/spot/orders", "Read timed out.")
+        status, _ = failure
+        if not status:
+            raise ProtocolError("Connection aborted.")
+        raise ApiException(status=status, reason="Injected error")
+
+    def _fill(self, order: gate_api.Order, price: float) -> None:
+        amount = float(order.amount)
+        if order.type == "market":
+            # Market buy amount is in quote currency.
+            amount = amount / price
+        order.status = "closed"
+        order.finish_as = "filled"
+        order.left = "0"
+        order.filled_amount = str(amount)
+        order.fill_price = str(price)
+        order.avg_deal_price = str(price)
+        order.filled_total = str(amount * price)
+        order.update_time_ms = int(time.time() * 1000)
+
+    def create_order(self, order: gate_api.Order, **kwargs) -> gate_api.Order:
+        failure, timed_out = self._simulate(kwargs)
+        if failure is not None and not failure[1]:
+            self._raise(failure, timed_out)
+
+        text = order.text or ""
+        if not text.startswith(TEXT_PREFIX) or len(text) > MAX_TEXT_LENGTH:
+            raise ApiException(status=400, reason="Invalid text")
+        if order.side != "buy" or order.type not in ("limit", "market"):
+            raise ApiException(status=400, reason="Unsupported order")
+        with self._lock:
+            price = self._prices.get(order.currency_pair)
+            if order.type == "market" and price is None:
+                raise ApiException(status=400, reason="No market price")
+            now = int(time.time() * 1000)
+            stored = gate_api.Order(
+                        id=str(next(self._ids)),
+                        text=text,
+                        currency_pair=order.currency_pair,
+                        type=order.type,
+                        side=order.side,
+                        amount=order.amount,
+                        price=order.price,
+                        time_in_force=order.time_in_force,
+                        stop_loss=order.stop_loss,
+                        stop_profit=order.stop_profit,
+                        status="open",
+                        left=order.amount,
+                        filled_amount="0",
+                        create_time_ms=now,
+                        update_time_ms=now)
+            if order.type == "market":
+                self._fill(stored, price)
+            elif price is not None and price <= float(order.price):
+                self._fill(stored, float(order.price))
+            self.orders[stored.id] = stored
+            response = copy.deepcopy(stored)
+
+        if failure is not None or timed_out:
+            # Order is placed, but response does not reach client.
+            self._raise(failure or (0, True), timed_out)
+        return response
+
+    def get_order(
+        self,
+        order_id: str,
+        currency_pair: str,
+        **kwargs
+    ) -> gate_api.Order:
+        failure, timed_out = self._simulate(kwargs)
+        if failure is not None or timed_out:
+            self._raise(failure, timed_out)
+        with self._lock:
+            order = self.orders.get(order_id)
+            if order is None and order_id.startswith(TEXT_PREFIX):
+                # Custom ID finds only open orders.
+                order = next((
+                    o for o in self.orders.values()
+                    if o.text == order_id and o.status == "open"), None)
+            if order is None or order.currency_pair != currency_pair:
+                raise ApiException(status=404, reason="Order not found")
+            return copy.deepcopy(order)
+
+    def list_orders(
+        self,
+        currency_pair: str,
+        status: str,
+        limit: int = 100,
+        **kwargs
+    ) -> List[gate_api.Order]:
+        failure, timed_out = self._simulate(kwargs)
+        if failure is not None or timed_out:
+            self._raise(failure, timed_out)
+        with self._lock:
+            orders = [
+                copy.deepcopy(order)
+                for order in self.orders.values()
+                if order.currency_pair == currency_pair
+                and (order.status == "open") == (status == "open")
+            ]
+        # Newest first.
+        return orders[::-1][:limit]
+
+    def cancel_order(
+        self,
+        order_id: str,
+        currency_pair: str,
+        **kwargs
+    ) -> gate_api.Order:
+        failure, timed_out = self._simulate(kwargs)
+        if failure is not None or timed_out:
+            self._raise(failure, timed_out)
+        with self._lock:
+            order = self.orders.get(order_id)
+            if order is None or order.status != "open":
+                raise ApiException(status=404, reason="Order not found")
+            order.status = "cancelled"
+            order.finish_as = "cancelled"
+            return copy.deepcopy(order)
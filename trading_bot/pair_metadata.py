@@ -0,0 +1,219 @@
+import logging
+import threading
+import time
+
+from gate_api.exceptions import ApiException, GateApiException
+from request_scheduler import RequestDeadlineExceeded, RequestScheduler
+from typing import Dict, NamedTuple, Tuple
+from urllib3.exceptions import HTTPError
+
+logger = logging.getLogger(__name__)
+
+
+class PairInfo(NamedTuple):
+    """Trading rules of a single currency pair.
+
+    Attributes:
+        contract(str): Currency pair, f.e. BTC_USDT.
+        precision(int): Price precision (decimal places).
+        amount_precision(int): Amount precision (decimal places).
+        min_base_amount(float): Minimum order amount in base currency.
+        min_quote_amount(float): Minimum order amount in quote currency.
+        trade_status(str): Exchange trading status, f.e. tradable.
+    """
+
+    contract: str
+    precision: int
+    amount_precision: int
+    min_base_amount: float
+    min_quote_amount: float
+    trade_status: str
+
+    @property
+    def tradable(self) -> bool:
+        """Returns:
+            bool: True if pair can be traded. False otherwise.
+        """
+        return self.trade_status == "tradable"
+
+    @classmethod
+    def from_api(cls, pair) -> "PairInfo":
+        """Creates PairInfo from gate_api CurrencyPair model.
+
+        Params:
+            pair(CurrencyPair): Exchange response item.
+
+        Returns:
+            PairInfo: Pair trading rules.
+        """
+        return cls(
+            contract=pair.id,
+            precision=int(pair.precision or 0),
+            amount_precision=int(pair.amount_precision or 0),
+            min_base_amount=float(pair.min_base_amount or 0),
+            min_quote_amount=float(pair.min_quote_amount or 0),
+            trade_status=pair.trade_status)
+
+
+class PairMetadataCache:
+    """Cache of currency pair metadata with time to live. All pairs are
+    loaded with one bulk request and refreshed when entries expire or
+    periodically by background thread. Concurrent callers share one
+    refresh and after failed refresh the next one waits retry delay,
+    so exchange outage does not multiply requests.
+
+    Attributes:
+        api_instance(SpotApi): Spot API instance.
+        ttl(float): Seconds after which cached data is stale.
+        retry_delay(float): Seconds between failed refresh and the next
+            one triggered by get().
+        scheduler(RequestScheduler): Rate limits refresh requests.
+        timeout(float): Seconds until refresh request deadline.
+        http_timeout(tuple): Connect and read seconds of refresh
+            request.
+
+    Methods:
+    refresh():
+        Reload metadata of all pairs in one request.
+    get(contract):
+        Get metadata of single pair.
+    start_background_refresh():
+        Start thread refreshing metadata every ttl seconds.
+    stop_background_refresh():
+        Stop refreshing thread.
+    """
+
+    def __init__(
+        self,
+        api_instance,
+        ttl: float = 3600,
+        retry_delay: float = 30,
+        scheduler: RequestScheduler = None,
+        timeout: float = 10,
+        http_timeout: Tuple[float, float] = None
+    ) -> None:
+        """Params:
+            api_instance(SpotApi): Spot API instance.
+            ttl(float): Seconds after which cached data is stale
+                (default 3600)
+            retry_delay(float): Seconds between failed refresh and the
+                next one triggered by get() (default 30)
+            scheduler(RequestScheduler): Rate limits refresh requests.
+                None creates own one (default None)
+            timeout(float): Seconds until refresh request deadline
+                (default 10)
+            http_timeout(tuple): Connect and read seconds of refresh
+                request. None uses API client default (default None)"""
+        self.api_instance = api_instance
+        self.ttl = ttl
+        self.retry_delay = retry_delay
+        if scheduler is None:
+            scheduler = RequestScheduler()
+        self.scheduler = scheduler
+        self.timeout = timeout
+        self.http_timeout = http_timeout
+        self._pairs: Dict[str, PairInfo] = {}
+        self._loaded_at = None
+        self._attempted_at = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def is_stale(self) -> bool:
+        """Returns:
+            bool: True if metadata was never loaded or ttl passed.
+        """
+        return (self._loaded_at is None
+                or time.monotonic() - self._loaded_at > self.ttl)
+
+    def _refresh_due(self) -> bool:
+        return self.is_stale() and (
+            self._attempted_at is None
+            or time.monotonic() - self._attempted_at > self.retry_delay)
+
+    def refresh(self) -> None:
+        """Reload metadata of all pairs in one request. On exchange
+        error previously loaded data is kept."""
+        with self._refresh_lock:
+            try:
+                self._load()
+            finally:
+                self._attempted_at = time.monotonic()
+
+    def _load(self) -> None:
+        kwargs = {}
+        if self.http_timeout is not None:
+            kwargs["_request_timeout"] = self.http_timeout
+        try:
+            pairs = self.scheduler.call(
+                        "list_currency_pairs",
+                        self.api_instance.list_currency_pairs,
+                        timeout=self.timeout,
+                        **kwargs)
+        except GateApiException as ex:
+            logger.error(
+                "Gate api exception, label: %s, message: %s\n"
+                % (ex.label, ex.message)
+            )
+            return
+        except ApiException as e:
+            logger.error(
+                "Exception when calling SpotApi->list_currency_pairs: %s\n"
+                % e
+            )
+            return
+        except (RequestDeadlineExceeded, HTTPError) as e:
+            logger.error(
+                "Request SpotApi->list_currency_pairs failed: %s\n" % e
+            )
+            return
+
+        loaded = {pair.id: PairInfo.from_api(pair) for pair in pairs}
+        with self._lock:
+            self._pairs = loaded
+            self._loaded_at = time.monotonic()
+        logger.info("Loaded metadata of {} currency pairs".format(
+            len(loaded)))
+
+    def get(self, contract: str) -> PairInfo:
+        """Get metadata of single pair. Stale cache is refreshed first,
+        unless refresh failed less than retry delay ago.
+
+        Params:
+            contract(str): Currency pair, f.e. BTC_USDT.
+
+        Returns:
+            PairInfo: Pair trading rules or None if pair is unknown.
+        """
+        if self._refresh_due():
+            with self._refresh_lock:
+                # Concurrent caller could refresh while this one waited.
+                if self._refresh_due():
+                    self.refresh()
+        with self._lock:
+            return self._pairs.get(contract)
+
+    def start_background_refresh(self) -> None:
+        """Load metadata now and start daemon thread refreshing it every
+        ttl seconds."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self.refresh()
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+                            target=self._refresh_loop,
+                            name="pair_metadata_refresh",
+                            daemon=True)
+        self._thread.start()
+
+    def stop_background_refresh(self) -> None:
+        """Stop refreshing thread."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _refresh_loop(self) -> None:
+        while not self._stop_event.wait(self.ttl):
+            self.refresh()
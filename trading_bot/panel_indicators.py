@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+
+from typing import Dict, Iterable
+
+# Panel is dict of field name to 2-D array, contracts x time. Rows are
+# aligned at the newest candle, contracts with shorter history are
+# padded with leading NaN. Values match ta module indicators computed
+# separately for every contract.
+
+
+def _previous(values: np.ndarray) -> np.ndarray:
+    """Values shifted one candle forward along time axis."""
+    previous = np.empty_like(values)
+    previous[:, 0] = np.nan
+    previous[:, 1:] = values[:, :-1]
+    return previous
+
+
+def _ewm(values: np.ndarray, alpha: float) -> np.ndarray:
+    """Exponentially weighted mean along time axis, y = y + alpha *
+    (x - y), started at the first value of every contract. Leading
+    NaN stay NaN."""
+    frame = pd.DataFrame(values.T)
+    return frame.ewm(alpha=alpha, adjust=False).mean().to_numpy().T
+
+
+def ema(close: np.ndarray, periods: int) -> np.ndarray:
+    """Exponential Moving Average of all contracts, like ta
+    EMAIndicator with fillna.
+
+    Params:
+        close(np.ndarray): Close values, contracts x time.
+        periods(int): Periods for EMA. Like EMA20, EMA50.
+
+    Returns:
+        np.ndarray: EMA values, contracts x time.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    return _ewm(close, 2 / (periods + 1))
+
+
+def sma(close: np.ndarray, periods: int) -> np.ndarray:
+    """Simple Moving Average of all contracts, like ta SMAIndicator
+    with fillna.
+
+    Params:
+        close(np.ndarray): Close values, contracts x time.
+        periods(int): Periods for SMA. Like SMA20, SMA50.
+
+    Returns:
+        np.ndarray: SMA values, contracts x time.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    valid = ~np.isnan(close)
+    zeros = np.zeros((close.shape[0], 1))
+    sums = np.concatenate(
+                [zeros, np.cumsum(np.where(valid, close, 0.0), axis=1)],
+                axis=1)
+    counts = np.concatenate([zeros, np.cumsum(valid, axis=1)], axis=1)
+    # Window of candle t starts at candle t - periods + 1.
+    start = np.maximum(np.arange(close.shape[1]) - periods + 1, 0)
+    total = sums[:, 1:] - sums[:, start]
+    count = counts[:, 1:] - counts[:, start]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(valid, total / count, np.nan)
+
+
+def atr(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    window: int = 14
+) -> np.ndarray:
+    """Average True Range with Wilder smoothing of all contracts, like
+    ta AverageTrueRange with fillna. Values are 0 during warmup.
+
+    Params:
+        high(np.ndarray): High values, contracts x time.
+        low(np.ndarray): Low values, contracts x time.
+        close(np.ndarray): Close values, contracts x time.
+        window(int): ATR periods (default 14)
+
+    Returns:
+        np.ndarray: ATR values, contracts x time.
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    previous = _previous(np.asarray(close, dtype=np.float64))
+    # fmax skips missing previous close of the first candle.
+    true_range = np.fmax(
+                    high - low,
+                    np.fmax(np.abs(high - previous), np.abs(low - previous)))
+    valid = ~np.isnan(true_range)
+    rows, size = true_range.shape
+    # Smoothing starts with mean of the first window true ranges.
+    seed_at = np.argmax(valid, axis=1) + window - 1
+    seeded = seed_at < size
+    seeds = np.nancumsum(true_range, axis=1)[
+                seeded, seed_at[seeded]] / window
+    smoothed = np.where(
+                np.arange(size) >= seed_at[:, None], true_range, np.nan)
+    smoothed[seeded, seed_at[seeded]] = seeds
+    smoothed = _ewm(smoothed, 1 / window)
+    # Warmup candles are 0.
+    return np.where(valid, np.nan_to_num(smoothed), np.nan)
+
+
+def rsi(close: np.ndarray, window: int = 14) -> np.ndarray:
+    """Relative Strength Index of all contracts, like ta RSIIndicator.
+    Values are NaN during warmup.
+
+    Params:
+        close(np.ndarray): Close values, contracts x time.
+        window(int): RSI periods (default 14)
+
+    Returns:
+        np.ndarray: RSI values, contracts x time.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    diff = close - _previous(close)
+    # Missing difference of the first candle is neither gain nor loss.
+    valid = ~np.isnan(close)
+    gain = _ewm(np.where(valid, np.where(diff > 0, diff, 0.0), np.nan),
+                1 / window)
+    loss = _ewm(np.where(valid, np.where(diff < 0, -diff, 0.0), np.nan),
+                1 / window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        value = np.where(loss == 0, 100.0, 100 - 100 / (1 + gain / loss))
+    ready = np.cumsum(valid, axis=1) >= window
+    return np.where(valid & ready, value, np.nan)
+
+
+def compute(
+    panel: Dict[str, np.ndarray],
+    indicators: Iterable
+) -> Dict[str, np.ndarray]:
+    """Compute indicators of all contracts in one pass along time axis.
+
+    Params:
+        panel(dict): Field name to array, contracts x time. Needs high,
+            low and close.
+        indicators(Iterable): Streaming indicators with parameters,
+            f.e. [Atr(), Ema(20)]. Ema, Sma, Atr and Rsi are supported.
+
+    Returns:
+        dict: Column name to values, contracts x time.
+    """
+    columns = {}
+    for indicator in indicators:
+        columns.update(indicator.panel(panel))
+    return columns
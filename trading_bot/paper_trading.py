@@ -0,0 +1,458 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+import numpy as np
+
+from collections import deque
+from gateio_utils import INTERVAL_SECONDS
+from pandas import DataFrame, Series
+from strategy import Signal
+from typing import Callable, Deque, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Order states.
+PENDING, OPEN, CLOSED, EXPIRED = "pending", "open", "closed", "expired"
+# Columns of paper trades log.
+PAPER_TRADE_COLUMNS = [
+    "id",
+    "contract",
+    "strategy",
+    "signal_time",
+    "entry_price",
+    "stop_loss",
+    "target",
+    "entry_time",
+    "exit_price",
+    "exit_reason",
+    "exit_time",
+    "quantity",
+    "fees",
+    "pnl",
+    "close_to_signal",
+    "signal_to_fill",
+    "signal_to_exit",
+]
+
+
+class PaperOrder:
+    """Simulated long entry order and position opened by its fill.
+
+    Attributes:
+        id(int): Order number.
+        signal(Signal): Setup which created order.
+        market(bool): If entry fills at the next price.
+        active_from(int): Open time of the first candle order can fill
+            in, the one after signal candle.
+        expires(int): Candle open time from which unfilled order is
+            cancelled.
+        status(str): PENDING, OPEN, CLOSED or EXPIRED.
+        candle_close(float): Epoch time signal candle closed.
+        signal_at(float): Epoch time signal was submitted.
+        entry_price(float): Fill price.
+        entry_time(int): Open time of fill candle or time of fill
+            tick.
+        filled_at(float): Epoch time fill was simulated.
+        quantity(float): Position size.
+        exit_price(float): Exit price.
+        exit_reason(str): "stop" or "target".
+        exit_time(int): Open time of exit candle.
+        exited_at(float): Epoch time exit was simulated.
+    """
+
+    def __init__(
+        self,
+        id: int,
+        signal: Signal,
+        market: bool,
+        active_from: int,
+        expires: int,
+        signal_at: float
+    ) -> None:
+        self.id = id
+        self.signal = signal
+        self.market = market
+        self.active_from = active_from
+        self.expires = expires
+        self.status = PENDING
+        self.candle_close = active_from
+        self.signal_at = signal_at
+        self.entry_price = None
+        self.entry_time = None
+        self.filled_at = None
+        self.quantity = None
+        self.exit_price = None
+        self.exit_reason = None
+        self.exit_time = None
+        self.exited_at = None
+
+
+class OrderBook:
+    """Orders of one contract and interval in price sorted heaps. Each
+    candle or tick pops only orders whose level it crossed, so an
+    update costs O(log n) per triggered order however many orders are
+    resting. Heap entries of orders which left the state are dropped
+    lazily.
+
+    Attributes:
+        entries(list): Max-heap of pending limit orders by entry price.
+        markets(list): Pending market orders, oldest first.
+        expiries(list): Min-heap of pending orders by expiry time.
+        stops(list): Max-heap of open positions by stop loss.
+        targets(list): Min-heap of open positions by target.
+        interval(str): Candles interval of orders.
+        last_time(int): Open time of the newest processed candle, or
+            of candle of the newest tick.
+    """
+
+    def __init__(self, interval: str) -> None:
+        self.interval = interval
+        self.entries = []
+        self.markets = []
+        self.expiries = []
+        self.stops = []
+        self.targets = []
+        self.last_time = None
+
+
+class PaperTrader:
+    """Paper trading engine. Takes signals from bot loop, keeps
+    simulated entry orders and positions and fills them against
+    incoming candles or ticks. Entry limit order fills when price
+    trades at or below it, position exits at stop loss or target,
+    stop loss first if both are hit in one candle, same as Backtest.
+    Candles and ticks can be fed together, prices of candle which
+    opened before the fill are not used for exit. Timestamps of
+    candle close, signal and simulated fill are kept, so reaction
+    latency of bot is measured.
+
+    Attributes:
+        fee(float): Fee rate paid on entry and exit notional.
+        stake(float): Quote amount of every position.
+        order_ttl(int): Candles entry order waits for fill.
+        clock(Callable): Returns current epoch time.
+        history(int): Closed and expired orders kept for trades() and
+            latency().
+        orders(dict): Order id to pending order or open position.
+
+    Methods:
+    submit(signal, interval, market):
+        Place entry order of signal.
+    on_candles(contract, interval, columns):
+        Fill orders against candles.
+    on_tick(contract, price, timestamp):
+        Fill orders against price update.
+    open_orders(contract):
+        Pending orders and open positions.
+    trades():
+        Log of closed positions.
+    latency():
+        Percentiles of reaction latency.
+    """
+
+    def __init__(
+        self,
+        fee: float = 0.002,
+        stake: float = 100.0,
+        order_ttl: int = 12,
+        clock: Callable[[], float] = time.time,
+        history: int = 10000
+    ) -> None:
+        """Params:
+            fee(float): Fee rate paid on entry and exit notional
+                (default 0.002)
+            stake(float): Quote amount of every position
+                (default 100.0)
+            order_ttl(int): Candles entry order waits for fill
+                (default 12)
+            clock(Callable): Returns current epoch time
+                (default time.time)
+            history(int): Closed and expired orders kept for trades()
+                and latency(), older ones are dropped (default 10000)"""
+        self.fee = fee
+        self.stake = stake
+        self.order_ttl = order_ttl
+        self.clock = clock
+        self.history = history
+        self.orders: Dict[int, PaperOrder] = {}
+        self._finished: Deque[PaperOrder] = deque(maxlen=history)
+        # Contract to interval to book, signals of many intervals of
+        # one contract fill against candles of their own interval.
+        self._books: Dict[str, Dict[str, OrderBook]] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _book(self, contract: str, interval: str) -> OrderBook:
+        books = self._books.setdefault(contract, {})
+        if interval not in books:
+            books[interval] = OrderBook(interval)
+        return books[interval]
+
+    def submit(
+        self,
+        signal: Signal,
+        interval: str,
+        market: bool = False
+    ) -> PaperOrder:
+        """Place entry order of signal. Order can fill from the candle
+        after signal candle.
+
+        Params:
+            signal(Signal): Setup found by strategy.
+            interval(str): Candles interval of signal.
+            market(bool): If entry fills at the next price instead of
+                signal entry price (default False)
+
+        Returns:
+            PaperOrder: Placed order.
+        """
+        interval_seconds = INTERVAL_SECONDS[interval]
+        active_from = signal.time + interval_seconds
+        with self._lock:
+            order = PaperOrder(
+                        next(self._ids),
+                        signal,
+                        market,
+                        active_from,
+                        active_from + self.order_ttl * interval_seconds,
+                        self.clock())
+            book = self._book(signal.contract, interval)
+            self.orders[order.id] = order
+            if market:
+                book.markets.append(order)
+            else:
+                heapq.heappush(book.entries, (-signal.entry, order.id, order))
+            heapq.heappush(book.expiries, (order.expires, order.id, order))
+        logger.debug("Paper order {} '{}' entry '{}' placed".format(
+            order.id, signal.contract, signal.entry))
+        return order
+
+    def on_candles(
+        self,
+        contract: str,
+        interval: str,
+        columns: Dict[str, np.ndarray]
+    ) -> None:
+        """Fill orders against candles, f.e. market stream candle
+        listener. Candles fill orders of signals of the same interval.
+        Candles older than already processed ones are skipped, the
+        newest one can be updated while it is forming.
+
+        Params:
+            contract(str): Currency pair.
+            interval(str): Candles interval.
+            columns(dict): Time sorted columnar candles.
+        """
+        with self._lock:
+            book = self._books.get(contract, {}).get(interval)
+            if book is None:
+                return
+            for t, o, h, l in zip(
+                    columns["time"].tolist(),
+                    columns["open"].tolist(),
+                    columns["high"].tolist(),
+                    columns["low"].tolist()):
+                if book.last_time is not None and t < book.last_time:
+                    continue
+                book.last_time = t
+                self._process(book, t, o, h, l)
+
+    def on_tick(self, contract: str, price: float, timestamp: int) -> None:
+        """Fill orders of all intervals against price update, f.e.
+        market stream ticker listener. Candles older than candle of
+        the tick are skipped after it.
+
+        Params:
+            contract(str): Currency pair.
+            price(float): Last price.
+            timestamp(int): Epoch time of price.
+        """
+        with self._lock:
+            for book in self._books.get(contract, {}).values():
+                interval_seconds = INTERVAL_SECONDS[book.interval]
+                candle_time = timestamp // interval_seconds * interval_seconds
+                if book.last_time is None or candle_time > book.last_time:
+                    book.last_time = candle_time
+                self._process(book, timestamp, price, price, price)
+
+    def _process(
+        self,
+        book: OrderBook,
+        t: int,
+        o: float,
+        h: float,
+        l: float
+    ) -> None:
+        """Fill, exit and expire orders of one candle."""
+        now = self.clock()
+        while book.expiries and book.expiries[0][0] <= t:
+            _, _, order = heapq.heappop(book.expiries)
+            if order.status == PENDING:
+                order.status = EXPIRED
+                self._finish(order)
+                logger.debug("Paper order {} expired".format(order.id))
+
+        waiting = []
+        for order in book.markets:
+            if order.status != PENDING:
+                continue
+            if t < order.active_from:
+                waiting.append(order)
+            else:
+                self._fill(book, order, t, o, now)
+        book.markets = waiting
+
+        deferred = []
+        while book.entries and -book.entries[0][0] >= l:
+            item = heapq.heappop(book.entries)
+            order = item[2]
+            if order.status != PENDING:
+                continue
+            if t < order.active_from:
+                deferred.append(item)
+            else:
+                # Gap below limit price fills at open.
+                self._fill(book, order, t, min(o, order.signal.entry), now)
+        for item in deferred:
+            heapq.heappush(book.entries, item)
+
+        while book.stops and -book.stops[0][0] >= l:
+            order = heapq.heappop(book.stops)[2]
+            if order.status != OPEN:
+                continue
+            stop_loss = order.signal.stop_loss
+            # Open of candle which started before the fill is older
+            # than the position.
+            price = stop_loss if t <= order.entry_time else min(o, stop_loss)
+            self._exit(order, t, price, "stop", now)
+
+        deferred = []
+        while book.targets and book.targets[0][0] <= h:
+            item = heapq.heappop(book.targets)
+            order = item[2]
+            if order.status != OPEN:
+                continue
+            if t <= order.entry_time:
+                # High of fill candle could come before the fill.
+                deferred.append(item)
+            else:
+                price = max(o, order.signal.target)
+                self._exit(order, t, price, "target", now)
+        for item in deferred:
+            heapq.heappush(book.targets, item)
+
+    def _fill(
+        self,
+        book: OrderBook,
+        order: PaperOrder,
+        t: int,
+        price: float,
+        now: float
+    ) -> None:
+        order.status = OPEN
+        order.entry_price = price
+        order.entry_time = t
+        order.filled_at = now
+        order.quantity = self.stake / price
+        heapq.heappush(book.stops, (-order.signal.stop_loss, order.id, order))
+        heapq.heappush(book.targets, (order.signal.target, order.id, order))
+        logger.debug("Paper order {} filled at '{}'".format(order.id, price))
+
+    def _exit(
+        self,
+        order: PaperOrder,
+        t: int,
+        price: float,
+        reason: str,
+        now: float
+    ) -> None:
+        order.status = CLOSED
+        order.exit_price = price
+        order.exit_reason = reason
+        order.exit_time = t
+        order.exited_at = now
+        self._finish(order)
+        logger.debug("Paper position {} closed at '{}' by {}".format(
+            order.id, price, reason))
+
+    def _finish(self, order: PaperOrder) -> None:
+        """Move closed or expired order to bounded history."""
+        del self.orders[order.id]
+        self._finished.append(order)
+
+    def open_orders(self, contract: str = None) -> List[PaperOrder]:
+        """Pending orders and open positions.
+
+        Params:
+            contract(str): Currency pair. None means all (default None)
+
+        Returns:
+            list: Orders ordered by id.
+        """
+        with self._lock:
+            return [
+                order for order in self.orders.values()
+                if order.status in (PENDING, OPEN)
+                and contract in (None, order.signal.contract)
+            ]
+
+    def trades(self) -> DataFrame:
+        """Log of closed positions with fees, P&L and latencies in
+        seconds, at most history of the newest ones.
+
+        Returns:
+            DataFrame: Closed positions ordered by exit time.
+        """
+        rows = []
+        with self._lock:
+            closed = [o for o in self._finished if o.status == CLOSED]
+        for order in closed:
+            fees = self.fee * order.quantity * (
+                        order.entry_price + order.exit_price)
+            pnl = order.quantity * (
+                    order.exit_price - order.entry_price) - fees
+            rows.append((
+                order.id,
+                order.signal.contract,
+                order.signal.strategy,
+                order.signal.time,
+                order.entry_price,
+                order.signal.stop_loss,
+                order.signal.target,
+                order.entry_time,
+                order.exit_price,
+                order.exit_reason,
+                order.exit_time,
+                order.quantity,
+                fees,
+                pnl,
+                order.signal_at - order.candle_close,
+                order.filled_at - order.signal_at,
+                order.exited_at - order.signal_at))
+        trades = DataFrame(rows, columns=PAPER_TRADE_COLUMNS)
+        return trades.sort_values(
+                ["exit_time", "id"], kind="stable").reset_index(drop=True)
+
+    def latency(self) -> DataFrame:
+        """Percentiles of reaction latency in seconds: from candle close
+        to submitted signal and from signal to simulated fill.
+
+        Returns:
+            DataFrame: Latency description, one column per stage.
+        """
+        with self._lock:
+            orders = list(self._finished) + list(self.orders.values())
+        stages = {
+            "close_to_signal": [o.signal_at - o.candle_close for o in orders],
+            "signal_to_fill": [
+                o.filled_at - o.signal_at
+                for o in orders if o.filled_at is not None
+            ],
+        }
+        return DataFrame({
+            stage: Series(values, dtype=np.float64).describe(
+                    percentiles=[0.5, 0.9, 0.99])
+            for stage, values in stages.items()
+        })
@@ -3,6 +3,7 @@ import pandas as pd
 import plotly.graph_objects as go
 
 from plotly.subplots import make_subplots
+from typing import Iterable
 
 
 logger = logging.getLogger(__name__)
@@ -11,7 +12,7 @@ class PlotData():
     """Visualization class using plotly express.
     
     Methods:
-    plot_ohlc(df, Contract):
+    plot_ohlc(df, contract, ema20, lines):
         Plot OHLC data."""
 
     def __init__(self) -> None:
@@ -22,7 +23,8 @@ class PlotData():
         self,
         df: pd.DataFrame,
         contract: str,
-        ema20: bool = False
+        ema20: bool = False,
+        lines: Iterable[str] = ()
     ) -> None:
         """Plot OHLC data.
         
@@ -30,12 +32,18 @@ class PlotData():
             df(pd.DataFrame): Data.
             contract(str): Currency pair contract.
             ema20(bool): If EMA20 should be shown on screen
-                (default False)"""
+                (default False)
+            lines(Iterable): Names of indicator columns shown as lines
+                over candles, f.e. ["ema20", "sma50"] (default ())"""
         fig = make_subplots(rows=1, cols=1)
+        time = df['time']
+        if pd.api.types.is_integer_dtype(time):
+            # Columnar candles keep time as epoch seconds.
+            time = pd.to_datetime(time, unit='s')
 
         fig.add_trace(
             go.Candlestick(
-                x=df['time'],
+                x=time,
                 open=df['open'],
                 high=df['high'],
                 low=df['low'],
@@ -44,12 +52,15 @@ class PlotData():
             row=1,
             col=1)
 
-        if (ema20):
+        lines = list(lines)
+        if ema20 and 'ema20' not in lines:
+            lines.insert(0, 'ema20')
+        for line in lines:
             fig.add_trace(
                 go.Scatter(
-                    x=df['time'],
-                    y=df['ema20'],
-                    name='ema20',
+                    x=time,
+                    y=df[line],
+                    name=line,
                     mode = 'lines',
                     marker = dict(color = 'black', size = 4)),
                 row=1,
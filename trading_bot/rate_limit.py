@@ -0,0 +1,61 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Thread safe token bucket. Each request takes one token, tokens
+    are refilled with constant rate up to burst size.
+
+    Attributes:
+        rate(float): Tokens added per second.
+        burst(float): Maximum number of stored tokens.
+
+    Methods:
+    acquire(tokens=1, timeout=None):
+        Wait until tokens are available and take them.
+    """
+
+    def __init__(self, rate: float, burst: float = None) -> None:
+        """Params:
+            rate(float): Tokens added per second.
+            burst(float): Maximum number of stored tokens
+                (default rate)"""
+        self.rate = rate
+        self.burst = burst if burst is not None else rate
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1, timeout: float = None) -> bool:
+        """Wait until tokens are available and take them.
+
+        Params:
+            tokens(float): Number of tokens to take (default 1)
+            timeout(float): Maximum seconds to wait. None waits
+                without limit (default None)
+
+        Returns:
+            bool: True if tokens were taken. False on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+
+            if deadline is not None:
+                if now + wait > deadline:
+                    return False
+            time.sleep(wait)
@@ -0,0 +1,269 @@
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+
+import gate_api
+
+from bisect import bisect_left, bisect_right
+from gate_api.exceptions import ApiException
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of candles returned by exchange in one request.
+MAX_CANDLES = 1000
+
+
+def _key(currency_pair: str, interval: str) -> str:
+    return "{}|{}".format(currency_pair, interval)
+
+
+class RecordingSpotApi:
+    """Wrapper of SpotApi which passes requests to exchange and records
+    responses of list_candlesticks, get_currency_pair and
+    list_currency_pairs for later replay.
+
+    Attributes:
+        api_instance(SpotApi): Wrapped Spot API instance.
+        path(str): Recording file.
+
+    Methods:
+    save():
+        Write recorded responses to file.
+    """
+
+    def __init__(self, api_instance, path: str) -> None:
+        """Params:
+            api_instance(SpotApi): Wrapped Spot API instance.
+            path(str): Recording file."""
+        self.api_instance = api_instance
+        self.path = path
+        self._candles: Dict[str, Dict[int, list]] = {}
+        self._pairs: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def list_candlesticks(self, currency_pair: str, **kwargs) -> list:
+        response = self.api_instance.list_candlesticks(currency_pair, **kwargs)
+        key = _key(currency_pair, kwargs.get("interval", "30m"))
+        with self._lock:
+            candles = self._candles.setdefault(key, {})
+            for item in response:
+                candles[int(item[0])] = list(item)
+        return response
+
+    def get_currency_pair(self, currency_pair: str, **kwargs):
+        pair = self.api_instance.get_currency_pair(currency_pair, **kwargs)
+        with self._lock:
+            self._pairs[pair.id] = pair.to_dict()
+        return pair
+
+    def list_currency_pairs(self, **kwargs) -> list:
+        pairs = self.api_instance.list_currency_pairs(**kwargs)
+        with self._lock:
+            for pair in pairs:
+                self._pairs[pair.id] = pair.to_dict()
+        return pairs
+
+    def save(self) -> None:
+        """Write recorded responses to file."""
+        with self._lock:
+            recording = {
+                "candlesticks": {
+                    key: [candles[t] for t in sorted(candles)]
+                    for key, candles in self._candles.items()
+                },
+                "currency_pairs": self._pairs,
+            }
+        with open(self.path, "w") as file:
+            json.dump(recording, file)
+        logger.info("Saved recording to '{}'".format(self.path))
+
+
+class ReplaySpotApi:
+    """Offline stand-in of SpotApi serving recorded responses. Supports
+    the list_candlesticks, get_currency_pair and list_currency_pairs
+    subset of API, with optional injected latency, jitter and errors.
+
+    Attributes:
+        latency(float): Seconds added to every request.
+        jitter(float): Maximum random seconds added to latency.
+        error_rate(float): Probability of request failure.
+        error_status(int): HTTP status of injected failures.
+        requests(int): Number of served requests.
+
+    Methods:
+    list_candlesticks(currency_pair, interval, limit, _from, to):
+        Recorded candles matching request.
+    get_currency_pair(currency_pair):
+        Recorded currency pair.
+    list_currency_pairs():
+        All recorded currency pairs.
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        recording: dict = None,
+        latency: float = 0,
+        jitter: float = 0,
+        error_rate: float = 0,
+        error_status: int = 503,
+        seed: int = None
+    ) -> None:
+        """Params:
+            path(str): Recording file saved by RecordingSpotApi.
+            recording(dict): Recording content, used instead of path.
+            latency(float): Seconds added to every request (default 0)
+            jitter(float): Maximum random seconds added to latency
+                (default 0)
+            error_rate(float): Probability of request failure
+                (default 0)
+            error_status(int): HTTP status of injected failures
+                (default 503)
+            seed(int): Seed of random generator for reproducible
+                runs (default None)"""
+        if recording is None:
+            with open(path) as file:
+                recording = json.load(file)
+        self._candles: Dict[str, List[list]] = recording.get(
+                                                    "candlesticks", {})
+        self._times = {
+            key: [int(item[0]) for item in candles]
+            for key, candles in self._candles.items()
+        }
+        self._pairs: Dict[str, dict] = recording.get("currency_pairs", {})
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _simulate(self) -> None:
+        """Sleep for injected latency and raise injected error."""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            failed = self._random.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        if failed:
+            raise ApiException(
+                status=self.error_status, reason="Injected error")
+
+    def list_candlesticks(
+        self,
+        currency_pair: str,
+        interval: str = "30m",
+        limit: int = None,
+        _from: int = None,
+        to: int = None,
+        **kwargs
+    ) -> list:
+        self._simulate()
+        key = _key(currency_pair, interval)
+        candles = self._candles.get(key, [])
+        times = self._times.get(key, [])
+        last = len(candles) if to is None else bisect_right(times, to)
+        if _from is not None:
+            first = min(bisect_left(times, _from), last)
+            last = min(last, first + MAX_CANDLES)
+        else:
+            first = max(0, last - min(limit or 100, MAX_CANDLES))
+        return [list(item) for item in candles[first:last]]
+
+    def get_currency_pair(self, currency_pair: str, **kwargs):
+        self._simulate()
+        if currency_pair not in self._pairs:
+            raise ApiException(status=400, reason="Unknown currency pair")
+        return gate_api.CurrencyPair(**self._pairs[currency_pair])
+
+    def list_currency_pairs(self, **kwargs) -> list:
+        self._simulate()
+        return [gate_api.CurrencyPair(**pair) for pair in self._pairs.values()]
+
+
+def record(path: str, interval: str) -> None:
+    """Record pairs metadata and candles of all bot contracts.
+
+    Params:
+        path(str): Recording file.
+        interval(str): Interval of recorded candles.
+    """
+    from bot import Bot
+    from gateio_utils import ExchangeApi
+
+    recorder = RecordingSpotApi(ExchangeApi.shared().api_instance, path)
+    bot = Bot(exchange_api=ExchangeApi(api_instance=recorder))
+    bot.exchange_api.pairs.refresh()
+    for _ in bot.fetch_candles(interval):
+        pass
+    recorder.save()
+
+
+def benchmark(
+    path: str,
+    interval: str,
+    latency: float,
+    jitter: float,
+    error_rate: float
+) -> None:
+    """Measure scan latency of recorded data for different fetch
+    concurrency limits.
+
+    Params:
+        path(str): Recording file.
+        interval(str): Interval of recorded candles.
+        latency(float): Seconds added to every request.
+        jitter(float): Maximum random seconds added to latency.
+        error_rate(float): Probability of request failure.
+    """
+    from bot import Bot
+    from gateio_utils import ExchangeApi
+    from indicators import Indicators
+    from strategy_hammer import StrategyHammer
+
+    for max_workers in (1, 2, 4, 8, 16):
+        api_instance = ReplaySpotApi(
+                            path,
+                            latency=latency,
+                            jitter=jitter,
+                            error_rate=error_rate,
+                            seed=0)
+        bot = Bot(
+                max_workers=max_workers,
+                exchange_api=ExchangeApi(api_instance=api_instance),
+                plot=False)
+        strategy = StrategyHammer(bot.live_data)
+        start = time.perf_counter()
+        bot.strategy_exec(Indicators(), strategy, interval)
+        elapsed = time.perf_counter() - start
+        print("max_workers={:<3} scan={:.3f}s requests={}".format(
+            max_workers, elapsed, api_instance.requests))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Record exchange responses or benchmark bot scan "
+                    "against recording.")
+    parser.add_argument("mode", choices=["record", "benchmark"])
+    parser.add_argument("path", help="Recording file")
+    parser.add_argument("--interval", default="5m")
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0)
+    args = parser.parse_args()
+
+    if args.mode == "record":
+        record(args.path, args.interval)
+    else:
+        benchmark(
+            args.path,
+            args.interval,
+            args.latency,
+            args.jitter,
+            args.error_rate)
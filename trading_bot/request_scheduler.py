@@ -0,0 +1,317 @@
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+
+from concurrent.futures import Future
+from gate_api.exceptions import ApiException
+from rate_limit import RateLimiter
+from typing import Callable, Dict, NamedTuple, Tuple
+from urllib3.exceptions import HTTPError
+
+logger = logging.getLogger(__name__)
+
+# Requests per second and burst size of exchange endpoints.
+ENDPOINT_LIMITS = {
+    "list_candlesticks": (18, 18),
+    "list_currency_pairs": (5, 5),
+}
+DEFAULT_LIMIT = (10, 10)
+
+
+class Priority:
+    """Request priorities constant Integers. Lower is served first."""
+
+    LIVE = 0
+    BACKFILL = 1
+
+
+class RequestDeadlineExceeded(TimeoutError):
+    """Request was not completed before its deadline."""
+
+
+class ScheduledRequest(NamedTuple):
+    """Request waiting in scheduler queue."""
+
+    endpoint: str
+    func: Callable
+    args: tuple
+    kwargs: dict
+    deadline: float
+    future: Future
+    max_retries: int
+
+
+def is_retryable(ex: Exception) -> bool:
+    """Check if failed request should be repeated. Rate limit (429),
+    server errors (5xx) and connection errors are retried.
+
+    Params:
+        ex(Exception): Exception raised by request.
+
+    Returns:
+        bool: True if request should be retried. False otherwise.
+    """
+    if isinstance(ex, ApiException):
+        return ex.status == 429 or (ex.status or 0) >= 500
+    return isinstance(ex, HTTPError)
+
+
+class RequestScheduler:
+    """Central scheduler of exchange requests. Requests wait in priority
+    queue (live scans before backfills), each endpoint has own token
+    bucket, failed requests are retried with exponential backoff and
+    jitter until their deadline.
+
+    Attributes:
+        max_workers(int): Maximum number of concurrent requests.
+        max_retries(int): Maximum retries of single request.
+        base_delay(float): Backoff seconds of the first retry.
+        max_delay(float): Maximum backoff seconds.
+        idle_timeout(float): Seconds after which idle worker exits.
+
+    Methods:
+    submit(endpoint, func, *args, priority, timeout, max_retries,
+            **kwargs):
+        Queue request and return its future.
+    call(endpoint, func, *args, priority, timeout, max_retries,
+            **kwargs):
+        Queue request and wait for its result.
+    metrics():
+        Queue depth, throttling and retries counters.
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, Tuple[float, float]] = None,
+        max_workers: int = 8,
+        max_retries: int = 4,
+        base_delay: float = 0.25,
+        max_delay: float = 8,
+        idle_timeout: float = 30
+    ) -> None:
+        """Params:
+            limits(dict): Endpoint name to (rate, burst) mapping
+                (default ENDPOINT_LIMITS)
+            max_workers(int): Maximum number of concurrent requests
+                (default 8)
+            max_retries(int): Maximum retries of single request
+                (default 4)
+            base_delay(float): Backoff seconds of the first retry
+                (default 0.25)
+            max_delay(float): Maximum backoff seconds (default 8)
+            idle_timeout(float): Seconds after which idle worker
+                exits (default 30)"""
+        self.limits = dict(ENDPOINT_LIMITS if limits is None else limits)
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.idle_timeout = idle_timeout
+        self._buckets: Dict[str, RateLimiter] = {}
+        self._queue = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._workers = 0
+        self._idle = 0
+        self._in_flight = 0
+        self._counters: Dict[str, Dict[str, float]] = {}
+
+    def _bucket(self, endpoint: str) -> RateLimiter:
+        with self._condition:
+            if endpoint not in self._buckets:
+                rate, burst = self.limits.get(endpoint, DEFAULT_LIMIT)
+                self._buckets[endpoint] = RateLimiter(rate, burst)
+            return self._buckets[endpoint]
+
+    def _count(self, endpoint: str, name: str, value: float = 1) -> None:
+        with self._condition:
+            counters = self._counters.setdefault(endpoint, {
+                "completed": 0,
+                "failed": 0,
+                "expired": 0,
+                "retries": 0,
+                "throttled": 0,
+                "throttled_seconds": 0.0,
+            })
+            counters[name] += value
+
+    def submit(
+        self,
+        endpoint: str,
+        func: Callable,
+        *args,
+        priority: int = Priority.LIVE,
+        timeout: float = None,
+        max_retries: int = None,
+        **kwargs
+    ) -> Future:
+        """Queue request and return its future.
+
+        Params:
+            endpoint(str): Endpoint name, selects token bucket.
+            func(Callable): Function making the request.
+            args: Positional arguments of func.
+            priority(int): Request priority (default Priority.LIVE)
+            timeout(float): Seconds until request deadline. None
+                means no deadline (default None)
+            max_retries(int): Maximum retries of this request, f.e. 0
+                for requests which are not safe to repeat. None uses
+                scheduler max_retries (default None)
+            kwargs: Keyword arguments of func.
+
+        Returns:
+            Future: Result of func or its exception. Expired request
+                raises RequestDeadlineExceeded.
+        """
+        future = Future()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if max_retries is None:
+            max_retries = self.max_retries
+        request = ScheduledRequest(
+                    endpoint, func, args, kwargs, deadline, future,
+                    max_retries)
+        with self._condition:
+            heapq.heappush(
+                self._queue, (priority, next(self._sequence), request))
+            if not self._idle and self._workers < self.max_workers:
+                self._workers += 1
+                threading.Thread(
+                    target=self._worker,
+                    name="request_scheduler",
+                    daemon=True).start()
+            self._condition.notify()
+        return future
+
+    def call(
+        self,
+        endpoint: str,
+        func: Callable,
+        *args,
+        priority: int = Priority.LIVE,
+        timeout: float = None,
+        max_retries: int = None,
+        **kwargs
+    ):
+        """Queue request and wait for its result.
+
+        Params:
+            endpoint(str): Endpoint name, selects token bucket.
+            func(Callable): Function making the request.
+            args: Positional arguments of func.
+            priority(int): Request priority (default Priority.LIVE)
+            timeout(float): Seconds until request deadline. None
+                means no deadline (default None)
+            max_retries(int): Maximum retries of this request. None
+                uses scheduler max_retries (default None)
+            kwargs: Keyword arguments of func.
+
+        Returns:
+            Result of func. Its exception is raised.
+        """
+        return self.submit(
+                    endpoint,
+                    func,
+                    *args,
+                    priority=priority,
+                    timeout=timeout,
+                    max_retries=max_retries,
+                    **kwargs).result()
+
+    def metrics(self) -> dict:
+        """Queue depth, throttling and retries counters.
+
+        Returns:
+            dict: Snapshot of scheduler metrics. Counters are totals
+                and per endpoint.
+        """
+        with self._condition:
+            by_priority = {}
+            for priority, _, _ in self._queue:
+                by_priority[priority] = by_priority.get(priority, 0) + 1
+            endpoints = {
+                endpoint: dict(counters)
+                for endpoint, counters in self._counters.items()
+            }
+            metrics = {
+                "queue_depth": len(self._queue),
+                "queue_depth_by_priority": by_priority,
+                "in_flight": self._in_flight,
+                "workers": self._workers,
+                "endpoints": endpoints,
+            }
+        for name in ("completed", "failed", "expired", "retries",
+                     "throttled", "throttled_seconds"):
+            metrics[name] = sum(c[name] for c in endpoints.values())
+        return metrics
+
+    def _worker(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._idle += 1
+                    notified = self._condition.wait(self.idle_timeout)
+                    self._idle -= 1
+                    if not notified and not self._queue:
+                        self._workers -= 1
+                        return
+                _, _, request = heapq.heappop(self._queue)
+                self._in_flight += 1
+            try:
+                self._execute(request)
+            finally:
+                with self._condition:
+                    self._in_flight -= 1
+
+    def _expire(self, request: ScheduledRequest) -> None:
+        self._count(request.endpoint, "expired")
+        request.future.set_exception(RequestDeadlineExceeded(
+            "Request to '{}' exceeded deadline".format(request.endpoint)))
+
+    def _execute(self, request: ScheduledRequest) -> None:
+        if not request.future.set_running_or_notify_cancel():
+            return
+        bucket = self._bucket(request.endpoint)
+        attempt = 0
+        while True:
+            remaining = None
+            if request.deadline is not None:
+                remaining = request.deadline - time.monotonic()
+                if remaining <= 0:
+                    self._expire(request)
+                    return
+
+            start = time.monotonic()
+            acquired = bucket.acquire(timeout=remaining)
+            waited = time.monotonic() - start
+            if waited > 0.001:
+                self._count(request.endpoint, "throttled")
+                self._count(request.endpoint, "throttled_seconds", waited)
+            if not acquired:
+                self._expire(request)
+                return
+
+            try:
+                result = request.func(*request.args, **request.kwargs)
+            except Exception as ex:
+                delay = random.uniform(
+                    0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                retry = (is_retryable(ex) and attempt < request.max_retries
+                         and (request.deadline is None
+                              or time.monotonic() + delay < request.deadline))
+                if not retry:
+                    self._count(request.endpoint, "failed")
+                    request.future.set_exception(ex)
+                    return
+                logger.warning("Retry {} of '{}' in {:.2f}s: {}".format(
+                    attempt + 1, request.endpoint, delay, ex))
+                self._count(request.endpoint, "retries")
+                attempt += 1
+                time.sleep(delay)
+                continue
+
+            self._count(request.endpoint, "completed")
+            request.future.set_result(result)
+            return
@@ -0,0 +1,367 @@
+import json
+import logging
+import os
+import threading
+import uuid
+import numpy as np
+
+from pandas import DataFrame
+from strategy import Signal
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Indicator values stored with every signal.
+MAX_INDICATORS = 8
+# Fixed width journal record, little endian.
+RECORD_DTYPE = np.dtype([
+    ("time", "<i8"),
+    ("contract", "S20"),
+    ("interval", "S4"),
+    ("strategy", "S32"),
+    ("entry", "<f8"),
+    ("stop_loss", "<f8"),
+    ("target", "<f8"),
+    ("indicators", "<f8", (MAX_INDICATORS,)),
+])
+# Records appended before active log is compacted into segment.
+SEGMENT_RECORDS = 4096
+ACTIVE_LOG = "active.bin"
+SCHEMA_FILE = "indicators.json"
+# Segment being published by compaction and data it replaces.
+COMPACTION_FILE = "compaction.json"
+
+
+class SignalJournal:
+    """Durable append-only journal of strategy signals. Records have
+    fixed width and are appended to active log, a crash can only lose
+    the last partially written record. Compaction moves active log
+    into immutable segment sorted by contract and time, named by the
+    time range it covers. Compaction interrupted by crash is finished
+    on open, so records are never both in segment and in data it
+    replaced. Segments are memory mapped and indexed by contract, so
+    queries read only matching rows.
+
+    Attributes:
+        root(str): Journal directory.
+        segment_records(int): Active log size which triggers
+            compaction.
+        schema(dict): Strategy name to names of its indicator values.
+
+    Methods:
+    append(signal, interval, indicators):
+        Store signal.
+    compact(full):
+        Move active log into segment.
+    segments():
+        Time ranges covered by segments.
+    query(start, end, contract, interval, strategy):
+        Stored signals matching filters.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        segment_records: int = SEGMENT_RECORDS
+    ) -> None:
+        """Params:
+            root(str): Journal directory, created if missing.
+            segment_records(int): Active log size which triggers
+                compaction (default SEGMENT_RECORDS)"""
+        self.root = root
+        self.segment_records = segment_records
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self.schema: Dict[str, List[str]] = {}
+        schema_path = os.path.join(root, SCHEMA_FILE)
+        if os.path.exists(schema_path):
+            with open(schema_path) as schema_file:
+                self.schema = json.load(schema_file)
+        # Segment name to contract -> (first, last) rows index.
+        self._index: Dict[str, Dict[bytes, Tuple[int, int]]] = {}
+        active_path = os.path.join(root, ACTIVE_LOG)
+        self._recover(active_path)
+        if os.path.exists(active_path):
+            # Drop record partially written before crash, so new records
+            # stay aligned.
+            size = os.path.getsize(active_path)
+            os.truncate(active_path, size - size % RECORD_DTYPE.itemsize)
+        self._active = open(active_path, "ab")
+        self._active_records = self._active.tell() // RECORD_DTYPE.itemsize
+
+    def close(self) -> None:
+        """Close active log."""
+        with self._lock:
+            self._active.close()
+
+    def _recover(self, active_path: str) -> None:
+        """Finish compaction interrupted by crash. If its segment was
+        published, data it replaced is removed, otherwise active log
+        and old segments are still complete."""
+        marker_path = os.path.join(self.root, COMPACTION_FILE)
+        if not os.path.exists(marker_path):
+            return
+        with open(marker_path) as marker_file:
+            marker = json.load(marker_file)
+        if os.path.exists(os.path.join(self.root, marker["segment"])):
+            for name in marker["replaces"]:
+                path = os.path.join(self.root, name)
+                if os.path.exists(path):
+                    os.remove(path)
+            if os.path.exists(active_path):
+                os.truncate(active_path, 0)
+            logger.warning("Finished interrupted compaction into '{}'"
+                .format(marker["segment"]))
+        os.remove(marker_path)
+
+    def _save_json(self, file_name: str, value) -> None:
+        tmp_path = os.path.join(self.root, "tmp-" + uuid.uuid4().hex)
+        with open(tmp_path, "w") as json_file:
+            json.dump(value, json_file)
+            json_file.flush()
+            os.fsync(json_file.fileno())
+        os.replace(tmp_path, os.path.join(self.root, file_name))
+
+    def _save_schema(self) -> None:
+        self._save_json(SCHEMA_FILE, self.schema)
+
+    def append(
+        self,
+        signal: Signal,
+        interval: str,
+        indicators: Dict[str, float] = None
+    ) -> None:
+        """Store signal. Every strategy must report the same indicator
+        names, they are stored once in journal schema.
+
+        Params:
+            signal(Signal): Signal found by strategy.
+            interval(str): Candles interval.
+            indicators(dict): Indicator values of signal candle, at
+                most MAX_INDICATORS (default None)
+        """
+        indicators = indicators or {}
+        names = sorted(indicators)
+        if len(names) > MAX_INDICATORS:
+            raise ValueError("At most {} indicators can be stored, got {}"
+                .format(MAX_INDICATORS, len(names)))
+        for field, value in (
+                ("contract", signal.contract),
+                ("interval", interval),
+                ("strategy", signal.strategy)):
+            if len(value.encode()) > RECORD_DTYPE[field].itemsize:
+                raise ValueError("{} '{}' is too long for journal record"
+                    .format(field, value))
+        record = np.zeros(1, dtype=RECORD_DTYPE)
+        record["time"] = signal.time
+        record["contract"] = signal.contract.encode()
+        record["interval"] = interval.encode()
+        record["strategy"] = signal.strategy.encode()
+        record["entry"] = signal.entry
+        record["stop_loss"] = signal.stop_loss
+        record["target"] = signal.target
+        record["indicators"] = np.nan
+        record["indicators"][0, :len(names)] = [
+            indicators[name] for name in names]
+
+        with self._lock:
+            known = self.schema.get(signal.strategy)
+            if known is None:
+                self.schema[signal.strategy] = names
+                self._save_schema()
+            elif known != names:
+                raise ValueError(
+                    "{} indicators {} do not match journal schema {}"
+                    .format(signal.strategy, names, known))
+            self._active.write(record.tobytes())
+            self._active.flush()
+            self._active_records += 1
+            full = self._active_records >= self.segment_records
+        if full:
+            self.compact()
+
+    def segments(self) -> List[Tuple[int, int]]:
+        """Time ranges covered by segments.
+
+        Returns:
+            list: Sorted [first, last] signal time pairs.
+        """
+        return [(first, last) for first, last, _ in self._segment_names()]
+
+    def _segment_names(self) -> List[Tuple[int, int, str]]:
+        names = []
+        for name in os.listdir(self.root):
+            stem, ext = os.path.splitext(name)
+            parts = stem.split("_")
+            if (ext == ".bin" and len(parts) == 3
+                    and parts[0].isdigit() and parts[1].isdigit()):
+                names.append((int(parts[0]), int(parts[1]), name))
+        return sorted(names)
+
+    def _load(self, name: str) -> np.ndarray:
+        path = os.path.join(self.root, name)
+        if not os.path.getsize(path):
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        return np.memmap(path, dtype=RECORD_DTYPE, mode="r")
+
+    def _read_active(self) -> np.ndarray:
+        path = os.path.join(self.root, ACTIVE_LOG)
+        with open(path, "rb") as active:
+            data = active.read()
+        # Skip record which is being written.
+        size = len(data) // RECORD_DTYPE.itemsize * RECORD_DTYPE.itemsize
+        return np.frombuffer(data[:size], dtype=RECORD_DTYPE)
+
+    def _write_segment(self, records: np.ndarray) -> Tuple[str, str]:
+        """Write segment to temporary file, it is published by rename,
+        so readers never see partially written data. Returns temporary
+        path and segment name."""
+        records = records[np.lexsort((records["time"], records["contract"]))]
+        name = "{}_{}_{}.bin".format(
+                int(records["time"].min()),
+                int(records["time"].max()),
+                uuid.uuid4().hex[:8])
+        tmp_path = os.path.join(self.root, "tmp-" + uuid.uuid4().hex)
+        with open(tmp_path, "wb") as segment_file:
+            segment_file.write(records.tobytes())
+            segment_file.flush()
+            os.fsync(segment_file.fileno())
+        return tmp_path, name
+
+    def _clear_active(self) -> None:
+        self._active.truncate(0)
+        self._active.seek(0)
+        self._active_records = 0
+
+    def compact(self, full: bool = False) -> int:
+        """Move active log into new segment sorted by contract and time.
+        Full compaction also merges all segments into one.
+
+        Params:
+            full(bool): If all segments should be merged (default False)
+
+        Returns:
+            int: Number of segments after compaction.
+        """
+        with self._lock:
+            parts = [self._read_active()]
+            merged = []
+            if full:
+                merged = [name for _, _, name in self._segment_names()]
+                parts.extend(np.array(self._load(name)) for name in merged)
+            records = np.concatenate(parts)
+            marker_path = os.path.join(self.root, COMPACTION_FILE)
+            published = False
+            if len(records):
+                tmp_path, segment = self._write_segment(records)
+                # Marker is saved before segment is published, crash
+                # before replaced data is removed is finished on open.
+                self._save_json(
+                    COMPACTION_FILE, {"segment": segment, "replaces": merged})
+                os.replace(tmp_path, os.path.join(self.root, segment))
+                published = True
+            for name in merged:
+                os.remove(os.path.join(self.root, name))
+                self._index.pop(name, None)
+            self._clear_active()
+            if published:
+                os.remove(marker_path)
+            count = len(self._segment_names())
+        logger.debug("Compacted signal journal into {} segments".format(count))
+        return count
+
+    def _contract_index(
+        self,
+        name: str,
+        records: np.ndarray
+    ) -> Dict[bytes, Tuple[int, int]]:
+        if name not in self._index:
+            # Segment is sorted by contract, rows of contract are one block.
+            contracts, first = np.unique(records["contract"], return_index=True)
+            bounds = np.r_[first, len(records)]
+            self._index[name] = {
+                contract: (int(bounds[i]), int(bounds[i + 1]))
+                for i, contract in enumerate(contracts)
+            }
+        return self._index[name]
+
+    def query(
+        self,
+        start: int = None,
+        end: int = None,
+        contract: str = None,
+        interval: str = None,
+        strategy: str = None
+    ) -> DataFrame:
+        """Stored signals matching filters, both compacted and from
+        active log.
+
+        Params:
+            start(int): Signal time from, epoch seconds. None means
+                no limit (default None)
+            end(int): Signal time to, exclusive. None means no limit
+                (default None)
+            contract(str): Currency pair. None means all (default None)
+            interval(str): Candles interval. None means all
+                (default None)
+            strategy(str): Strategy name. None means all (default None)
+
+        Returns:
+            DataFrame: Signals sorted by time, then contract, with
+                indicator values in columns named by journal schema.
+        """
+        low = np.iinfo(np.int64).min if start is None else start
+        high = np.iinfo(np.int64).max if end is None else end
+        key = None if contract is None else contract.encode()
+        parts = []
+        with self._lock:
+            segments = self._segment_names()
+            active = self._read_active()
+            for first, last, name in segments:
+                if last < low or first >= high:
+                    continue
+                records = self._load(name)
+                index = self._contract_index(name, records)
+                blocks = index.values() if key is None else [
+                    index[key]] if key in index else []
+                for begin, stop in blocks:
+                    block = records[begin:stop]
+                    a, b = np.searchsorted(block["time"], [low, high])
+                    if b > a:
+                        parts.append(np.array(block[a:b]))
+        mask = (active["time"] >= low) & (active["time"] < high)
+        if key is not None:
+            mask &= active["contract"] == key
+        parts.append(active[mask])
+        records = np.concatenate(parts)
+
+        if interval is not None:
+            records = records[records["interval"] == interval.encode()]
+        if strategy is not None:
+            records = records[records["strategy"] == strategy.encode()]
+        records = records[np.lexsort((records["contract"], records["time"]))]
+        return self._to_dataframe(records)
+
+    def _to_dataframe(self, records: np.ndarray) -> DataFrame:
+        df = DataFrame({
+            "time": records["time"],
+            "contract": records["contract"].astype(str),
+            "interval": records["interval"].astype(str),
+            "strategy": records["strategy"].astype(str),
+            "entry": records["entry"],
+            "stop_loss": records["stop_loss"],
+            "target": records["target"],
+        })
+        strategies = df["strategy"].to_numpy()
+        columns: Dict[str, np.ndarray] = {}
+        for name, indicators in self.schema.items():
+            rows = strategies == name
+            if not rows.any():
+                continue
+            for slot, column in enumerate(indicators):
+                if column not in columns:
+                    columns[column] = np.full(len(df), np.nan)
+                columns[column][rows] = records["indicators"][rows, slot]
+        for column, values in columns.items():
+            df[column] = values
+        return df
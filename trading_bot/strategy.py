@@ -1,11 +1,29 @@
+import hashlib
 import logging
 
 from abc import ABC, abstractmethod
+from typing import FrozenSet, NamedTuple, Optional, Tuple
 
 from live_data import LiveData
+from pandas import DataFrame
 
 logger = logging.getLogger(__name__)
 
+# Hex digest length of parameters in strategy name, keeps name within
+# journal record.
+NAME_DIGEST = 4
+
+
+class Signal(NamedTuple):
+    """Setup found by strategy on the last closed candle of contract."""
+
+    strategy: str
+    contract: str
+    time: int
+    entry: float
+    stop_loss: float
+    target: float
+
 
 class Strategy(ABC):
     """Abstract Strategy class. Define required interface for all
@@ -18,6 +36,14 @@ class Strategy(ABC):
         entry(float): Order entry value.
         stop_loss(float): Order stop loss value.
         target(float): Order target profit value.
+        required_indicators(frozenset): Specs of indicators strategy
+            reads from live data, f.e. {("ema", 20), ("atr", 14)}.
+            Computed by runner before start().
+        supports_scan(bool): If strategy implements scan().
+        supports_evaluate(bool): If strategy implements evaluate().
+        params(dict): Parameters changing found setups.
+        name(str): Strategy name used in signals, unique for class and
+            parameters.
 
     Methods:
     start():
@@ -38,8 +64,16 @@ class Strategy(ABC):
         Gets target profit value in strategy setup.
     is_setup_ready():
         Check if strategy setup is ready. We have our CEST.
+    scan(df):
+        Find setups of all bars at once.
+    evaluate(df, contract):
+        Find setup of the last closed candle without changing strategy.
     """
 
+    required_indicators: FrozenSet[Tuple] = frozenset()
+    supports_scan = False
+    supports_evaluate = False
+
     def __init__(self, live_data: LiveData) -> None:
         """Params:
             live_data(LiveData): Exchange data object with real time
@@ -50,6 +84,32 @@ class Strategy(ABC):
         self.stop_loss = None
         self.target = None
 
+    @property
+    def params(self) -> dict:
+        """Returns:
+            dict: Parameters changing found setups. Strategies of the
+                same class with different parameters must differ.
+        """
+        return {}
+
+    @property
+    def name(self) -> str:
+        """Class name with fingerprint of parameters, so instances with
+        different parameters are told apart in signals, journal and
+        client order IDs.
+
+        Returns:
+            str: Strategy name used in signals.
+        """
+        params = self.params
+        if not params:
+            return type(self).__name__
+        key = ",".join(
+                "{}={!r}".format(name, params[name]) for name in sorted(params))
+        digest = hashlib.blake2b(
+                    key.encode(), digest_size=NAME_DIGEST).hexdigest()
+        return "{}-{}".format(type(self).__name__, digest)
+
     def start(self) -> None:
         """Starts strategy setup."""
         if (self._is_condition_met()):
@@ -118,6 +178,38 @@ class Strategy(ABC):
         
         return False
 
+    def scan(self, df: DataFrame) -> DataFrame:
+        """Find setups of all bars at once, f.e. for backtests. Setup
+        of bar is the one start() finds when that bar is the last
+        closed one. Implemented only if supports_scan is set.
+
+        Params:
+            df(DataFrame): Candles with required indicators.
+
+        Returns:
+            DataFrame: Setups with bar, time, entry, stop_loss and
+                target columns.
+        """
+        raise NotImplementedError(
+            "{} has no scan mode".format(type(self).__name__))
+
+    def evaluate(self, df: DataFrame, contract: str = "") -> Optional[Signal]:
+        """Find setup of the last closed candle, the one before last.
+        Unlike start() it depends only on its arguments and does not
+        change strategy, so one strategy can evaluate many contracts
+        at once. Implemented only if supports_evaluate is set.
+
+        Params:
+            df(DataFrame): Candles with required indicators, the last
+                one is still forming.
+            contract(str): Currency pair stored in signal (default "")
+
+        Returns:
+            Signal: Found setup or None.
+        """
+        raise NotImplementedError(
+            "{} has no evaluate mode".format(type(self).__name__))
+
     def clear(self) -> None:
         self.entry = None
         self.stop_loss = None
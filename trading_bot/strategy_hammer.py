@@ -1,7 +1,10 @@
 import logging
+import numpy as np
 
 from enum import Enum
-from strategy import Strategy
+from pandas import DataFrame
+from typing import Optional
+from strategy import Signal, Strategy
 from live_data import LiveData
 
 logger = logging.getLogger(__name__)
@@ -30,7 +33,16 @@ class StrategyHammer (Strategy):
         stop_loss(float): Order stop loss value.
         target(float): Order target profit value.
         market_order(bool): If order entry is market order.
+        tail_len(int): Number of candles before hammer which have to be
+            on one side of EMA.
+        fib_ratio(float): Fibonacci range of candle which has to hold
+            whole hammer body.
+        atr_wide_pips(float): ATR in pips above which wide_pips are used.
+        atr_max_pips(float): ATR in pips from which setups are skipped.
+        wide_pips(float): Stop loss and target distance on high ATR.
+        narrow_pips(float): Stop loss and target distance on low ATR.
         _pips(int): Number of pips to calculate order details.
+        required_indicators(frozenset): EMA20 and ATR.
 
     Methods:
     start():
@@ -51,13 +63,26 @@ class StrategyHammer (Strategy):
         Gets target profit value in strategy setup.
     is_setup_ready():
         Check if strategy setup is ready. We have our CEST.
+    scan(df):
+        Find setups of all bars at once.
+    evaluate(df, contract):
+        Find setup of the last closed candle without changing strategy.
     """
 
+    required_indicators = frozenset({("ema", 20), ("atr", 14)})
+    supports_scan = True
+    supports_evaluate = True
+
     def __init__(
         self,
         live_data: LiveData,
         tail_len: int = 6,
-        market_order: bool = False
+        market_order: bool = False,
+        fib_ratio: float = 0.382,
+        atr_wide_pips: float = 100,
+        atr_max_pips: float = 300,
+        wide_pips: float = 50,
+        narrow_pips: float = 20
     ) -> None:
         """Params:
             live_data(LiveData): Exchange data object with real time
@@ -65,21 +90,48 @@ class StrategyHammer (Strategy):
             tail_len(int): Number of last candles to check if EMA is 
                 above/below(default 6)
             market_order(bool): If order entry is market order
-                (default False)"""
+                (default False)
+            fib_ratio(float): Fibonacci range of candle which has to
+                hold whole hammer body (default 0.382)
+            atr_wide_pips(float): ATR in pips above which wide_pips are
+                used (default 100)
+            atr_max_pips(float): ATR in pips from which setups are
+                skipped (default 300)
+            wide_pips(float): Stop loss and target distance on high ATR
+                (default 50)
+            narrow_pips(float): Stop loss and target distance on low
+                ATR (default 20)"""
         super().__init__(live_data)
         self.market_order = market_order
         self.tail_len = tail_len
+        self.fib_ratio = fib_ratio
+        self.atr_wide_pips = atr_wide_pips
+        self.atr_max_pips = atr_max_pips
+        self.wide_pips = wide_pips
+        self.narrow_pips = narrow_pips
         self._pips = 0 # used to calculate stop loss and target 
         # TODO improve pips implementation.
 
+    @property
+    def params(self) -> dict:
+        return {
+            "tail_len": self.tail_len,
+            "market_order": self.market_order,
+            "fib_ratio": self.fib_ratio,
+            "atr_wide_pips": self.atr_wide_pips,
+            "atr_max_pips": self.atr_max_pips,
+            "wide_pips": self.wide_pips,
+            "narrow_pips": self.narrow_pips,
+        }
+
     def start(self) -> None:
         """Starts hammer strategy setup."""
         super().start()
 
     def _is_hammer(self, o: float, h: float, l: float, c: float)-> bool:
         """Indicate if candle with OHLC input values is a hammer.
-        Hammer candle is then one which all body is in 0.382 fibonacci
-        range of total candle size.
+        Hammer candle is then one which all body is in fib_ratio
+        (0.382 by default) fibonacci range of total candle size.
         
         Params:
             o(float): Open value.
@@ -91,8 +143,8 @@ class StrategyHammer (Strategy):
             bool: True if candle is hammer, False otherwise.
         """
         range = h - l
-        fib_barier_low = 0.382 * range + l
-        fib_barier_high = h - 0.382 * range
+        fib_barier_low = self.fib_ratio * range + l
+        fib_barier_high = h - self.fib_ratio * range
 
         if o > fib_barier_high and c > fib_barier_high:
             return True
@@ -101,21 +153,27 @@ class StrategyHammer (Strategy):
 
         return False
 
-    def _check_cdl_vs_ema(self) -> int:
+    def _check_cdl_vs_ema(self, df: DataFrame = None) -> int:
         """Checks last candles placement compared to EMA value.
         If candles are above or below EMA.
+
+        Params:
+            df(DataFrame): Checked candles. None checks live data
+                (default None)
         
         Returns:
             int: EmaPlacement ABOVE or BELOW.
         """
+        if df is None:
+            df = self.live_data.df
         above = True
         below = True
         # Ignore last two candles. Last one is latest and assume
         # not closed. And the one before last should cross EMA20
         # according to strategy conditions.
-        lows = self.live_data.df['low'][-(self.tail_len + 2) : -2]
-        highs = self.live_data.df['high'][-(self.tail_len + 2) : -2]
-        emas = self.live_data.df['ema20'][-(self.tail_len + 2) : -2]
+        lows = df['low'][-(self.tail_len + 2) : -2]
+        highs = df['high'][-(self.tail_len + 2) : -2]
+        emas = df['ema20'][-(self.tail_len + 2) : -2]
         for l, h, ema in zip(lows, highs, emas):
             if l < ema:
                 above = False
@@ -128,47 +186,62 @@ class StrategyHammer (Strategy):
             return EmaPlacement.BELOW
         return EmaPlacement.CROSSED
 
-    def _is_condition_met(self) -> bool:
-        """Check if strategy conditions are met.
-        
+    def _setup_pips(self, df: DataFrame) -> Optional[float]:
+        """Check strategy conditions on the candle before last.
+
+        Params:
+            df(DataFrame): Candles with ema20 and atr14 columns.
+
         Returns:
-            bool: True if conditions met. False otherwise.
+            float: Stop loss and target distance from entry if
+                conditions are met, None otherwise.
         """
-        trend = self._check_cdl_vs_ema()
+        trend = self._check_cdl_vs_ema(df)
         if(trend != EmaPlacement.CROSSED):
             #TODO find our target candle which we are checking. Make it a dict.
-            l = self.live_data.df['low'].iloc[-2]
-            h = self.live_data.df['high'].iloc[-2]
-            c = self.live_data.df['close'].iloc[-2]
-            o = self.live_data.df['open'].iloc[-2]
-            atr = self.live_data.df['atr'].iloc[-2]
-            ema20 = self.live_data.df['ema20'].iloc[-2]
+            l = df['low'].iloc[-2]
+            h = df['high'].iloc[-2]
+            c = df['close'].iloc[-2]
+            o = df['open'].iloc[-2]
+            atr = df['atr14'].iloc[-2]
+            ema20 = df['ema20'].iloc[-2]
             hammer = self._is_hammer(o, h, l, c)
             # 1 pip is 1/10000 of price
             pip_val = c*0.0001
             atr_pips = atr/pip_val
-            if atr_pips > 100:
-                self._pips = 50 * pip_val
+            if atr_pips > self.atr_wide_pips:
+                pips = self.wide_pips * pip_val
             else:
-                self._pips = 20 * pip_val
+                pips = self.narrow_pips * pip_val
 
-            if hammer and atr_pips < 300:
+            if hammer and atr_pips < self.atr_max_pips:
                 if trend == EmaPlacement.ABOVE:
                     if l < ema20:
-                        return True
+                        return pips
                 if trend == EmaPlacement.BELOW:
                     if h > ema20:
-                        return True
+                        return pips
 
-        return False
+        return None
+
+    def _is_condition_met(self) -> bool:
+        """Check if strategy conditions are met.
+        
+        Returns:
+            bool: True if conditions met. False otherwise.
+        """
+        pips = self._setup_pips(self.live_data.df)
+        if pips is None:
+            return False
+        self._pips = pips
+        return True
 
     def _set_entry(self):
         """Sets entry value in strategy setup."""
-        # TODO rethink if entry is market value at the time of processing.
         if (self.market_order):
-            # TODO proceed to market order creation...
-            # self.entry = create_market_order()
-            pass
+            # Market order fills at current price, close of forming
+            # candle. Order is placed by bot order executor.
+            self.entry = self.live_data.df["close"].iloc[-1]
         else:
             self.entry = self.live_data.df["close"].iloc[-2]
 
@@ -180,3 +253,88 @@ class StrategyHammer (Strategy):
         """Sets target profit value in strategy setup."""
         self.target = self.entry + self._pips
 
+    def scan(self, df: DataFrame) -> DataFrame:
+        """Find hammer setups of all bars in one vectorized pass. Bar
+        setup is the one start() finds when the bar is the one before
+        last, so the last bar is not scanned. Market orders are
+        entered at close of the next bar, the one forming when the
+        setup is found live.
+
+        Params:
+            df(DataFrame): Candles with ema20 and atr14 columns.
+
+        Returns:
+            DataFrame: Setups with bar (position in df), time, entry,
+                stop_loss and target columns.
+        """
+        o = df["open"].to_numpy(dtype=np.float64)
+        h = df["high"].to_numpy(dtype=np.float64)
+        l = df["low"].to_numpy(dtype=np.float64)
+        c = df["close"].to_numpy(dtype=np.float64)
+        atr = df["atr14"].to_numpy(dtype=np.float64)
+        ema20 = df["ema20"].to_numpy(dtype=np.float64)
+        bars = np.arange(len(df))
+
+        # Count candles crossing EMA in tail_len bars before each bar.
+        start = np.maximum(bars - self.tail_len, 0)
+        lows_below = np.concatenate([[0], np.cumsum(l < ema20)])
+        highs_above = np.concatenate([[0], np.cumsum(h > ema20)])
+        above = lows_below[bars] - lows_below[start] == 0
+        below = ~above & (highs_above[bars] - highs_above[start] == 0)
+
+        range = h - l
+        fib_barier_low = self.fib_ratio * range + l
+        fib_barier_high = h - self.fib_ratio * range
+        hammer = (((o > fib_barier_high) & (c > fib_barier_high))
+                  | ((o < fib_barier_low) & (c < fib_barier_low)))
+
+        # 1 pip is 1/10000 of price
+        pip_val = c * 0.0001
+        with np.errstate(invalid="ignore", divide="ignore"):
+            atr_pips = atr / pip_val
+        setup = (hammer & (atr_pips < self.atr_max_pips)
+                 & ((above & (l < ema20)) | (below & (h > ema20))))
+        # The last bar is still forming.
+        setup[-1:] = False
+
+        found = np.flatnonzero(setup)
+        pips = np.where(
+                    atr_pips[found] > self.atr_wide_pips,
+                    self.wide_pips * pip_val[found],
+                    self.narrow_pips * pip_val[found])
+        entry = c[found + 1] if self.market_order else c[found]
+        return DataFrame({
+            "bar": found,
+            "time": df["time"].to_numpy()[found],
+            "entry": entry,
+            "stop_loss": entry - pips,
+            "target": entry + pips,
+        })
+
+    def evaluate(self, df: DataFrame, contract: str = "") -> Optional[Signal]:
+        """Find hammer setup of the candle before last without changing
+        strategy. Market orders are entered at current price, close of
+        the last forming candle.
+
+        Params:
+            df(DataFrame): Candles with ema20 and atr14 columns, the last
+                one is still forming.
+            contract(str): Currency pair stored in signal (default "")
+
+        Returns:
+            Signal: Found setup or None.
+        """
+        if len(df) < 2:
+            return None
+        pips = self._setup_pips(df)
+        if pips is None:
+            return None
+        entry = float(df["close"].iloc[-1 if self.market_order else -2])
+        pips = float(pips)
+        return Signal(
+                self.name,
+                contract,
+                int(df["time"].iloc[-2]),
+                entry,
+                entry - pips,
+                entry + pips)
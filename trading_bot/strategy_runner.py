@@ -0,0 +1,83 @@
+import logging
+
+from concurrent.futures import Executor
+from pandas import DataFrame
+from strategy import Signal, Strategy
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StrategyRunner:
+    """Evaluates many strategies on many contracts concurrently. Every
+    strategy and contract pair is a separate task reading the same
+    candles, strategies are not changed so one instance serves all
+    contracts.
+
+    Attributes:
+        strategies(list): Evaluated strategies.
+        executor(Executor): Pool running evaluations. None evaluates
+            them one by one.
+
+    Methods:
+    run(views):
+        Signals of all strategies on all contracts.
+    """
+
+    def __init__(
+        self,
+        strategies: Iterable[Strategy],
+        executor: Executor = None
+    ) -> None:
+        """Params:
+            strategies(Iterable): Strategies with evaluate mode.
+            executor(Executor): Pool running evaluations. None
+                evaluates them one by one (default None)
+
+        Raises:
+            ValueError: Strategy does not support evaluate mode or
+                strategies have the same name.
+        """
+        self.strategies = list(strategies)
+        names = set()
+        for strategy in self.strategies:
+            if not strategy.supports_evaluate:
+                raise ValueError("{} has no evaluate mode".format(
+                    strategy.name))
+            if strategy.name in names:
+                raise ValueError("Strategy {} is added twice".format(
+                    strategy.name))
+            names.add(strategy.name)
+        self.executor = executor
+
+    @staticmethod
+    def _evaluate(task: Tuple[Strategy, str, DataFrame]) -> Optional[Signal]:
+        strategy, contract, df = task
+        try:
+            return strategy.evaluate(df, contract)
+        except Exception as ex:
+            logger.error("Evaluating {} on '{}' failed: {}".format(
+                strategy.name, contract, ex))
+            return None
+
+    def run(self, views: Dict[str, DataFrame]) -> List[Signal]:
+        """Signals of all strategies on all contracts. Views must not
+        change until run returns.
+
+        Params:
+            views(dict): Contract to candles with indicators required
+                by all strategies.
+
+        Returns:
+            list: Found signals ordered by contract, then strategy.
+        """
+        tasks = [
+            (strategy, contract, df)
+            for contract, df in views.items()
+            for strategy in self.strategies
+        ]
+        if self.executor is None or len(tasks) < 2:
+            results = map(self._evaluate, tasks)
+        else:
+            results = self.executor.map(self._evaluate, tasks)
+        return [signal for signal in results if signal is not None]
@@ -0,0 +1,205 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+
+from typing import Dict, Set, Tuple
+from websockets.asyncio.server import serve
+
+logger = logging.getLogger(__name__)
+
+
+class StreamStandIn:
+    """Local stand-in of exchange spot WebSocket server for offline
+    tests. Accepts candlesticks and tickers subscriptions and publishes
+    updates pushed by the test.
+
+    Attributes:
+        host(str): Listening address.
+        port(int): Listening port, chosen by system if 0.
+        url(str): WebSocket address of running server.
+        connections(int): Number of accepted connections.
+
+    Methods:
+    start():
+        Start server in background thread.
+    stop():
+        Stop server.
+    publish_candle(contract, interval, t, o, h, l, c, v):
+        Send candle update to subscribers.
+    publish_ticker(contract, last):
+        Send price update to subscribers.
+    disconnect_all():
+        Close all client connections.
+    wait_subscribed(count, timeout):
+        Wait until subscriptions are active.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        """Params:
+            host(str): Listening address (default 127.0.0.1)
+            port(int): Listening port, chosen by system if 0
+                (default 0)"""
+        self.host = host
+        self.port = port
+        self.url = None
+        self.connections = 0
+        self._subscriptions: Dict[object, Set[Tuple[str, str]]] = {}
+        self._subscribed = threading.Condition()
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    def start(self) -> str:
+        """Start server in background thread.
+
+        Returns:
+            str: WebSocket address of server.
+        """
+        started = threading.Event()
+        self._loop = asyncio.new_event_loop()
+
+        async def run_server():
+            self._server = await serve(self._serve, self.host, self.port)
+            self.port = self._server.sockets[0].getsockname()[1]
+            self.url = "ws://{}:{}/ws/v4/".format(self.host, self.port)
+            started.set()
+            await self._server.wait_closed()
+
+        self._thread = threading.Thread(
+                            target=self._loop.run_until_complete,
+                            args=(run_server(),),
+                            name="stream_stand_in",
+                            daemon=True)
+        self._thread.start()
+        started.wait()
+        return self.url
+
+    def stop(self) -> None:
+        """Stop server."""
+        self._loop.call_soon_threadsafe(self._server.close)
+        self._thread.join()
+        self._loop.close()
+
+    async def _serve(self, websocket) -> None:
+        with self._subscribed:
+            self.connections += 1
+            self._subscriptions[websocket] = set()
+        try:
+            async for message in websocket:
+                request = json.loads(message)
+                channel = request.get("channel")
+                if request.get("event") == "subscribe":
+                    self._add_subscription(
+                        websocket, channel, request["payload"])
+                await websocket.send(json.dumps({
+                    "time": int(time.time()),
+                    "channel": channel,
+                    "event": request.get("event"),
+                    "result": {"status": "success"},
+                }))
+        finally:
+            with self._subscribed:
+                del self._subscriptions[websocket]
+
+    def _add_subscription(self, websocket, channel: str, payload: list) -> None:
+        if channel == "spot.candlesticks":
+            keys = {(channel, "{}_{}".format(payload[0], payload[1]))}
+        else:
+            keys = {(channel, contract) for contract in payload}
+        with self._subscribed:
+            self._subscriptions[websocket] |= keys
+            self._subscribed.notify_all()
+
+    def wait_subscribed(self, count: int, timeout: float = 5) -> bool:
+        """Wait until number of active subscriptions reaches count.
+
+        Params:
+            count(int): Expected subscriptions of all clients.
+            timeout(float): Maximum seconds to wait (default 5)
+
+        Returns:
+            bool: True if subscribed. False on timeout.
+        """
+        with self._subscribed:
+            return self._subscribed.wait_for(
+                lambda: sum(map(len, self._subscriptions.values())) >= count,
+                timeout)
+
+    def _publish(self, key: Tuple[str, str], result: dict) -> None:
+        message = json.dumps({
+            "time": int(time.time()),
+            "channel": key[0],
+            "event": "update",
+            "result": result,
+        })
+
+        async def send():
+            with self._subscribed:
+                websockets = [
+                    websocket
+                    for websocket, keys in self._subscriptions.items()
+                    if key in keys
+                ]
+            for websocket in websockets:
+                await websocket.send(message)
+
+        asyncio.run_coroutine_threadsafe(send(), self._loop).result()
+
+    def publish_candle(
+        self,
+        contract: str,
+        interval: str,
+        t: int,
+        o: float,
+        h: float,
+        l: float,
+        c: float,
+        v: float = 0
+    ) -> None:
+        """Send candle update to subscribers of contract and interval.
+
+        Params:
+            contract(str): Currency pair.
+            interval(str): Candles interval.
+            t(int): Candle epoch time.
+            o(float): Open value.
+            h(float): High value.
+            l(float): Low value.
+            c(float): Close value.
+            v(float): Volume (default 0)
+        """
+        name = "{}_{}".format(interval, contract)
+        self._publish(("spot.candlesticks", name), {
+            "t": str(t),
+            "v": str(v),
+            "c": str(c),
+            "h": str(h),
+            "l": str(l),
+            "o": str(o),
+            "n": name,
+        })
+
+    def publish_ticker(self, contract: str, last: float) -> None:
+        """Send price update to subscribers of contract.
+
+        Params:
+            contract(str): Currency pair.
+            last(float): Last trade price.
+        """
+        self._publish(("spot.tickers", contract), {
+            "currency_pair": contract,
+            "last": str(last),
+        })
+
+    def disconnect_all(self) -> None:
+        """Close all client connections, f.e. to test reconnection."""
+
+        async def close():
+            with self._subscribed:
+                websockets = list(self._subscriptions)
+            for websocket in websockets:
+                await websocket.close()
+
+        asyncio.run_coroutine_threadsafe(close(), self._loop).result()
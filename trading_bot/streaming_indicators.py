@@ -0,0 +1,539 @@
+import copy
+import math
+import threading
+import numpy as np
+import panel_indicators
+
+from abc import ABC, abstractmethod
+from collections import deque
+from pandas import DataFrame
+from typing import Deque, Dict, Iterable, Tuple
+
+# Candle fields read by indicators.
+INPUT_FIELDS = ("time", "high", "low", "close")
+
+
+class StreamingIndicator(ABC):
+    """Indicator updated with one candle at a time in constant time.
+    Committed state changes only with closed candles, value of forming
+    candle is computed without changing it. Values match ta module
+    indicators computed over the same candles.
+
+    Attributes:
+        key(str): Indicator type and parameters, f.e. ema20.
+        columns(tuple): Names of output DataFrame columns. Indicators
+            with different parameters have different columns.
+        requires(tuple): Specs of indicators whose columns must be
+            computed first, f.e. (("ema", 20),).
+        overlay(bool): If the first column is price drawn over
+            candles.
+
+    Methods:
+    update(high, low, close):
+        Commit closed candle and return its values.
+    peek(high, low, close):
+        Values of forming candle, state is not changed.
+    panel(panel):
+        Values of many contracts computed at once.
+    """
+
+    key = ""
+    columns = ()
+    requires = ()
+    overlay = False
+
+    def __init__(self) -> None:
+        self._state = None
+
+    @abstractmethod
+    def _next(self, state, high: float, low: float, close: float) -> tuple:
+        """Compute state and values after candle.
+
+        Params:
+            state: Committed state.
+            high(float): High value.
+            low(float): Low value.
+            close(float): Close value.
+
+        Returns:
+            tuple: New state and tuple of values ordered like columns.
+        """
+        pass
+
+    def update(self, high: float, low: float, close: float) -> tuple:
+        """Commit closed candle.
+
+        Params:
+            high(float): High value.
+            low(float): Low value.
+            close(float): Close value.
+
+        Returns:
+            tuple: Values ordered like columns.
+        """
+        self._state, values = self._next(self._state, high, low, close)
+        return values
+
+    def peek(self, high: float, low: float, close: float) -> tuple:
+        """Provisional values of still forming candle. State is not
+        changed, so the candle can be peeked many times until closed.
+
+        Params:
+            high(float): High value.
+            low(float): Low value.
+            close(float): Close value.
+
+        Returns:
+            tuple: Values ordered like columns.
+        """
+        return self._next(self._state, high, low, close)[1]
+
+    def panel(self, panel: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Values of many contracts computed in one vectorized pass, see
+        panel_indicators.
+
+        Params:
+            panel(dict): Field name to array, contracts x time.
+
+        Returns:
+            dict: Column name to values, contracts x time.
+        """
+        raise ValueError("Indicator '{}' has no panel version".format(
+            self.key))
+
+
+class Ema(StreamingIndicator):
+    """Exponential Moving Average like ta EMAIndicator with fillna."""
+
+    overlay = True
+
+    def __init__(self, periods: int) -> None:
+        """Params:
+            periods(int): Periods for EMA. Like EMA20, EMA50."""
+        super().__init__()
+        self.periods = periods
+        self.key = "ema{}".format(periods)
+        self.columns = (self.key,)
+        self._alpha = 2 / (periods + 1)
+
+    def panel(self, panel):
+        return {self.key: panel_indicators.ema(panel["close"], self.periods)}
+
+    def _next(self, state, high, low, close):
+        ema = close if state is None else state + self._alpha * (close - state)
+        return ema, (ema,)
+
+
+class Sma(StreamingIndicator):
+    """Simple Moving Average like ta SMAIndicator with fillna, first
+    values are averages of available candles."""
+
+    overlay = True
+
+    def __init__(self, periods: int) -> None:
+        """Params:
+            periods(int): Periods for SMA. Like SMA20, SMA50."""
+        super().__init__()
+        self.periods = periods
+        self.key = "sma{}".format(periods)
+        self.columns = (self.key,)
+        self._state = 0.0
+        self._window: Deque[float] = deque(maxlen=periods)
+
+    def panel(self, panel):
+        return {self.key: panel_indicators.sma(panel["close"], self.periods)}
+
+    def _next(self, state, high, low, close):
+        total = state + close
+        count = len(self._window) + 1
+        if count > self.periods:
+            total -= self._window[0]
+            count = self.periods
+        return total, (total / count,)
+
+    def update(self, high: float, low: float, close: float) -> tuple:
+        values = super().update(high, low, close)
+        self._window.append(close)
+        return values
+
+
+class Atr(StreamingIndicator):
+    """Average True Range with Wilder smoothing like ta
+    AverageTrueRange with fillna. Values are 0 during warmup."""
+
+    def __init__(self, window: int = 14) -> None:
+        """Params:
+            window(int): ATR periods (default 14)"""
+        super().__init__()
+        self.window = window
+        self.key = "atr{}".format(window)
+        self.columns = (self.key,)
+        # Candles count, previous close, sum of true ranges, ATR.
+        self._state = (0, None, 0.0, 0.0)
+
+    def panel(self, panel):
+        return {self.key: panel_indicators.atr(
+                    panel["high"], panel["low"], panel["close"], self.window)}
+
+    def _next(self, state, high, low, close):
+        count, prev_close, tr_sum, atr = state
+        true_range = high - low
+        if prev_close is not None:
+            true_range = max(
+                true_range, abs(high - prev_close), abs(low - prev_close))
+        count += 1
+        if count < self.window:
+            tr_sum += true_range
+        elif count == self.window:
+            atr = (tr_sum + true_range) / self.window
+        else:
+            atr = (atr * (self.window - 1) + true_range) / self.window
+        return (count, close, tr_sum, atr), (atr,)
+
+
+class Rsi(StreamingIndicator):
+    """Relative Strength Index like ta RSIIndicator. Values are NaN
+    during warmup."""
+
+    def __init__(self, window: int = 14) -> None:
+        """Params:
+            window(int): RSI periods (default 14)"""
+        super().__init__()
+        self.window = window
+        self.key = "rsi{}".format(window)
+        self.columns = (self.key,)
+        # Candles count, previous close, average gain and loss.
+        self._state = (0, None, 0.0, 0.0)
+
+    def panel(self, panel):
+        return {self.key: panel_indicators.rsi(panel["close"], self.window)}
+
+    def _next(self, state, high, low, close):
+        count, prev_close, gain, loss = state
+        diff = 0.0 if prev_close is None else close - prev_close
+        up = diff if diff > 0 else 0.0
+        down = -diff if diff < 0 else 0.0
+        count += 1
+        if count == 1:
+            gain, loss = up, down
+        else:
+            gain += (up - gain) / self.window
+            loss += (down - loss) / self.window
+        if count < self.window:
+            rsi = math.nan
+        elif loss == 0:
+            rsi = 100.0
+        else:
+            rsi = 100 - 100 / (1 + gain / loss)
+        return (count, close, gain, loss), (rsi,)
+
+
+class Psar(StreamingIndicator):
+    """Parabolic Stop and Reverse like ta PSARIndicator, with trend
+    reversal indicators."""
+
+    overlay = True
+
+    def __init__(self, step: float = 0.02, max_step: float = 0.20) -> None:
+        """Params:
+            step(float): Acceleration factor step (default 0.02)
+            max_step(float): Maximum acceleration factor
+                (default 0.20)"""
+        super().__init__()
+        self.step = step
+        self.max_step = max_step
+        self.key = "psar{}_{}".format(step, max_step)
+        self.columns = ("psar", "psar_up_ind", "psar_down_ind")
+
+    def _next(self, state, high, low, close):
+        if state is None:
+            # Candle index, up trend, acceleration factor, trend high,
+            # trend low, PSAR, previous and second previous high and low.
+            return ((1, True, self.step, high, low, close,
+                     high, None, low, None), (close, 0.0, 0.0))
+
+        (index, up_trend, factor, trend_high, trend_low, psar,
+         high1, high2, low1, low2) = state
+        if index == 1:
+            return ((2, up_trend, factor, trend_high, trend_low, close,
+                     high, high1, low, low1), (close, 0.0, 0.0))
+
+        reversal = False
+        if up_trend:
+            psar = psar + factor * (trend_high - psar)
+            if low < psar:
+                reversal = True
+                psar = trend_high
+                trend_low = low
+                factor = self.step
+            else:
+                if high > trend_high:
+                    trend_high = high
+                    factor = min(factor + self.step, self.max_step)
+                if low2 < psar:
+                    psar = low2
+                elif low1 < psar:
+                    psar = low1
+        else:
+            psar = psar - factor * (psar - trend_low)
+            if high > psar:
+                reversal = True
+                psar = trend_low
+                trend_high = high
+                factor = self.step
+            else:
+                if low < trend_low:
+                    trend_low = low
+                    factor = min(factor + self.step, self.max_step)
+                if high2 > psar:
+                    psar = high2
+                elif high1 > psar:
+                    psar = high1
+
+        new_trend = up_trend != reversal
+        # Trend start, first computed candle starts a trend too.
+        started = index == 2 or new_trend != up_trend
+        up_ind = 1.0 if started and new_trend else 0.0
+        down_ind = 1.0 if started and not new_trend else 0.0
+        return ((index + 1, new_trend, factor, trend_high, trend_low, psar,
+                 high, high1, low, low1), (psar, up_ind, down_ind))
+
+
+# Indicator name to class, used in indicator specs like ("ema", 20).
+INDICATORS = {
+    "ema": Ema,
+    "sma": Sma,
+    "atr": Atr,
+    "rsi": Rsi,
+    "psar": Psar,
+}
+
+
+def make_indicator(spec: Tuple) -> StreamingIndicator:
+    """Create indicator from spec of name and parameters.
+
+    Params:
+        spec(tuple): Indicator name and parameters, f.e. ("ema", 20).
+
+    Returns:
+        StreamingIndicator: Indicator with initial state.
+    """
+    name, *params = spec
+    if name not in INDICATORS:
+        raise ValueError("Unknown indicator '{}'".format(name))
+    return INDICATORS[name](*params)
+
+
+class IndicatorSeries:
+    """Streaming indicator of single contract and interval with
+    bounded history of values of closed candles. History is kept in
+    preallocated arrays like CandleRingBuffer, every value is written
+    at slot and slot + history, so kept values are one contiguous
+    slice.
+
+    Attributes:
+        indicator(StreamingIndicator): Committed indicator state.
+        last_time(int): Epoch time of the last committed candle.
+        history(int): Number of kept values of closed candles.
+
+    Methods:
+    update(columns, closed):
+        Commit new closed candles and return values aligned with them.
+    """
+
+    def __init__(self, indicator: StreamingIndicator, history: int) -> None:
+        """Params:
+            indicator(StreamingIndicator): Indicator with initial state.
+            history(int): Number of kept values of closed candles."""
+        self.indicator = indicator
+        self.last_time = None
+        self.history = history
+        self._size = 0
+        self._end = 0 # slot after the newest value
+        self._times = np.zeros(2 * history, dtype=np.int64)
+        self._values = np.zeros((2 * history, len(indicator.columns)))
+        self._lock = threading.Lock()
+
+    def _append(self, t: int, values: tuple) -> None:
+        slot = self._end
+        self._times[slot] = self._times[slot + self.history] = t
+        self._values[slot] = self._values[slot + self.history] = values
+        self._end = (slot + 1) % self.history
+        self._size = min(self._size + 1, self.history)
+
+    def update(
+        self,
+        columns: Dict[str, np.ndarray],
+        closed: bool = False
+    ) -> Dict[str, np.ndarray]:
+        """Commit candles newer than the last committed one. The last
+        candle is still forming unless closed is set, its values are
+        provisional and it is committed with the next update.
+
+        Params:
+            columns(dict): Columnar candles sorted by time.
+            closed(bool): If the last candle is closed too
+                (default False)
+
+        Returns:
+            dict: Column name to values aligned with candles. Candles
+                older than kept history get NaN.
+        """
+        times = columns["time"]
+        size = len(times)
+        with self._lock:
+            start = 0
+            if self.last_time is not None:
+                start = int(np.searchsorted(times, self.last_time, "right"))
+            end = size if closed else max(start, size - 1)
+            for t, h, l, c in zip(
+                    times[start:end].tolist(),
+                    columns["high"][start:end].tolist(),
+                    columns["low"][start:end].tolist(),
+                    columns["close"][start:end].tolist()):
+                self._append(t, self.indicator.update(h, l, c))
+                self.last_time = t
+
+            values = np.full((size, len(self.indicator.columns)), np.nan)
+            if self._size:
+                stop = self._end + self.history
+                kept = self._times[stop - self._size : stop]
+                slots = np.minimum(np.searchsorted(kept, times), self._size - 1)
+                found = kept[slots] == times
+                values[found] = self._values[stop - self._size : stop][
+                                    slots[found]]
+            if end < size:
+                values[-1] = self.indicator.peek(
+                                float(columns["high"][-1]),
+                                float(columns["low"][-1]),
+                                float(columns["close"][-1]))
+
+        return {
+            name: values[:, i]
+            for i, name in enumerate(self.indicator.columns)
+        }
+
+
+class IndicatorEngine:
+    """Keeps streaming indicators state per contract, interval and
+    indicator parameters, so every cycle costs constant time per new
+    candle instead of recomputing indicators over all candles.
+
+    Attributes:
+        history(int): Number of kept values of closed candles.
+
+    Methods:
+    seed(contract, interval, indicator, columns):
+        Reset indicator state with closed history candles.
+    update(contract, interval, indicator, columns, closed):
+        Commit new candles and return indicator values.
+    add_to(df, contract, interval, indicators):
+        Add indicators columns to DataFrame of candles.
+    """
+
+    def __init__(self, history: int = 500) -> None:
+        """Params:
+            history(int): Number of kept values of closed candles
+                (default 500)"""
+        self.history = history
+        self._series: Dict[Tuple[str, str, str], IndicatorSeries] = {}
+        self._lock = threading.Lock()
+
+    def series(
+        self,
+        contract: str,
+        interval: str,
+        indicator: StreamingIndicator
+    ) -> IndicatorSeries:
+        """Get state of indicator, indicator is used as initial state
+        of a new one.
+
+        Params:
+            contract(str): Currency pair.
+            interval(str): Candles interval.
+            indicator(StreamingIndicator): Indicator with parameters.
+
+        Returns:
+            IndicatorSeries: Indicator state.
+        """
+        key = (contract, interval, indicator.key)
+        with self._lock:
+            if key not in self._series:
+                # Copy, so one indicator can initialize many contracts.
+                self._series[key] = IndicatorSeries(
+                                        copy.deepcopy(indicator), self.history)
+            return self._series[key]
+
+    def seed(
+        self,
+        contract: str,
+        interval: str,
+        indicator: StreamingIndicator,
+        columns: Dict[str, np.ndarray]
+    ) -> Dict[str, np.ndarray]:
+        """Reset indicator state with history of closed candles, f.e.
+        from ExchangeApi.get_candle_stick_history().
+
+        Params:
+            contract(str): Currency pair.
+            interval(str): Candles interval.
+            indicator(StreamingIndicator): Indicator with initial state.
+            columns(dict): Columnar closed candles sorted by time.
+
+        Returns:
+            dict: Column name to values aligned with candles.
+        """
+        series = IndicatorSeries(copy.deepcopy(indicator), self.history)
+        values = series.update(columns, closed=True)
+        with self._lock:
+            self._series[(contract, interval, indicator.key)] = series
+        return values
+
+    def update(
+        self,
+        contract: str,
+        interval: str,
+        indicator: StreamingIndicator,
+        columns: Dict[str, np.ndarray],
+        closed: bool = False
+    ) -> Dict[str, np.ndarray]:
+        """Commit candles newer than the last committed one and return
+        indicator values. The last candle is still forming unless
+        closed is set.
+
+        Params:
+            contract(str): Currency pair.
+            interval(str): Candles interval.
+            indicator(StreamingIndicator): Indicator with parameters,
+                initial state if contract has none yet.
+            columns(dict): Columnar candles sorted by time.
+            closed(bool): If the last candle is closed too
+                (default False)
+
+        Returns:
+            dict: Column name to values aligned with candles.
+        """
+        return self.series(contract, interval, indicator).update(
+                    columns, closed)
+
+    def add_to(
+        self,
+        df: DataFrame,
+        contract: str,
+        interval: str,
+        indicators: Iterable[StreamingIndicator]
+    ) -> None:
+        """Add indicators columns to DataFrame of candles, the last
+        candle is still forming.
+
+        Params:
+            df(DataFrame): Candles with time, high, low, close columns.
+            contract(str): Currency pair.
+            interval(str): Candles interval.
+            indicators(Iterable): Indicators with parameters.
+        """
+        columns = {field: df[field].to_numpy() for field in INPUT_FIELDS}
+        for indicator in indicators:
+            values = self.update(contract, interval, indicator, columns)
+            for name, column in values.items():
+                df[name] = column
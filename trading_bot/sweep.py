@@ -0,0 +1,258 @@
+import itertools
+import logging
+import numpy as np
+import os
+import pandas as pd
+import random
+import sys
+
+from backtest import Backtest, add_required_indicators
+from concurrent.futures import ProcessPoolExecutor
+from live_data import LiveData
+from multiprocessing import shared_memory
+from pandas import DataFrame
+from typing import Dict, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Parameter sets sent to worker in one message.
+MAX_CHUNKSIZE = 16
+
+# Candles of worker process attached to shared memory once.
+_worker_memory = None
+_worker_data: Dict[str, DataFrame] = {}
+
+
+def parameter_grid(grid: Dict[str, Sequence]) -> List[dict]:
+    """All combinations of parameter values.
+
+    Params:
+        grid(dict): Parameter name to values, f.e.
+            {"tail_len": [4, 6], "fib_ratio": [0.3, 0.382]}.
+
+    Returns:
+        list: Parameter sets, keyword arguments of strategy.
+    """
+    names = list(grid)
+    return [
+        dict(zip(names, values))
+        for values in itertools.product(*(grid[name] for name in names))
+    ]
+
+
+def parameter_sample(
+    grid: Dict[str, Sequence],
+    samples: int,
+    seed: int = None
+) -> List[dict]:
+    """Random parameter sets from grid, without repeats.
+
+    Params:
+        grid(dict): Parameter name to values.
+        samples(int): Number of parameter sets. Whole grid is returned
+            if it is smaller.
+        seed(int): Random generator seed (default None)
+
+    Returns:
+        list: Parameter sets, keyword arguments of strategy.
+    """
+    names = list(grid)
+    sizes = [len(grid[name]) for name in names]
+    total = int(np.prod(sizes))
+    picked = random.Random(seed).sample(range(total), min(samples, total))
+    params = []
+    for index in picked:
+        values = {}
+        for name, size in zip(reversed(names), reversed(sizes)):
+            index, value = divmod(index, size)
+            values[name] = grid[name][value]
+        params.append({name: values[name] for name in names})
+    return params
+
+
+class SharedCandles:
+    """Numeric candle and indicator columns of many contracts copied
+    once into one shared memory block. Worker processes attach to it
+    by name instead of receiving pickled DataFrames.
+
+    Attributes:
+        memory(SharedMemory): Block holding all columns.
+        name(str): Block name used by workers to attach.
+        layout(list): Contract, column, dtype, offset and length of
+            every column in block.
+
+    Methods:
+    attach(name, layout):
+        DataFrames of contracts over existing block.
+    close():
+        Release and remove block.
+    """
+
+    def __init__(self, data: Dict[str, DataFrame]) -> None:
+        """Params:
+            data(dict): Contract to candles mapping."""
+        self.layout: List[Tuple] = []
+        columns = []
+        offset = 0
+        for contract, df in data.items():
+            for column in df.columns:
+                values = df[column].to_numpy()
+                if not np.issubdtype(values.dtype, np.number):
+                    continue
+                self.layout.append(
+                    (contract, column, values.dtype.str, offset, len(values)))
+                columns.append(values)
+                # Keep every column 8 bytes aligned.
+                offset += -(-values.nbytes // 8) * 8
+        self.memory = shared_memory.SharedMemory(
+                        create=True, size=max(offset, 1))
+        self.name = self.memory.name
+        for values, (_, _, dtype, offset, length) in zip(
+                columns, self.layout):
+            np.ndarray(length, dtype, self.memory.buf, offset)[:] = values
+
+    @staticmethod
+    def attach(
+        name: str,
+        layout: List[Tuple]
+    ) -> Tuple[shared_memory.SharedMemory, Dict[str, DataFrame]]:
+        """DataFrames of contracts over existing block. Columns are
+        read-only views, nothing is copied.
+
+        Params:
+            name(str): Block name.
+            layout(list): Columns layout of block.
+
+        Returns:
+            tuple: Attached block, it has to be kept open while
+                DataFrames are used, and contract to candles mapping.
+        """
+        if sys.version_info >= (3, 13):
+            # Block is removed by its creator only.
+            memory = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            memory = shared_memory.SharedMemory(name=name)
+        columns: Dict[str, Dict[str, np.ndarray]] = {}
+        for contract, column, dtype, offset, length in layout:
+            values = np.ndarray(length, dtype, memory.buf, offset)
+            values.flags.writeable = False
+            columns.setdefault(contract, {})[column] = values
+        data = {
+            contract: DataFrame(values, copy=False)
+            for contract, values in columns.items()
+        }
+        return memory, data
+
+    def close(self) -> None:
+        """Release and remove block."""
+        self.memory.close()
+        self.memory.unlink()
+
+    def __enter__(self) -> "SharedCandles":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _init_worker(name: str, layout: List[Tuple]) -> None:
+    global _worker_memory, _worker_data
+    _worker_memory, _worker_data = SharedCandles.attach(name, layout)
+
+
+def _evaluate(
+    strategy_class: type,
+    params: dict,
+    backtest: Backtest,
+    data: Dict[str, DataFrame]
+) -> dict:
+    strategy = strategy_class(LiveData(), **params)
+    return backtest.run_all(strategy, data).metrics
+
+
+def _evaluate_shared(task: Tuple[type, dict, Backtest]) -> dict:
+    strategy_class, params, backtest = task
+    return _evaluate(strategy_class, params, backtest, _worker_data)
+
+
+class ParameterSweep:
+    """Backtests strategy with many parameter sets across contracts on
+    a process pool and ranks the results. Candles are placed in shared
+    memory once, workers receive only parameter sets.
+
+    Attributes:
+        strategy_class(type): Strategy created with every parameter set.
+        backtest(Backtest): Backtest settings.
+        processes(int): Worker processes. 1 runs sweep in this process.
+
+    Methods:
+    run(data, params, rank_by):
+        Backtest all parameter sets and rank them.
+    """
+
+    def __init__(
+        self,
+        strategy_class: type,
+        backtest: Backtest = None,
+        processes: int = None
+    ) -> None:
+        """Params:
+            strategy_class(type): Strategy class taking live_data and
+                parameters as keyword arguments.
+            backtest(Backtest): Backtest settings. None uses defaults
+                (default None)
+            processes(int): Worker processes. None uses all cores
+                (default None)"""
+        self.strategy_class = strategy_class
+        self.backtest = backtest or Backtest()
+        self.processes = processes or os.cpu_count() or 1
+
+    def run(
+        self,
+        data: Dict[str, DataFrame],
+        params: List[dict],
+        rank_by: str = "pnl"
+    ) -> DataFrame:
+        """Backtest all parameter sets on all contracts and rank them.
+        Required indicators do not depend on parameters and are added
+        to copies of candles once, before sweep starts.
+
+        Params:
+            data(dict): Contract to historical candles mapping.
+            params(list): Parameter sets from parameter_grid() or
+                parameter_sample().
+            rank_by(str): Metric sorting results, best first
+                (default "pnl")
+
+        Returns:
+            DataFrame: Parameters and metrics of every set, best first.
+        """
+        # Shallow copies, indicator columns are not added to caller's
+        # candles, candle columns are not copied.
+        data = {contract: df.copy(deep=False) for contract, df in data.items()}
+        for df in data.values():
+            add_required_indicators(df, self.strategy_class)
+
+        if self.processes == 1 or len(params) < 2:
+            results = [
+                _evaluate(self.strategy_class, p, self.backtest, data)
+                for p in params
+            ]
+        else:
+            workers = min(self.processes, len(params))
+            chunksize = max(1, min(
+                            MAX_CHUNKSIZE, len(params) // (4 * workers)))
+            tasks = [(self.strategy_class, p, self.backtest) for p in params]
+            with SharedCandles(data) as shared, ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=_init_worker,
+                    initargs=(shared.name, shared.layout)) as executor:
+                results = list(executor.map(
+                                _evaluate_shared, tasks, chunksize=chunksize))
+        logger.info("Swept {} parameter sets of {} on {} contracts".format(
+            len(params), self.strategy_class.__name__, len(data)))
+
+        table = pd.concat(
+                    [DataFrame(params), DataFrame(results)], axis=1)
+        return (table.sort_values(rank_by, ascending=False, kind="stable")
+                .reset_index(drop=True))
@@ -1,5 +1,16 @@
 import logging
 import os
+import sys
+
+# trading_bot modules import each other as top level modules.
+# Add trading_bot to path before importing it.
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+        "trading_bot",
+    ),
+)
 
 from flask import Flask
 from flask_apscheduler import APScheduler
@@ -33,6 +44,8 @@ class Config:
     SCHEDULER_API_ENABLED = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///test.db"
     DEBUG = True
+    # Send notifications on every price update from exchange WebSocket
+    MARKET_STREAM = False
 
 
 def create_app() -> Flask:
@@ -82,6 +95,9 @@ def create_app() -> Flask:
     scheduler.init_app(app)
     scheduler.start()
 
+    if app.config["MARKET_STREAM"]:
+        notification_util.start_market_stream(app)
+
     return app
 
 
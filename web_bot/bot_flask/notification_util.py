@@ -18,8 +18,10 @@ from flask import (
 from pandas import DataFrame
 
 from bot_flask.auth import login_required
-from bot_flask.dbutil import Notification, OhlcCandle, get_db, Contract
+from bot_flask.dbutil import Notification, OhlcCandle, db, get_db, Contract
 from trading_bot.gateio_utils import ExchangeApi
+from trading_bot.live_data import LiveData
+from trading_bot.market_stream import MarketStream
 
 TREND_UP = 0
 TREND_DOWN = 1
@@ -159,7 +161,7 @@ def job_fetch_and_notify() -> Response:
     db.app.logger.info(
         "Job fetch_and_notify at time: {}".format(datetime.datetime.now())
     )
-    exchange_api = ExchangeApi()
+    exchange_api = ExchangeApi.shared()
 
     for contract in db.contract_list:
 
@@ -168,11 +170,13 @@ def job_fetch_and_notify() -> Response:
             .order_by(OhlcCandle.candle_id)
             .all()
         )
-        df = DataFrame(
-            exchange_api.get_candle_stick(
-                contract=contract, interval="1m", limit=20
-            )
+        candles = exchange_api.get_candle_stick(
+            contract=contract, interval="1m", limit=20, columnar=True
         )
+        if candles is None or len(candles["time"]) == 0:
+            db.app.logger.warning("No data for {}".format(contract))
+            continue
+        df = DataFrame(candles)
 
         current_price = Decimal(df["close"].iloc[-1])
         update_contract_current_price(contract, current_price)
@@ -184,6 +188,33 @@ def job_fetch_and_notify() -> Response:
     return Response(status=204)
 
 
+def start_market_stream(app) -> MarketStream:
+    """Starts market stream sending notifications as soon as contract
+    price changes, without waiting for scheduled job.
+
+    Params:
+        app(Flask): Flask app instance
+
+    Returns:
+        MarketStream: Started market stream
+    """
+    market_stream = MarketStream(ExchangeApi.shared(), LiveData())
+
+    def notify(contract: str, price: float) -> None:
+        with app.app_context():
+            current_price = Decimal(str(price))
+            update_contract_current_price(contract, current_price)
+            send_triggered_active_notifications(contract, current_price)
+            get_db().session.commit()
+
+    for contract in db.contract_list:
+        market_stream.subscribe_tickers(contract)
+    market_stream.add_ticker_listener(notify)
+    market_stream.start()
+
+    return market_stream
+
+
 def update_contract_current_price(
     contract: str, current_price: Decimal
 ) -> None:
@@ -203,16 +234,21 @@ def update_db_candles(db_candles: OhlcCandle, df: DataFrame) -> None:
 
     Params:
         db_candles(OhlcCandle): List of candles to be updated
-        df(DataFrame): Current data from exchange
+        df(DataFrame): Current data from exchange, time as epoch seconds
     """
-    for index, row in df.iterrows():
-        db_candles[index].time = datetime.datetime.strptime(
-            row["time"], "%H:%M %d.%m.%y"
-        )
-        db_candles[index].open = row["open"]
-        db_candles[index].high = row["high"]
-        db_candles[index].low = row["low"]
-        db_candles[index].close = row["close"]
+    rows = zip(
+        df["time"].tolist(),
+        df["open"].tolist(),
+        df["high"].tolist(),
+        df["low"].tolist(),
+        df["close"].tolist(),
+    )
+    for index, (t, o, h, l, c) in enumerate(rows):
+        db_candles[index].time = datetime.datetime.fromtimestamp(t)
+        db_candles[index].open = o
+        db_candles[index].high = h
+        db_candles[index].low = l
+        db_candles[index].close = c
 
 
 def send_triggered_active_notifications(